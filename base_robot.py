@@ -4,8 +4,30 @@ from spike import PrimeHub, LightMatrix, Button, StatusLight, \
 from spike.control import wait_for_seconds, wait_until, Timer
 from spike.operator import greater_than, greater_than_or_equal_to, \
     less_than, less_than_or_equal_to, equal_to, not_equal_to
+from control_loop import ControlLoop
+from telemetry import TelemetryBuffer
+from motion_profile import MotionProfile, STEP
+from pid import PID, GainSchedule
+from odometry import Odometry
+from pure_pursuit import PurePursuit
+from scheduler import Scheduler
+from drive_events import CheckEvents
+from profiler import Profiler
+from loop_histogram import LoopHistogram, PHASES, TURN, SETTLE, CREEP, FOLLOW, IDLE
+from telemetry_log import TelemetryLog
+from sensors import Sensors
+from memory import MemoryPolicy
+from motor_commands import MotorCommands
+from fixed_point import ONE, FixedPID, FixedGainSchedule, FixedProfile, FixedOdometry, \
+    SlowDownSpeeds
+from array import array
 import math
 import sys
+try:
+    #MicroPython on the hub
+    import ujson as json
+except ImportError:
+    import json
 
 class BaseRobot():
     """
@@ -15,6 +37,15 @@ class BaseRobot():
     Spike Prime sensors and motors. It also includes some custom methods \
     for moving the robot. Enjoy!
 
+    Parameters
+    ----------
+    fixedPoint: Use whole number math in the drive and turn controllers and \
+        odometry, so they make no float objects for the garbage collector to \
+        clean up while the robot moves. See fixed_point.py.
+    type: bool
+    values: True or False
+    default: False
+
     Example:
 
     >>> import base_robot
@@ -23,7 +54,12 @@ class BaseRobot():
     >>> br.AccelGyroDriveForward(40)
     >>> br.GyroTurn(90)
     """
-    def __init__(self):
+    #Settings that LoadProfile() is allowed to change
+    profileSettings = ("driveMaxSpeed", "driveMinSpeed", "driveAccel", "driveDecel", "driveJerk", \
+        "gyroTurnMaxSpeed", "gyroTurnMinSpeed", "gyroTurnSlowDownAngle", "gyroTurnTolerance", \
+        "pathLookahead", "pathLateralAccel", "lineBlack", "lineWhite", "lineSpeed")
+
+    def __init__(self, fixedPoint=False):
         self.hub = PrimeHub()
         self._version = "1.5 8/5/2022"
         self._leftDriveMotorPort = 'E'
@@ -32,26 +68,112 @@ class BaseRobot():
         self._rightAttachmentMotorPort = 'D'
         self._colorSensorPort = 'F'
         self.driveMotors = MotorPair(self._leftDriveMotorPort, self._rightDriveMotorPort)
+        #The drive and turn methods send their motor commands through here, \
+        #which leaves out commands that would not change anything
+        self.driveCommands = MotorCommands(self.driveMotors)
         self.debugMode = False
+        #Set profilingMode to True to time every drive and turn, see DumpTimings()
+        self.profilingMode = False
+        #Set histogramMode to True to count how long every control loop pass \
+        #takes, see DumpLoopHistogram()
+        self.histogramMode = False
+        self.fixedPoint = fixedPoint
         self.colorSensor = ColorSensor(self._colorSensorPort)
         self.rightMedMotor = Motor(self._rightAttachmentMotorPort)
         self.leftMedMotor = Motor(self._leftAttachmentMotorPort)
         self._tireDiameter = 5.6 #CM
         self._tireCircum = self._tireDiameter * math.pi #CM
+        self._trackWidth = 11.2 #CM between the middles of the drive wheels
+        #Degrees the robot turns on the spot for each motor degree of difference \
+        #between the wheels, for measuring the turn rate with the encoders
+        self._turnPerDegree = math.degrees(self._tireCircum / 360 / self._trackWidth)
+        self._turnPerDegreeFixed = int(round(self._turnPerDegree * ONE))
+        self._leftDriveMotor = Motor(self._leftDriveMotorPort)
+        self._rightDriveMotor = Motor(self._rightDriveMotorPort)
+        #Reads the gyro, drive encoders and color sensor once per control loop \
+        #pass for everything in the pass to share
+        self.sensors = Sensors(self.hub.motion_sensor, self._leftDriveMotor, self._rightDriveMotor, \
+            self.colorSensor)
+        #Keeps track of where the robot is. See GetPose() and SetPose().
+        if fixedPoint:
+            self.odometry = FixedOdometry(self._tireCircum, self._trackWidth)
+        else:
+            self.odometry = Odometry(self._tireCircum, self._trackWidth)
+        #FollowPath settings. The lookahead is in cm, longer is smoother. The \
+        #robot slows for corners to keep the sideways acceleration below \
+        #pathLateralAccel, in cm per second per second.
+        self.pathLookahead = 15
+        self.pathLateralAccel = 100
+        #All drive and turn methods run their controllers at this fixed rate
+        self.controlLoop = ControlLoop(100) #Hz
+        #When to collect garbage, so it happens between moves. See memory.py.
+        self.memory = MemoryPolicy()
+        #Runs drive methods, attachment moves and sensor waits at the same time. \
+        #See StartTask() and RunTogether().
+        self.scheduler = Scheduler(self.controlLoop, self.memory, self.driveCommands)
+        #GyroDriveOnHeading speed profile. Speeds are in percent, accel and decel \
+        #in percent per second. Set driveJerk (percent per second per second) to \
+        #round the corners of the profile off into an S-curve.
+        self.driveMaxSpeed = 75
+        self.driveMinSpeed = 10
+        self.driveAccel = 200
+        self.driveDecel = 200
+        self.driveJerk = None
+        #Heading correction for GyroDriveOnHeading. Each row of the schedule is \
+        #(speed, kp, ki, kd). Gains for speeds in between are blended.
+        self.headingPid = FixedPID(1, outputLimit=100) if fixedPoint else PID(1, outputLimit=100)
+        self.headingGains = GainSchedule([(10, 3.0, 2.0, 0.0), (40, 2.0, 1.5, 0.06), (75, 1.5, 1.0, 0.1)])
+        #headingGains for every whole speed, made when a fixedPoint drive needs it
+        self._fixedGains = None
+        #Motor degrees per second at speed 100, used to plan the speed profile
+        self._motorFullSpeed = 1000
+        #The drives plan their speeds into these tables, so a drive needs no \
+        #new memory once the control loop runs. They have room for a 250 cm \
+        #drive, a longer one makes its own.
+        profileEntries = int(math.ceil(250 / self._tireCircum * 360 / STEP)) + 1
+        self._profileTable = array('f', [0] * profileEntries)
+        self._fixedProfileTable = array('i', [0] * profileEntries) if fixedPoint else None
+        #The drive and turn methods save one sample per loop pass in here
+        self.telemetry = TelemetryBuffer(500)
+        #Saves every sample to a file as well, see StartTelemetryLog()
+        self.telemetryLog = None
+        #True from the start of a move until its first sample is logged
+        self._logMoveStart = False
+        #Start and end times of drives and turns, when profilingMode is on
+        self.profiler = Profiler(200)
+        #Control loop pass times, when histogramMode is on
+        self.loopHistogram = LoopHistogram()
+        self._turnCall = -1
+        #FollowLine settings. lineBlack and lineWhite are the reflected light \
+        #readings on the line and on the mat, see CalibrateLineSensor(). The \
+        #PID works on how far the reading is from halfway, in percent.
+        self.lineBlack = 10
+        self.lineWhite = 95
+        self.lineSpeed = 40
+        self.linePid = PID(0.8, 0.3, 0.04, outputLimit=100)
+        #Predictive GyroTurn settings. Speeds are in percent.
+        self.gyroTurnMaxSpeed = 60
+        self.gyroTurnMinSpeed = 8
+        #How many degrees before the target the turn starts slowing down
+        self.gyroTurnSlowDownAngle = 45
+        #How close to the target is close enough, in degrees
+        self.gyroTurnTolerance = 1
+        #Seconds worth of turning the robot keeps doing after the motors are told \
+        #to stop. GyroTurn measures this on every turn and keeps it up to date.
+        self._turnCoastTime = 0.05
 
     
 
-    def GyroTurn(self, angle):
+    def GyroTurn(self, angle, predictive=True):
         """
         Turns the robot to the specified `angle`. 
         Positive numbers turn to the right, negative numbers turn the robot \
-            to the left. Note that when the robot makes the turn, it will \
-            always overshoot by about seven degrees. In other words if you \
-            need a +90 degree turn, you will probably end up commanding \
-            something around +83 degrees. You may also want to put a \
-            wait_for_seconds(0.2) or something like that after a gyro turn. \
-            Just to make sure the robot has stopped moving before continuing \
-            with more instructions.
+            to the left. The robot turns fast, slows down as it gets close, \
+            and stops the motors early so that it coasts into the target. \
+            It measures how far it coasted after every turn, so the stopping \
+            point keeps getting better. The turn waits until the robot has \
+            stopped moving, so there is no need for a wait_for_seconds() \
+            afterwards. The drive motors brake when the turn stops them.
         Parameter
         -------------
         angle: Where the robot should stop turning at. \
@@ -61,34 +183,262 @@ class BaseRobot():
         values: Any. Best to keep the numbers less than 180, just so the \
             robot doesn't turn more than necessary.
         default: No default value
+        predictive: Use the fast turn that stops early.
+        type: boolean
+        values: True or False. False makes the old slow turn at speed 10, \
+            which always overshoots by about seven degrees. In other words if \
+            you need a +90 degree turn with predictive=False, you will \
+            probably end up commanding something around +83 degrees.
+        default: True
+        """
+        self.scheduler.Run(self.GyroTurnTask(angle, predictive))
+
+    def GyroTurnTask(self, angle, predictive=True):
+        """
+        ``GyroTurn()`` as a task, so other tasks can run during the turn. See \
+        ``RunTogether()``.
         """
         #Tests for angle and debug mode
         if self.debugMode and (angle > 179 or angle < -180):
             sys.exit("GyroTurn() Error: Angle must be between -180 and 180")
+        call = self._BeginTiming("GyroTurn", TURN)
+        if predictive:
+            self._turnCall = call
+            yield from self._PredictiveGyroTurn(angle)
+            self._EndTiming(call)
+            return
         #Sets turn speed
         gyroTurnSpeed = 10
+        self._LogTarget("GyroTurn", angle, 0, gyroTurnSpeed, 0)
+        loop = self.controlLoop
+        telemetry = self.telemetry
+        self._StartMove("GyroTurn")
+        sensors = self.sensors
+        logging = self.telemetryLog is not None
+        #The classic turn never settles or creeps, it is all turning
+        self._Phase(call, TURN)
+        loop.Start()
         #Tests if the angle is positive.
         if(angle > 0):
-            while(MotionSensor().get_yaw_angle() < angle):
+            s = sensors.Read(logging)
+            while(s.yaw < angle):
                 #If it it is positive it starts turning right.
-                self.driveMotors.start_tank(gyroTurnSpeed, -gyroTurnSpeed)
+                self.driveCommands.StartTank(gyroTurnSpeed, -gyroTurnSpeed)
+                telemetry.Add(loop.ElapsedUs(), s.right, s.yaw, gyroTurnSpeed, 100)
+                if logging:
+                    self._LogSample(s.yaw, gyroTurnSpeed, 100)
+                yield
+                s = sensors.Read(logging)
+                self._UpdatePose(s)
         else:
-            while(MotionSensor().get_yaw_angle() > angle):
+            s = sensors.Read(logging)
+            while(s.yaw > angle):
                 #If it it is not positive it starts turning left.
-                self.driveMotors.start_tank(-gyroTurnSpeed, gyroTurnSpeed)
+                self.driveCommands.StartTank(-gyroTurnSpeed, gyroTurnSpeed)
+                telemetry.Add(loop.ElapsedUs(), s.right, s.yaw, gyroTurnSpeed, -100)
+                if logging:
+                    self._LogSample(s.yaw, gyroTurnSpeed, -100)
+                yield
+                s = sensors.Read(logging)
+                self._UpdatePose(s)
         #Stops when it is it has reached the desired angle
-        self.driveMotors.stop()
+        self.driveCommands.Stop()
+        if logging:
+            #Log the pass that stops the motors too, so a replay sees every reading
+            self._LogSample(s.yaw, 0, 0)
+        self._EndTiming(call)
+        if self.debugMode:
+            print("GyroTurn " + loop.Report())
     
     
-    def GyroDriveOnHeading(self, distance, heading):
+    def _PredictiveGyroTurn(self, angle):
+        #Turns right for positive angles and left for negative ones, the same \
+        #as the classic turn
+        direction = 1 if angle > 0 else -1
+        loop = self.controlLoop
+        self._StartMove("GyroTurn")
+        loop.Start()
+        self._StartTurnRate()
+        #Like the classic turn, do nothing if the robot is already past the angle
+        #and write no target, as there is no move to go with it
+        if direction * (angle - self._turnYaw) <= 0:
+            return
+        self._LogTarget("GyroTurn", angle, 0, self.gyroTurnMaxSpeed, 1)
+
+        #Fast turn with a tapered approach, stopping early
+        self._Phase(self._turnCall, TURN)
+        stopRate = yield from self._TurnTowards(angle, direction, self.gyroTurnMaxSpeed)
+        coastStart = self._turnYaw
+        #Braking stops the robot the same way every time, so the coast is \
+        #predictable. Only this turn's stops brake, later moves stop as before.
+        self.driveCommands.Stop("brake")
+        self._Phase(self._turnCall, SETTLE)
+        yield from self._SettleTurn()
+        self._LearnTurnCoast(stopRate, direction * (self._turnYaw - coastStart))
+
+        #Creep back to the target if the robot did not land close enough
+        for attempt in range(2):
+            error = angle - self._turnYaw
+            if abs(error) <= self.gyroTurnTolerance:
+                break
+            creepDirection = 1 if error > 0 else -1
+            self._Phase(self._turnCall, CREEP)
+            yield from self._TurnTowards(angle, creepDirection, self.gyroTurnMinSpeed, True)
+            self.driveCommands.Stop("brake")
+            self._Phase(self._turnCall, SETTLE)
+            yield from self._SettleTurn()
+
+        if self.debugMode:
+            print("GyroTurn to " + str(angle) + " ended at " + str(self._turnYaw) + \
+                ", coast time " + str(self._turnCoastTime))
+            print("GyroTurn " + loop.Report())
+
+    def _StartTurnRate(self):
+        #The yaw that keeps counting past +-180, the turn rate in degrees per \
+        #second, the last raw gyro reading, the difference between the wheels \
+        #and when they were read. The wheels are first read in the first pass, \
+        #so every reading the rate comes from is in the telemetry log.
+        self._turnRawYaw = self.sensors.ReadYaw()
+        self._turnYaw = self._turnRawYaw
+        self._turnWheels = None
+        self._turnRate = 0
+        self._turnReadUs = self.controlLoop.ElapsedUs()
+
+    def _UpdateTurnRate(self):
+        #Reads the sensors once. The yaw says where the robot is pointing. The \
+        #turn rate comes from the encoders, because one degree of gyro flicker \
+        #between two passes 10 ms apart would look like 100 degrees per second.
+        s = self.sensors.Read(self.telemetryLog is not None)
+        yaw = s.yaw
+        wheels = s.left - s.right
+        nowUs = self.controlLoop.ElapsedUs()
+        self._UpdatePose(s)
+        change = yaw - self._turnRawYaw
+        if change > 180:
+            change -= 360
+        elif change < -180:
+            change += 360
+        elapsedUs = nowUs - self._turnReadUs
+        if self._turnWheels is not None and elapsedUs > 0:
+            wheelChange = wheels - self._turnWheels
+            #Smooth the rate a little because the encoders only count whole degrees
+            if self.fixedPoint:
+                #Degrees per second times ONE. Dividing before the last * 100 \
+                #keeps the numbers small enough for MicroPython's small ints.
+                self._turnRate = (self._turnRate + \
+                    wheelChange * self._turnPerDegreeFixed * 10000 // elapsedUs * 100) // 2
+            else:
+                self._turnRate = 0.5 * self._turnRate + \
+                    0.5 * wheelChange * self._turnPerDegree * 1000000 / elapsedUs
+        self._turnYaw += change
+        self._turnRawYaw = yaw
+        self._turnWheels = wheels
+        self._turnReadUs = nowUs
+
+    def _TurnTowards(self, angle, direction, maxSpeed, creep=False):
+        #Turns until the predicted coast would carry the robot onto `angle`. \
+        #Returns the turn rate when it was time to stop the motors. A creep \
+        #starts from standing still, so it only stops early once the robot is \
+        #really turning the right way.
+        if self.fixedPoint:
+            return (yield from self._TurnTowardsFixed(angle, direction, maxSpeed, creep))
+        loop = self.controlLoop
+        minSpeed = min(self.gyroTurnMinSpeed, maxSpeed)
+        slowDownAngle = self.gyroTurnSlowDownAngle
+        moving = not creep
+        while True:
+            self._UpdateTurnRate()
+            rate = abs(self._turnRate)
+            if direction * self._turnRate > 0:
+                moving = True
+            remaining = direction * (angle - self._turnYaw)
+            #How far the robot will keep turning after stop(), plus half a loop \
+            #pass because the next check is one pass away
+            coast = rate * (self._turnCoastTime + loop.periodS / 2)
+            if remaining <= 0 or (moving and remaining <= coast):
+                if self.telemetryLog is not None:
+                    #Log the pass that stops the motors too, so a replay sees every reading
+                    self._LogSample(self._turnYaw, 0, 0)
+                return rate
+            if remaining >= slowDownAngle:
+                speed = maxSpeed
+            else:
+                #Slow down evenly so the turn rate drops like it does when braking
+                speed = math.sqrt(minSpeed * minSpeed + \
+                    (maxSpeed * maxSpeed - minSpeed * minSpeed) * remaining / slowDownAngle)
+            speed = int(speed) * direction
+            self.driveCommands.StartTank(speed, -speed)
+            self.telemetry.Add(loop.ElapsedUs(), self.sensors.right, self._turnYaw, speed, 100 * direction)
+            if self.telemetryLog is not None:
+                self._LogSample(self._turnYaw, speed, 100 * direction)
+            yield
+
+    def _TurnTowardsFixed(self, angle, direction, maxSpeed, creep):
+        #_TurnTowards() in whole numbers. Angles are degrees times ONE, the \
+        #turn rate is degrees per second times ONE and the coast time is in \
+        #tenths of a millisecond.
+        loop = self.controlLoop
+        speeds = SlowDownSpeeds(min(self.gyroTurnMinSpeed, maxSpeed), maxSpeed, self.gyroTurnSlowDownAngle)
+        maxSpeed = int(maxSpeed)
+        angle = int(round(angle * ONE))
+        coastTime = int(round((self._turnCoastTime + loop.periodS / 2) * 10000))
+        moving = not creep
+        while True:
+            self._UpdateTurnRate()
+            rate = abs(self._turnRate)
+            if direction * self._turnRate > 0:
+                moving = True
+            remaining = direction * (angle - self._turnYaw * ONE)
+            if remaining <= 0 or (moving and remaining <= rate * coastTime // 10000):
+                if self.telemetryLog is not None:
+                    #Log the pass that stops the motors too, so a replay sees every reading
+                    self._LogSample(self._turnYaw, 0, 0)
+                return rate / ONE
+            wholeDegrees = remaining // ONE
+            if wholeDegrees >= len(speeds):
+                speed = maxSpeed * direction
+            else:
+                speed = speeds[wholeDegrees] * direction
+            self.driveCommands.StartTank(speed, -speed)
+            self.telemetry.Add(loop.ElapsedUs(), self.sensors.right, self._turnYaw, speed, 100 * direction)
+            if self.telemetryLog is not None:
+                self._LogSample(self._turnYaw, speed, 100 * direction)
+            yield
+
+    def _SettleTurn(self):
+        #Waits until the robot has stopped turning, for at most half a second
+        loop = self.controlLoop
+        stillRate = 5 * ONE if self.fixedPoint else 5
+        stillPasses = 0
+        for n in range(int(0.5 * loop.rateHz)):
+            yield
+            self._UpdateTurnRate()
+            self.telemetry.Add(loop.ElapsedUs(), self.sensors.right, self._turnYaw, 0, 0)
+            if self.telemetryLog is not None:
+                self._LogSample(self._turnYaw, 0, 0)
+            if abs(self._turnRate) < stillRate:
+                stillPasses += 1
+                if stillPasses >= 3:
+                    return
+            else:
+                stillPasses = 0
+
+    def _LearnTurnCoast(self, stopRate, coast):
+        #Updates the coast time from how far the robot really turned after the \
+        #stop. Slow stops are skipped because whole degree gyro readings are too rough.
+        if stopRate < 60 or coast < 0:
+            return
+        self._turnCoastTime = 0.7 * self._turnCoastTime + 0.3 * coast / stopRate
+
+    def GyroDriveOnHeading(self, distance, heading, events=None):
         """
         Drives the robot very straight on a `Heading` for a \
         `Distance`, using acceleration and the gyro. \
         Accelerates smoothly to prevent wheel slipping. \
         Gyro provides feedback and helps keep the robot pointing \
         on the  heading.
-        Minimum distance that this will work for is about 16cm.
-        If you need to go a very short distance, use move_tank.
+        The speed follows a profile planned from the distance, so short \
+        drives work too. They just never reach full speed.
         Parameters
         ----------
         Heading: On what heading should the robot drive (float)
@@ -99,9 +449,13 @@ class BaseRobot():
         default: no default value
         Distance: How far the robot should go in cm (float)
         type: float
-        values: any value above 16.0. You can enter smaller numbers, but the \
-            robot will still go 16cm
+        values: any value above 0.
         default: no default value
+        events: Things to do along the way without stopping, such as \
+            starting an arm move at a certain distance
+        type: list of ``AtDistance`` and ``AtHeading`` from drive_events.py
+        values: distances are cm from the start of this drive
+        default: None
         See Also
         --------
         Also look at ``AccelGyroDriveFwd()``.
@@ -110,77 +464,139 @@ class BaseRobot():
         >>> import base_robot
         >>> br = base_robot.BaseRobot()
         >>> br.GyroDriveOnHeading(90, 40) #drive on heading 90 for 40 cm
+        >>> from drive_events import AtDistance
+        >>> from scheduler import MotorForDegrees
+        >>> br.GyroDriveOnHeading(60, 0, [AtDistance(30, lambda: MotorForDegrees(br.leftMedMotor, 90, 50))])
+        """
+        self.scheduler.Run(self.GyroDriveOnHeadingTask(distance, heading, events))
+
+    def GyroDriveOnHeadingTask(self, distance, heading, events=None):
+        """
+        ``GyroDriveOnHeading()`` as a task, so other tasks can run during the \
+        drive. See ``RunTogether()``.
         """
         #Sets max speed
-        maxSpeed = 75
-        minSpeed = 10
-        proportionFactor = 1
+        maxSpeed = self.driveMaxSpeed
+        minSpeed = self.driveMinSpeed
+        headingPid = self.headingPid
+        headingPid.Reset()
         #Calculates the amount of rotations in the distance and multiplies it by 360 to make it degrees
         totalDegreesNeeded = distance / self._tireCircum * 360
+        if totalDegreesNeeded <= 0:
+            return
+        #Plans how fast to go at every point along the drive
+        profile = self._PlanSpeeds(totalDegreesNeeded, maxSpeed, minSpeed)
+        if self.fixedPoint:
+            #Whole degrees and whole speeds all the way through the loop
+            heading = int(round(heading))
+            speedAt = FixedProfile(profile, self._fixedProfileTable).SpeedAt
+            gains = self._FixedGains()
+        else:
+            speedAt = profile.SpeedAt
+            gains = self.headingGains
         #Resets gyro angle
-        MotionSensor().reset_yaw_angle()
-        #Sets counted motor port and sets the degrees counted to 0
-        testmotor = Motor(self._rightDriveMotorPort)
-        testmotor.set_degrees_counted(0)
-        print(str(totalDegreesNeeded))
-
-        #Accel to full speed
-        for currentSpeed in range(0, maxSpeed, 5):
-            correction =  heading - self.hub.motion_sensor.get_yaw_angle()
-            self.driveMotors.start(steering = correction * proportionFactor, speed = currentSpeed)
-            wait_for_seconds(0.1)
-        
-        #Cruise at full speed
-        slowDownPoint = totalDegreesNeeded - 360
-        print(str(slowDownPoint))
-        while(testmotor.get_degrees_counted() < slowDownPoint):
-            #Print the degrees counted
-            print(str(testmotor.get_degrees_counted()))
-            correction = heading - self.hub.motion_sensor.get_yaw_angle()
-            self.driveMotors.start(steering = correction * proportionFactor, speed = maxSpeed)
-        
-        #Slow down
-        for currentSpeed in range(maxSpeed, minSpeed, -5):
-            correction = heading - self.hub.motion_sensor.get_yaw_angle()
-            self.driveMotors.start(steering = correction * proportionFactor, speed = currentSpeed)
-            wait_for_seconds(0.1)
+        self.ResetYaw()
+        #Remembers where the right motor started counting. The count is not \
+        #reset so that odometry can keep adding up the distance.
+        sensors = self.sensors
+        logging = self.telemetryLog is not None
+        s = sensors.Read(logging)
+        startDegrees = s.right
+
+        loop = self.controlLoop
+        telemetry = self.telemetry
+        self._StartMove("GyroDriveOnHeading")
+        self._LogTarget("GyroDriveOnHeading", distance, heading, maxSpeed, 0)
+        if events:
+            for event in events:
+                event.Reset()
+        call = self._BeginTiming("GyroDriveOnHeading", None)
+        phase = None
+        tracking = call >= 0 or self.histogramMode
+        loop.Start()
+
+        #Speed up, cruise and slow down, following the profile
+        degreesCounted = 0
+        while(degreesCounted < totalDegreesNeeded):
+            if tracking:
+                phase = self._DrivePhase(call, phase, profile, degreesCounted)
+            yaw = s.yaw
+            self._UpdatePose(s)
+            if events:
+                CheckEvents(events, self.scheduler, degreesCounted * self._tireCircum / 360, yaw)
+            currentSpeed = speedAt(degreesCounted)
+            #Measure the yaw the short way round from the heading
+            if heading - yaw > 180:
+                yaw += 360
+            elif heading - yaw < -180:
+                yaw -= 360
+            gains.Apply(headingPid, currentSpeed)
+            steering = int(round(headingPid.Update(heading, yaw, loop.periodS)))
+            self.driveCommands.Start(steering, int(currentSpeed))
+            telemetry.Add(loop.ElapsedUs(), degreesCounted, yaw, currentSpeed, steering)
+            if logging:
+                self._LogSample(yaw, currentSpeed, steering)
+            yield
+            s = sensors.Read(logging)
+            degreesCounted = s.right - startDegrees
             
+        if logging:
+            #Log the pass that stops the motors too, so a replay sees every reading
+            self._LogSample(s.yaw, 0, 0)
         #Stop
-        self.driveMotors.stop()
+        self.driveCommands.Stop()
+        self._EndTiming(call)
+        if self.debugMode:
+            print("GyroDriveOnHeading " + str(totalDegreesNeeded) + " degrees needed, cruise from " + \
+                str(profile.cruiseStart) + " to " + str(profile.cruiseEnd))
+            print("GyroDriveOnHeading " + loop.Report())
+            if events:
+                for event in events:
+                    if event.fired:
+                        print("GyroDriveOnHeading event fired at " + str(event.firedDistance) + \
+                            " cm, yaw " + str(event.firedYaw))
+                    else:
+                        print("GyroDriveOnHeading event did not fire")
     
-    def AccelGyroDriveForward(self, distance):
+    def AccelGyroDriveForward(self, distance, events=None):
         """
         Drives the robot very straight for `distance`, using \
             acceleration and gyro.
         
         Accelerates to prevent wheel slipping. Gyro keeps the robot \
         pointing on the same heading.
-        Minimum distance that this will work for is about 16cm. \
-        If you need to go a very short distance, use ``move_tank``.
+        Short drives work too. They just never reach full speed.
         Parameters
         ----------
         Distance: How far the robot should go in cm
         type: float
-        values: Any value above 16.0. You can enter smaller numbers, but the \
-            robot will still go 16cm
+        values: Any value above 0.
         default: No default value
+        events: Things to do along the way without stopping, the same as \
+            in ``GyroDriveOnHeading()``
+        type: list of ``AtDistance`` and ``AtHeading`` from drive_events.py
+        default: None
         Example
         -------
         >>> import base_robot
         >>> br = base_robot.BaseRobot()
         >>> br.AccelGyroDriveForward(20)
         """
+        self.scheduler.Run(self.AccelGyroDriveForwardTask(distance, events))
+
+    def AccelGyroDriveForwardTask(self, distance, events=None):
+        """
+        ``AccelGyroDriveForward()`` as a task. See ``RunTogether()``.
+        """
         #Runs GyroDriveOnHeading with the current gyro yaw angle and the desired distance
-        self.GyroDriveOnHeading(distance, self.hub.motion_sensor.get_yaw_angle())
+        yield from self.GyroDriveOnHeadingTask(distance, self.sensors.ReadYaw(), events)
 
     def TurnRightAndDriveOnHeading(self, distance, heading):
         """
         Turns the robot to the right until the `heading` \
         is reached. Then drives on the `heading` until \
         the `distance` has been reached.
-        Minimum distance that this will work for is about 16cm. \
-        If you need to go a very short distance, use ``GyroTurn`` and \
-        move_tank.
+        Short drives work too. They just never reach full speed.
         Parameters
         ----------
         heading: On what heading should the robot drive
@@ -191,21 +607,21 @@ class BaseRobot():
             default value
         distance: How far the robot should go in cm
         type: float
-        values: any value above 16.0. You can enter smaller numbers, but the \
-            robot will still go 16cm
+        values: any value above 0.
         default: no default value
         Example
         -------
         >>> import base_robot
         >>> br = base_robot.BaseRobot()
-        >>> br.TurnRightAndDriveOnHeading(90, 40) #drive heading 90 for 40 cm
+        >>> br.TurnRightAndDriveOnHeading(40, 90) #drive heading 90 for 40 cm
         """
         #Tests for direction and debug mode
-        if heading < self.hub.motion_sensor.get_yaw_angle() and self.debugMode:
+        yaw = self.sensors.ReadYaw()
+        if heading < yaw and self.debugMode:
             sys.exit("TurnRightAndDriveOnHeading Error: Invalid Heading, try using TurnLeftAndDriveOnHeading Method")
         
-        #Turns Right
-        self.GyroTurn(heading - self.hub.motion_sensor.get_yaw_angle())
+        #Turns Right. GyroTurn() takes the heading itself, not how far to turn.
+        self.GyroTurn(heading)
         #Drives on selected Heading
         self.GyroDriveOnHeading(distance, 0)
 
@@ -214,36 +630,632 @@ class BaseRobot():
         Turns the robot to the left until the `heading` \
         is reached. Then drives on the `heading` until \
         the `distance` has been reached.
-        Minimum distance that this will work for is about 16cm. \
-        If you need to go a very short distance, use ``GyroTurn`` and \
-        move_tank.
+        Short drives work too. They just never reach full speed.
         Parameters
         ----------
         heading: On what heading should the robot drive
         type: float
-        values: any. However, it must be a heading larger than the current \
+        values: any. However, it must be a heading smaller than the current \
             heading (that is, to the left). If a heading is entered that is \
-            less than the current heading, the program will exit. default: no \
+            more than the current heading, the program will exit. default: no \
             default value
         distance: How far the robot should go in cm
         type: float
-        values: any value above 16.0. You can enter smaller numbers, but the \
-            robot will still go 16cm
+        values: any value above 0.
         default: no default value
         Example
         -------
         >>> import base_robot
         >>> br = base_robot.BaseRobot()
-        >>> br.TurnLeftAndDriveOnHeading(90, 40) #drive heading 90 for 40 cm
+        >>> br.TurnLeftAndDriveOnHeading(40, -90) #drive heading -90 for 40 cm
         """
         #Tests for direction and debug mode
-        if heading > self.hub.motion_sensor.get_yaw_angle() and self.debugMode:
+        yaw = self.sensors.ReadYaw()
+        if heading > yaw and self.debugMode:
             sys.exit("TurnLeftAndDriveOnHeading Error: Invalid Heading, try using TurnRightAndDriveOnHeading Method")
         
-        #Turns Left
-        self.GyroTurn(self.hub.motion_sensor.get_yaw_angle() - heading)
+        #Turns Left. GyroTurn() takes the heading itself, not how far to turn.
+        self.GyroTurn(heading)
         #Drives on selected Heading
         self.GyroDriveOnHeading(distance, 0)
     
+    def ResetYaw(self):
+        """
+        Resets the gyro yaw angle to 0 without losing track of where the \
+        robot is. Use this instead of ``br.hub.motion_sensor.reset_yaw_angle()``.
+        """
+        self.hub.motion_sensor.reset_yaw_angle()
+        self.odometry.OnYawReset()
+
+    def _UpdatePose(self, s):
+        #Adds the step since the last update from the Sensors snapshot `s`
+        self.odometry.Update(s.left, s.right, s.yaw)
+
+    def GetPose(self):
+        """
+        Where the robot is, as a tuple of (x, y, heading). x and y are in cm, \
+        heading is in degrees. x points the way the robot faced when the pose \
+        was last set, y points to its right, and the heading grows clockwise \
+        like the gyro. The pose starts at (0, 0, 0) where the robot was made.
+        Example
+        -------
+        >>> x, y, heading = br.GetPose()
+        >>> print("I am at " + str(x) + ", " + str(y))
+        """
+        self._UpdatePose(self.sensors.Read())
+        return self.odometry.Pose()
+
+    def SetPose(self, x, y, heading):
+        """
+        Tells the robot where it is, for example after squaring up against a \
+        wall or at the start of a mission. Later poses build on this one.
+        Parameters
+        ----------
+        x, y: Position in cm
+        type: float
+        heading: Which way the robot faces, in degrees
+        type: float
+        Example
+        -------
+        >>> br.driveMotors.move(-1.0, "seconds", 0, 10) #square up on the wall
+        >>> br.SetPose(0, 0, 0)
+        """
+        self.odometry.Reset(x, y, heading)
+        self._UpdatePose(self.sensors.Read())
+
+    def GoToPoint(self, x, y):
+        """
+        Turns towards the point `x`, `y` and drives there, using the pose \
+        from odometry. See ``GetPose()`` for how x and y are measured.
+        Parameters
+        ----------
+        x, y: Where to go, in cm
+        type: float
+        Example
+        -------
+        >>> br.SetPose(0, 0, 0)
+        >>> br.GoToPoint(50, 0)  #50 cm straight ahead
+        >>> br.GoToPoint(50, 30) #then 30 cm to the right of that
+        """
+        self.GetPose()
+        distance, heading = self.odometry.DistanceAndHeadingTo(x, y)
+        if distance < 0.5:
+            return
+        turn = self._HeadingChange(heading)
+        if abs(turn) > self.gyroTurnTolerance:
+            self.ResetYaw()
+            self.GyroTurn(turn)
+        #The turn is never perfect, so aim the drive from where the robot ended up
+        self.GetPose()
+        distance, heading = self.odometry.DistanceAndHeadingTo(x, y)
+        self.GyroDriveOnHeading(distance, self._HeadingChange(heading))
+
+    def FollowPath(self, points, speed=None):
+        """
+        Drives through a list of points without stopping at any of them. \
+        Instead of stopping and turning in place at each point, the robot \
+        steers smoothly around the corners, slowing down for sharp ones. It \
+        stops at the last point. The points use the same x and y as \
+        ``GetPose()``.
+        Parameters
+        ----------
+        points: Where to drive through, in order
+        type: list of (x, y) tuples, in cm
+        values: at least one point
+        default: no default value
+        speed: Top speed in percent
+        type: float
+        values: 1 to 100
+        default: driveMaxSpeed
+        Example
+        -------
+        >>> br.SetPose(0, 0, 0)
+        >>> br.FollowPath([(40, 0), (60, 20), (60, 60)])
+        """
+        self.scheduler.Run(self.FollowPathTask(points, speed))
+
+    def FollowPathTask(self, points, speed=None):
+        """
+        ``FollowPath()`` as a task. See ``RunTogether()``.
+        """
+        maxSpeed = self.driveMaxSpeed if speed is None else speed
+        minSpeed = self.driveMinSpeed
+        x, y, heading = self.GetPose()
+        path = PurePursuit([(x, y)] + list(points), self.pathLookahead, self._trackWidth)
+        if path.length <= 0:
+            return
+        degreesPerCm = 360 / self._tireCircum
+        #cm per second of robot speed for each percent of motor speed
+        cmPerSecond = self._motorFullSpeed / 100 / degreesPerCm
+        profile = self._PlanSpeeds(path.length * degreesPerCm, maxSpeed, minSpeed)
+        loop = self.controlLoop
+        telemetry = self.telemetry
+        self._StartMove("FollowPath")
+        #Give up if the robot takes far longer than planned, for example if it is stuck
+        maxPasses = int((3 * profile.EstimatedSeconds() + 2) * loop.rateHz)
+        call = self._BeginTiming("FollowPath", FOLLOW)
+        loop.Start()
+        sensors = self.sensors
+        logging = self.telemetryLog is not None
+        for n in range(maxPasses):
+            s = sensors.Read(logging)
+            yaw = s.yaw
+            self._UpdatePose(s)
+            x, y, heading = self.odometry.Pose()
+            if path.Finished(x, y, heading):
+                if logging:
+                    #Log the pass that stops the motors too, so a replay sees every reading
+                    self._LogSample(yaw, 0, 0)
+                break
+            targetX, targetY = path.Target(x, y)
+            currentSpeed = profile.SpeedAt(path.progress * degreesPerCm)
+            limit = path.SpeedLimit(minSpeed * cmPerSecond, self.pathLateralAccel, \
+                self.driveDecel * cmPerSecond)
+            if limit is not None and limit / cmPerSecond < currentSpeed:
+                currentSpeed = limit / cmPerSecond
+            steering, speedScale = path.Steering(x, y, heading, targetX, targetY)
+            steering = int(round(steering))
+            self.driveCommands.Start(steering, int(min(maxSpeed, currentSpeed * speedScale)))
+            telemetry.Add(loop.ElapsedUs(), int(path.progress * degreesPerCm), yaw, currentSpeed, steering)
+            if self.telemetryLog is not None:
+                self._LogSample(yaw, currentSpeed, steering)
+            yield
+        self.driveCommands.Stop()
+        self._EndTiming(call)
+        if self.debugMode:
+            print("FollowPath " + str(path.length) + " cm, ended at " + str(self.odometry.Pose()))
+            print("FollowPath " + loop.Report())
+
+    def CalibrateLineSensor(self, sweepAngle=25):
+        """
+        Finds the reflected light readings for the line and for the mat by \
+        turning the color sensor across the line and back, then saves them \
+        in lineBlack and lineWhite. Start with the color sensor right over \
+        the line.
+        Parameters
+        ----------
+        sweepAngle: How far to turn each way, in degrees
+        type: float
+        default: 25
+        Example
+        -------
+        >>> br.CalibrateLineSensor()
+        >>> print(br.lineBlack, br.lineWhite)
+        """
+        self.scheduler.Run(self.CalibrateLineSensorTask(sweepAngle))
+
+    def CalibrateLineSensorTask(self, sweepAngle=25):
+        """
+        ``CalibrateLineSensor()`` as a task.
+        """
+        self.ResetYaw()
+        lowest = 100
+        highest = 0
+        speed = self.gyroTurnMinSpeed
+        #The sweep is logged as a move of its own, so a replay reads the \
+        #same passes as the run did
+        self._StartMove("CalibrateLineSensor")
+        logging = self.telemetryLog is not None
+        #Right, then left across, then back to the middle. The reading that \
+        #ends one sweep starts the next.
+        sensors = self.sensors
+        s = sensors.Read(True)
+        for target in (sweepAngle, -sweepAngle, 0):
+            direction = 1 if target > s.yaw else -1
+            while direction * (target - s.yaw) > 0:
+                lowest = min(lowest, s.light)
+                highest = max(highest, s.light)
+                self.driveCommands.StartTank(speed * direction, -speed * direction)
+                if logging:
+                    self._LogSample(s.yaw, speed, 100 * direction)
+                yield
+                s = sensors.Read(True)
+            self.driveCommands.Stop()
+        if logging:
+            #Log the pass that stops the motors too, so a replay sees every reading
+            self._LogSample(s.yaw, 0, 0)
+        self._UpdatePose(s)
+        if highest - lowest < 10:
+            if self.debugMode:
+                print("CalibrateLineSensor found no line, readings " + str(lowest) + " to " + str(highest))
+            return
+        self.lineBlack = lowest
+        self.lineWhite = highest
+        if self.debugMode:
+            print("CalibrateLineSensor black " + str(lowest) + ", white " + str(highest))
+
+    def FollowLine(self, distance=None, stopColor=None, speed=None, edge="left", events=None, maxDistance=None):
+        """
+        Follows the edge of a line with the color sensor. The robot steers \
+        to keep the reflected light halfway between lineBlack and lineWhite, \
+        so calibrate first with ``CalibrateLineSensor()``. It stops after \
+        `distance`, or when the color sensor sees `stopColor`, whichever \
+        comes first. It gives up once the wheels have rolled `maxDistance`, \
+        in case it lost the line and is spinning, or missed the junction. \
+        With debugMode on it prints how many times per second the loop \
+        really ran.
+        Parameters
+        ----------
+        distance: How far to follow the line in cm
+        type: float
+        values: any value above 0, or None to only stop on `stopColor`
+        default: None
+        stopColor: Stop at a junction of this color
+        type: string
+        values: 'black','violet','blue','cyan','green','yellow','red','white', or None
+        default: None
+        speed: How fast to drive in percent
+        type: float
+        default: lineSpeed
+        edge: Which edge of the line to follow, as the robot sees it
+        type: string
+        values: 'left' or 'right'
+        default: 'left'
+        events: Things to do along the way, the same as in ``GyroDriveOnHeading()``
+        default: None
+        maxDistance: How far the wheels can roll in cm before the robot gives \
+            up. Turning on the spot counts too, so a robot that lost the line \
+            and pivots still stops.
+        type: float
+        values: any value above 0
+        default: None, which is twice `distance`, or 200 with no `distance`
+        Example
+        -------
+        >>> br.FollowLine(50)
+        >>> br.FollowLine(stopColor='red', edge='right')
+        >>> br.FollowLine(stopColor='green', maxDistance=60)
+        """
+        self.scheduler.Run(self.FollowLineTask(distance, stopColor, speed, edge, events, maxDistance))
+
+    def FollowLineTask(self, distance=None, stopColor=None, speed=None, edge="left", events=None, maxDistance=None):
+        """
+        ``FollowLine()`` as a task. See ``RunTogether()``.
+        """
+        if distance is None and stopColor is None:
+            raise ValueError("FollowLine needs a distance, a stopColor or both")
+        if edge != "left" and edge != "right":
+            raise ValueError("FollowLine edge must be 'left' or 'right'")
+        maxSpeed = self.lineSpeed if speed is None else speed
+        minSpeed = min(self.driveMinSpeed, maxSpeed)
+        #On the left edge the line is to the right of the sensor, so too much \
+        #white means steer right
+        side = 1 if edge == "left" else -1
+        span = self.lineWhite - self.lineBlack
+        if span <= 0:
+            raise ValueError("FollowLine lineWhite must be above lineBlack")
+        if distance is not None:
+            totalDegreesNeeded = distance / self._tireCircum * 360
+            if totalDegreesNeeded <= 0:
+                return
+            profile = self._PlanSpeeds(totalDegreesNeeded, maxSpeed, minSpeed)
+        if maxDistance is None:
+            maxDistance = 200 if distance is None else 2 * distance
+        if maxDistance <= 0:
+            raise ValueError("FollowLine maxDistance must be above 0")
+        #Stop somewhere even if the robot loses the line or the stop color \
+        #never shows up. Both wheels count however they turn.
+        maxRolled = 2 * maxDistance / self._tireCircum * 360
+        linePid = self.linePid
+        linePid.Reset()
+        sensors = self.sensors
+        #The color is only needed to spot the stop color
+        readColor = stopColor is not None
+        #The first pass uses this reading, so it is in the telemetry log and \
+        #a replay starts counting from the same encoder readings
+        s = sensors.Read(True, readColor)
+        startLeft = s.left
+        startRight = s.right
+        lastLeft = startLeft
+        lastRight = startRight
+        #Degrees both wheels have rolled, added up
+        rolled = 0
+        loop = self.controlLoop
+        telemetry = self.telemetry
+        self._StartMove("FollowLine")
+        if events:
+            for event in events:
+                event.Reset()
+        call = self._BeginTiming("FollowLine", FOLLOW)
+        loop.Start()
+        degreesCounted = 0
+        while True:
+            light = s.light
+            yaw = s.yaw
+            self._UpdatePose(s)
+            degreesCounted = ((s.left - startLeft) + (s.right - startRight)) / 2
+            rolled += abs(s.left - lastLeft) + abs(s.right - lastRight)
+            lastLeft = s.left
+            lastRight = s.right
+            if (distance is not None and degreesCounted >= totalDegreesNeeded) or rolled >= maxRolled or \
+                    (readColor and s.color == stopColor):
+                if self.telemetryLog is not None:
+                    #Log the pass that stops the motors too, so a replay sees every reading
+                    self._LogSample(yaw, 0, 0)
+                break
+            if distance is not None:
+                currentSpeed = profile.SpeedAt(degreesCounted)
+            else:
+                #Speed up gently, then hold the speed
+                currentSpeed = min(maxSpeed, minSpeed + self.driveAccel * loop.ElapsedSeconds())
+            if events:
+                CheckEvents(events, self.scheduler, degreesCounted * self._tireCircum / 360, yaw)
+            #0 on the line, 100 on the mat, so 50 is right on the edge
+            brightness = (light - self.lineBlack) * 100 / span
+            steering = int(round(-side * linePid.Update(50, brightness, loop.periodS)))
+            self.driveCommands.Start(steering, int(currentSpeed))
+            telemetry.Add(loop.ElapsedUs(), int(degreesCounted), yaw, currentSpeed, steering)
+            if self.telemetryLog is not None:
+                self._LogSample(yaw, currentSpeed, steering)
+            yield
+            s = sensors.Read(True, readColor)
+        self.driveCommands.Stop()
+        self._EndTiming(call)
+        if self.debugMode:
+            print("FollowLine stopped after " + str(degreesCounted * self._tireCircum / 360) + " cm")
+            print("FollowLine " + loop.Report())
+
+    def StartTask(self, task):
+        """
+        Starts a task in the background and returns right away. The task \
+        keeps going while the robot runs its drive and turn methods. Use \
+        ``WaitForTasks()`` to wait until it is done.
+        Background tasks only move on while a BaseRobot drive or turn method, \
+        ``RunTogether()`` or ``WaitForTasks()`` is running. Plain spike \
+        methods such as ``wait_for_seconds()`` or ``move_tank()`` make them wait.
+        Parameters
+        ----------
+        task: What to run
+        type: generator, such as ``br.GyroDriveOnHeadingTask(40, 0)`` or \
+            ``MotorForSeconds(br.leftMedMotor, 2, 100)`` from scheduler.py
+        default: no default value
+        Example
+        -------
+        >>> from scheduler import MotorForSeconds
+        >>> arm = br.StartTask(MotorForSeconds(br.leftMedMotor, 2, 100))
+        >>> br.AccelGyroDriveForward(60) #the arm moves during the drive
+        >>> br.WaitForTasks(arm)
+        """
+        return self.scheduler.Start(task)
+
+    def WaitForTasks(self, *tasks):
+        """
+        Waits until the tasks from ``StartTask()`` are done. With no tasks it \
+        waits for every background task.
+        """
+        self.scheduler.WaitFor(*tasks)
+
+    def RunTogether(self, *tasks):
+        """
+        Runs several tasks at the same time and waits until all of them are \
+        done. Only one task at a time should use the drive motors.
+        Example
+        -------
+        >>> from scheduler import MotorForSeconds, MotorForRotations
+        >>> br.RunTogether(br.AccelGyroDriveForwardTask(60), \
+        >>>     MotorForSeconds(br.leftMedMotor, 2, 100), \
+        >>>     MotorForRotations(br.rightMedMotor, 2.2, 60))
+        """
+        return self.scheduler.RunTogether(*tasks)
+
+    def _HeadingChange(self, heading):
+        #How far to turn from the current pose heading to `heading`, the short way
+        change = heading - self.odometry.heading
+        while change > 180:
+            change -= 360
+        while change <= -180:
+            change += 360
+        return change
+
+    def DumpTelemetry(self, stream=None):
+        """
+        Writes out the samples saved by the last drive or turn method, one \
+        comma separated line per control loop pass. Call this after the move \
+        is finished, never in the middle of one.
+        Parameters
+        ----------
+        stream: Where the lines go
+        type: file opened for writing
+        values: None prints the lines in the console. An open file saves \
+            them on the hub.
+        default: None
+        Example
+        -------
+        >>> import base_robot
+        >>> br = base_robot.BaseRobot()
+        >>> br.AccelGyroDriveForward(40)
+        >>> br.DumpTelemetry()
+        >>> with open("/drive40.csv", "w") as f:
+        >>>     br.DumpTelemetry(f)
+        """
+        self.telemetry.Dump(stream)
+
+    def GetTelemetry(self):
+        """
+        Goes through the samples saved by the last drive or turn method, from \
+        oldest to newest. Each sample is a tuple of (time in microseconds, \
+        degrees counted, yaw, speed, steering).
+        Example
+        -------
+        >>> for sample in br.GetTelemetry():
+        >>>     print(sample[2]) #yaw
+        """
+        return self.telemetry.Samples()
+
+    def StartTelemetryLog(self, path, chunkRecords=64):
+        """
+        Starts saving every control loop pass of the drive and turn methods \
+        to a binary file on the hub, until ``StopTelemetryLog()``. Unlike \
+        the telemetry buffer it keeps every move, not just the last one. See \
+        telemetry_log.py for what is saved, and desktop/telemetry_reader.py \
+        for reading the files on a computer.
+        Parameters
+        ----------
+        path: The file to save to. It is replaced if it is already there.
+        type: string
+        values: Any file name on the hub, for example "/run1.log"
+        default: No default value
+        chunkRecords: How many passes to collect before writing them to the file
+        type: int
+        default: 64
+        Example
+        -------
+        >>> br.StartTelemetryLog("/run1.log")
+        >>> br.AccelGyroDriveForward(40)
+        >>> br.GyroTurn(90)
+        >>> br.StopTelemetryLog()
+        """
+        self.StopTelemetryLog()
+        self.telemetryLog = TelemetryLog(path, chunkRecords)
+
+    def StopTelemetryLog(self):
+        """
+        Saves what is left of the telemetry log and closes the file.
+        """
+        if self.telemetryLog is not None:
+            self.telemetryLog.Close()
+            self.telemetryLog = None
+
+    def _StartMove(self, label):
+        #Clears the telemetry buffer for a new move. The next sample logged \
+        #is marked as the start of the move, even if the move stops on its \
+        #first pass before anything is in the buffer.
+        self.telemetry.Clear()
+        self.telemetry.label = label
+        self._logMoveStart = True
+
+    def _LogSample(self, yaw, speed, steering):
+        #Logs the readings the controller used in this pass, from the Sensors \
+        #snapshot, which has the light in it while logging
+        s = self.sensors
+        first = self._logMoveStart
+        self._logMoveStart = False
+        self.telemetryLog.Add(self.telemetry.label, s.left, s.right, yaw, speed, steering, s.light, first)
+
+    def _LogTarget(self, label, target, heading, speed, variant):
+        #Tells the telemetry log what the next move is asked to do, so runs \
+        #can be compared afterwards
+        if self.telemetryLog is not None:
+            self.telemetryLog.AddTarget(label, target, heading, speed, variant, self._tireCircum)
+
+    def DumpTimings(self, stream=None):
+        """
+        Writes a table of how long the drive and turn methods took since the \
+        robot was made, with each drive split into speeding up, cruising and \
+        slowing down, and each turn into turning, settling and creeping. \
+        Everything else is the time spent outside of them, such as waits and \
+        attachment moves. Only moves made with profilingMode on are counted.
+        Parameters
+        ----------
+        stream: Where the table goes
+        type: file opened for writing
+        values: None prints it in the console. An open file saves it on the hub.
+        default: None
+        Example
+        -------
+        >>> br = base_robot.BaseRobot()
+        >>> br.profilingMode = True
+        >>> br.AccelGyroDriveForward(40)
+        >>> br.GyroTurn(90)
+        >>> br.DumpTimings()
+        """
+        self.profiler.Dump(stream)
+
+    def DumpLoopHistogram(self, stream=None):
+        """
+        Writes a histogram of how long each control loop pass took since \
+        the robot was made, and the longest passes with what the robot was \
+        doing: speeding up, cruising or slowing down in a drive, turning, \
+        settling or creeping in a turn, or following a line or path. Only \
+        moves made with histogramMode on are counted.
+        Parameters
+        ----------
+        stream: Where the table goes
+        type: file opened for writing
+        values: None prints it in the console. An open file saves it on the hub.
+        default: None
+        Example
+        -------
+        >>> br = base_robot.BaseRobot()
+        >>> br.histogramMode = True
+        >>> br.AccelGyroDriveForward(40)
+        >>> br.GyroTurn(90)
+        >>> br.DumpLoopHistogram()
+        """
+        self.loopHistogram.Dump(stream, self.controlLoop.periodUs)
+
+    def _BeginTiming(self, name, phase):
+        #Starts counting loop passes in `phase` when histogramMode is on. \
+        #Returns -1 without writing anything down when profilingMode is off.
+        self.controlLoop.histogram = self.loopHistogram if self.histogramMode else None
+        if phase is not None:
+            self.loopHistogram.phase = phase
+        if not self.profilingMode:
+            return -1
+        return self.profiler.Begin(name, self.controlLoop.totalIterations)
+
+    def _EndTiming(self, call):
+        self.loopHistogram.phase = IDLE
+        if call >= 0:
+            self.profiler.End(call, self.controlLoop.totalIterations)
+
+    def _Phase(self, call, phase):
+        #Writes down that a drive or turn moved on to `phase`, for the profiler \
+        #and the loop histogram
+        self.loopHistogram.phase = phase
+        self.profiler.Phase(call, PHASES[phase])
+
+    def _FixedGains(self):
+        #headingGains for every whole speed, made again if headingGains was replaced
+        if self._fixedGains is None or self._fixedGains.schedule is not self.headingGains:
+            self._fixedGains = FixedGainSchedule(self.headingGains)
+        return self._fixedGains
+
+    def _PlanSpeeds(self, degrees, maxSpeed, minSpeed):
+        #The drive settings' MotionProfile for `degrees`, in the robot's own \
+        #table. Only one drive runs at a time, so they can all share it.
+        return MotionProfile(degrees, maxSpeed, minSpeed, self.driveAccel, self.driveDecel, \
+            self.driveJerk, self._motorFullSpeed, table=self._profileTable)
+
+    def _DrivePhase(self, call, phase, profile, degreesCounted):
+        #Writes down when a drive moves on to the next part of its speed profile
+        newPhase = profile.PhaseAt(degreesCounted)
+        if newPhase != phase:
+            self._Phase(call, newPhase)
+        return newPhase
+
+    def LoadProfile(self, path="/profile.json"):
+        """
+        Loads speed and gain settings from a file made by desktop/tuner.py. \
+        Upload the file to the hub the same way as base_robot.py.
+        Parameters
+        ----------
+        path: Where the file is on the hub
+        type: string
+        default: "/profile.json"
+        Example
+        -------
+        >>> br = base_robot.BaseRobot()
+        >>> br.LoadProfile()
+        """
+        with open(path) as stream:
+            self.ApplyProfile(json.load(stream))
+
+    def ApplyProfile(self, profile):
+        """
+        Changes settings from a dictionary of setting names and values, such \
+        as {"driveMaxSpeed": 80}. "headingGains" is a list of (speed, kp, ki, \
+        kd) rows, and "turnCoastTime" is the starting GyroTurn coast time.
+        """
+        for name in profile:
+            value = profile[name]
+            if name == "headingGains":
+                self.headingGains = GainSchedule([tuple(row) for row in value])
+            elif name == "turnCoastTime":
+                self._turnCoastTime = value
+            elif name in self.profileSettings:
+                setattr(self, name, value)
+            else:
+                raise ValueError("ApplyProfile() Error: unknown setting " + str(name))
+
     def GetVersion(self, number):
         return self._version
\ No newline at end of file
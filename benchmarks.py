@@ -0,0 +1,214 @@
+"""
+Benchmarks for FLL Team 24277's Base Robot.
+
+Runs each drive and turn method a few ways and measures how long it took, how
+many control loop passes per second it managed, and how close it ended up.
+Run it before and after changing base_robot.py to see whether the change made
+the robot faster or more accurate.
+
+On the hub:
+
+>>> import base_robot
+>>> import benchmarks
+>>> br = base_robot.BaseRobot()
+>>> results = benchmarks.RunAll(br)
+>>> benchmarks.SaveResults(results, "/benchmarks.json")
+
+The robot needs about 1.5 m of clear space in front of it. After every drive
+it turns around and drives back, so it ends up about where it started.
+
+On a computer the same benchmarks run on the simulated robot, see
+desktop/run_benchmarks.py.
+
+This file must be uploaded to the hub next to base_robot.py.
+"""
+from spike.control import wait_for_seconds
+from control_loop import ticks_us, ticks_diff
+try:
+    #MicroPython on the hub
+    import ujson as json
+except ImportError:
+    import json
+
+#(name, method, angle, distance). Turns use the angle, drives the distance, \
+#and the turn-and-drive methods both.
+BENCHMARKS = (
+    ("GyroTurn 45", "GyroTurn", 45, 0),
+    ("GyroTurn -45", "GyroTurn", -45, 0),
+    ("GyroTurn 90", "GyroTurn", 90, 0),
+    ("GyroTurn -90", "GyroTurn", -90, 0),
+    ("GyroTurn 180", "GyroTurn", 180, 0),
+    ("GyroTurn -180", "GyroTurn", -180, 0),
+    ("GyroDriveOnHeading 10", "GyroDriveOnHeading", 0, 10),
+    ("GyroDriveOnHeading 20", "GyroDriveOnHeading", 0, 20),
+    ("GyroDriveOnHeading 60", "GyroDriveOnHeading", 0, 60),
+    ("GyroDriveOnHeading 120", "GyroDriveOnHeading", 0, 120),
+    ("TurnRightAndDriveOnHeading 90 40", "TurnRightAndDriveOnHeading", 90, 40),
+    ("TurnLeftAndDriveOnHeading -90 40", "TurnLeftAndDriveOnHeading", -90, 40),
+)
+
+#Seconds to let the robot come to a stop before measuring where it ended up
+SETTLE_SECONDS = 0.3
+
+
+def RunAll(br, names=None, returnToStart=True, wallClock=None, report=True):
+    """
+    Runs the benchmarks one after another.
+
+    Parameters
+    ----------
+    br: The robot to run them on
+    type: BaseRobot
+    names: Which benchmarks to run
+    type: list of names from BENCHMARKS
+    values: None runs all of them
+    default: None
+    returnToStart: Drive back to the start after every drive, so the robot \
+        does not run off the table. The way back is not measured.
+    type: boolean
+    default: True
+    wallClock: A function that returns the real time in seconds. On a \
+        computer the robot's clock is simulated, so this is how the real time \
+        is measured. On the hub the robot's clock is the real time.
+    type: function
+    default: None
+    report: Print a line for each benchmark as it finishes
+    type: boolean
+    default: True
+
+    Returns
+    -------
+    A list with a dictionary of results for each benchmark. See ``RunOne()``.
+    """
+    results = []
+    if report:
+        print(Header())
+    for benchmark in BENCHMARKS:
+        if names is not None and benchmark[0] not in names:
+            continue
+        result = RunOne(br, benchmark, wallClock)
+        results.append(result)
+        if report:
+            print(Line(result))
+        if returnToStart and benchmark[3] > 0:
+            br.GyroTurn(180)
+            br.GyroDriveOnHeading(benchmark[3], 0)
+            br.GyroTurn(180)
+    return results
+
+
+def RunOne(br, benchmark, wallClock=None):
+    """
+    Runs one benchmark, a tuple from BENCHMARKS.
+
+    Returns
+    -------
+    A dictionary with
+    - name: The benchmark's name
+    - seconds: How long the move took on the robot's clock
+    - wallSeconds: How long it took in real time
+    - passes: Control loop passes
+    - loopHz: Control loop passes per second
+    - error: How far from the target it ended up. Degrees for turns, cm for \
+        drives. Positive is too far.
+    - overshoot: The furthest it went past the target
+    - headingError: Degrees off the heading at the end. For drives it is \
+        measured from the pose, since the drive resets the yaw.
+    """
+    name, method, angle, distance = benchmark
+    loop = br.controlLoop
+    br.ResetYaw()
+    startHeading = br.GetPose()[2]
+    startDegrees = _ForwardDegrees(br)
+    startPasses = loop.totalIterations
+    startWall = wallClock() if wallClock else 0
+    startUs = ticks_us()
+    if method == "GyroTurn":
+        br.GyroTurn(angle)
+    elif method == "GyroDriveOnHeading":
+        br.GyroDriveOnHeading(distance, 0)
+    else:
+        getattr(br, method)(distance, angle)
+    seconds = ticks_diff(ticks_us(), startUs) / 1000000
+    wallSeconds = wallClock() - startWall if wallClock else seconds
+    passes = loop.totalIterations - startPasses
+    #The most the turn went past the target, while it was turning
+    overshoot = 0
+    if distance == 0:
+        direction = 1 if angle > 0 else -1
+        for sample in br.telemetry.Samples():
+            overshoot = max(overshoot, direction * (sample[2] - angle))
+
+    wait_for_seconds(SETTLE_SECONDS)
+    yaw = br.hub.motion_sensor.get_yaw_angle()
+    if distance == 0:
+        error = direction * _Wrap(yaw - angle)
+        headingError = _Wrap(yaw - angle)
+    else:
+        travelled = (_ForwardDegrees(br) - startDegrees) * br._tireCircum / 360
+        error = travelled - distance
+        #The drives reset the yaw before they start, so the yaw only tells how \
+        #straight the drive was. The pose keeps counting from the start.
+        headingError = _Wrap(br.GetPose()[2] - startHeading - angle)
+    overshoot = max(overshoot, error)
+    return {"name": name, "seconds": seconds, "wallSeconds": wallSeconds, "passes": passes,
+        "loopHz": passes / seconds if seconds > 0 else 0, "error": error, "overshoot": overshoot,
+        "headingError": headingError}
+
+
+def _ForwardDegrees(br):
+    #How far both wheels have rolled forward on average. Turning on the spot \
+    #moves them the same amount in opposite directions, so it does not count.
+    return (br._rightDriveMotor.get_degrees_counted() - br._leftDriveMotor.get_degrees_counted()) / 2
+
+
+def _Wrap(angle):
+    #The same angle, between -180 and 180
+    while angle > 180:
+        angle -= 360
+    while angle <= -180:
+        angle += 360
+    return angle
+
+
+def Header():
+    """
+    The column names for ``Line()``.
+    """
+    return "benchmark                          seconds  wall s  loop Hz  error  overshoot  heading"
+
+
+def Line(result):
+    """
+    One benchmark's results as a line of a table.
+    """
+    return _Pad(result["name"], 35) + _Pad(_Round(result["seconds"], 3), 9) + \
+        _Pad(_Round(result["wallSeconds"], 3), 8) + _Pad(_Round(result["loopHz"], 1), 9) + \
+        _Pad(_Round(result["error"], 2), 7) + _Pad(_Round(result["overshoot"], 2), 11) + \
+        _Round(result["headingError"], 1)
+
+
+def _Pad(text, width):
+    #MicroPython strings have no ljust()
+    return text + " " * (width - len(text))
+
+
+def _Round(value, digits):
+    return str(round(value, digits))
+
+
+def SaveResults(results, path):
+    """
+    Saves the results from ``RunAll()`` as JSON, so they can be compared \
+    with a later run.
+    """
+    with open(path, "w") as stream:
+        json.dump({"results": results}, stream)
+
+
+def LoadResults(path):
+    """
+    Reads results saved by ``SaveResults()``.
+    """
+    with open(path) as stream:
+        return json.load(stream)["results"]
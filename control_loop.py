@@ -0,0 +1,167 @@
+"""
+Fixed-rate control loop for FLL Team 24277's Base Robot.
+
+The drive and turn methods in base_robot.py run their controllers inside a
+ControlLoop so every pass through the loop takes the same amount of time, no
+matter how quickly the sensors happen to answer. Gains that were tuned at
+100 Hz stay tuned at 100 Hz.
+
+This file must be uploaded to the hub next to base_robot.py.
+"""
+try:
+    #MicroPython on the hub
+    from utime import ticks_us, ticks_diff, ticks_add, sleep_us
+except ImportError:
+    try:
+        from time import ticks_us, ticks_diff, ticks_add, sleep_us
+    except ImportError:
+        #Regular python on a computer
+        from time import perf_counter, sleep
+
+        def ticks_us():
+            return int(perf_counter() * 1000000)
+
+        def ticks_diff(new, old):
+            return new - old
+
+        def ticks_add(ticks, delta):
+            return ticks + delta
+
+        def sleep_us(us):
+            sleep(us / 1000000)
+
+
+class ControlLoop():
+    """
+    Runs a controller at a fixed rate and keeps track of how well the rate \
+    is being held.
+
+    Call ``Start()`` right before the loop begins and ``Wait()`` at the end \
+    of every pass. ``Wait()`` sleeps until the next deadline. If the work in \
+    a pass took longer than one period the pass is counted as an overrun and \
+    the schedule restarts from now, so the loop never tries to "catch up" \
+    with a burst of back-to-back passes.
+
+    Parameters
+    ----------
+    rateHz: How many times per second the loop should run
+    type: int
+    values: 1 to 1000. 100 is a good choice on the hub.
+    default: 100
+
+    Example
+    -------
+    >>> loop = ControlLoop(100)
+    >>> loop.Start()
+    >>> while keepGoing:
+    >>>     ...read sensors, compute, command motors...
+    >>>     loop.Wait()
+    >>> print(loop.Report())
+    """
+    def __init__(self, rateHz=100):
+        self.SetRate(rateHz)
+        #Passes since the loop was made. Unlike iterations, Start() does not clear it.
+        self.totalIterations = 0
+        #Set to a LoopHistogram to count how long every pass takes
+        self.histogram = None
+        self.Reset()
+
+    def SetRate(self, rateHz):
+        """
+        Changes the loop rate. Takes effect on the next ``Start()``.
+        """
+        if rateHz <= 0:
+            raise ValueError("ControlLoop rate must be above 0 Hz")
+        self.rateHz = rateHz
+        self.periodUs = int(1000000 / rateHz)
+        self.periodS = self.periodUs / 1000000
+
+    def Reset(self):
+        """
+        Clears the jitter and overrun statistics.
+        """
+        self.iterations = 0
+        self.overruns = 0
+        self.maxJitterUs = 0
+        self._totalJitterUs = 0
+        self._startUs = ticks_us()
+        self._deadlineUs = self._startUs
+        self._wokeUs = self._startUs
+
+    def Start(self):
+        """
+        Clears the statistics and sets the first deadline one period from now.
+        """
+        self.Reset()
+        self._deadlineUs = ticks_add(self._startUs, self.periodUs)
+
+    def Wait(self):
+        """
+        Sleeps until the next deadline and records the jitter of this pass.
+
+        Returns
+        -------
+        How late (in microseconds) the loop woke up compared to the deadline.
+        """
+        self.iterations += 1
+        self.totalIterations += 1
+        remainingUs = ticks_diff(self._deadlineUs, ticks_us())
+        if remainingUs > 0:
+            sleep_us(remainingUs)
+            nowUs = ticks_us()
+            jitterUs = ticks_diff(nowUs, self._deadlineUs)
+            self._deadlineUs = ticks_add(self._deadlineUs, self.periodUs)
+        else:
+            #The work took longer than one period. Start over from now.
+            self.overruns += 1
+            nowUs = ticks_us()
+            jitterUs = -remainingUs
+            self._deadlineUs = ticks_add(nowUs, self.periodUs)
+        if jitterUs < 0:
+            jitterUs = 0
+        if jitterUs > self.maxJitterUs:
+            self.maxJitterUs = jitterUs
+        self._totalJitterUs += jitterUs
+        if self.histogram is not None:
+            #The whole pass, from the last wake up to this one
+            self.histogram.Record(ticks_diff(nowUs, self._wokeUs), self.totalIterations)
+        self._wokeUs = nowUs
+        return jitterUs
+
+    def ElapsedUs(self):
+        """
+        Microseconds since ``Start()`` was called.
+        """
+        return ticks_diff(ticks_us(), self._startUs)
+
+    def ElapsedSeconds(self):
+        """
+        Seconds since ``Start()`` was called.
+        """
+        return ticks_diff(ticks_us(), self._startUs) / 1000000
+
+    def MeanJitterUs(self):
+        """
+        Average lateness of each pass in microseconds.
+        """
+        if self.iterations == 0:
+            return 0
+        return self._totalJitterUs / self.iterations
+
+    def AchievedRateHz(self):
+        """
+        How many passes per second the loop actually ran since ``Start()``.
+        """
+        elapsed = self.ElapsedSeconds()
+        if elapsed <= 0:
+            return 0
+        return self.iterations / elapsed
+
+    def Report(self):
+        """
+        A one line summary of the loop timing, for printing after a move.
+        """
+        return "loop " + str(self.rateHz) + "Hz: " + str(self.iterations) + \
+            " passes, " + str(round(self.AchievedRateHz(), 1)) + "Hz achieved, " + \
+            str(self.overruns) + " overruns, jitter mean " + \
+            str(int(self.MeanJitterUs())) + "us max " + str(self.maxJitterUs) + "us"
@@ -0,0 +1,335 @@
+"""
+Works out how well the drives and turns went in a pile of telemetry logs.
+
+    python desktop/analyze_runs.py logs/*.log
+    python desktop/analyze_runs.py logs/*.log --settle-band 0.5 --csv moves.csv
+
+For every GyroTurn it finds how far the robot went past the target, how far
+from the target it ended, and how long it took to get within --settle-band
+degrees of the target and stay there. For every GyroDriveOnHeading it finds
+the root mean square heading error while cruising and how far the robot
+drove compared with the distance it was asked for. Both get the time spent
+in each phase: speeding up, cruising and slowing down for drives, turning,
+settling and creeping for turns. The moves are then grouped by method and
+what they were asked to do (angle, distance, heading, top speed) and each
+group is summarized with its mean, standard deviation and 95th percentile.
+
+Everything is worked out a whole column at a time with NumPy, so tens of
+thousands of runs take a few seconds, most of it opening the files.
+
+Only moves with a target record in front of them can be analyzed, so the
+logs must come from a base_robot.py that writes them (telemetry log version
+3). The distance is measured at the last pass of the drive, so it leaves out
+the last few mm the robot rolls after the drive ends.
+
+It needs NumPy (pip install numpy). Nothing in here runs on the hub.
+"""
+import argparse
+import sys
+
+import numpy
+
+import telemetry_reader
+import telemetry_log
+
+TURN = telemetry_reader.LabelNumber("GyroTurn")
+DRIVE = telemetry_reader.LabelNumber("GyroDriveOnHeading")
+#Metrics for each kind of move, in the order they are reported
+TURN_METRICS = ("overshoot", "finalError", "settleSeconds", "seconds", "turnSeconds", "settlePhaseSeconds",
+    "creepSeconds")
+DRIVE_METRICS = ("headingRms", "distanceError", "seconds", "accelSeconds", "cruiseSeconds", "decelSeconds")
+METRIC_NAMES = {
+    "overshoot": "overshoot deg",
+    "finalError": "final error deg",
+    "settleSeconds": "settle time s",
+    "seconds": "time s",
+    "turnSeconds": "  turning s",
+    "settlePhaseSeconds": "  settling s",
+    "creepSeconds": "  creeping s",
+    "headingRms": "heading rms deg",
+    "distanceError": "distance error cm",
+    "accelSeconds": "  speeding up s",
+    "cruiseSeconds": "  cruising s",
+    "decelSeconds": "  slowing down s",
+}
+
+
+def LoadLogs(paths):
+    """
+    Reads every log in `paths` and puts them end to end.
+
+    Returns
+    -------
+    A tuple of (samples, targets, targetStarts, logStarts). targetStarts is \
+    the index in samples of the first sample after each target record, and \
+    logStarts the index in samples where each log starts.
+    """
+    samples = []
+    targets = []
+    targetStarts = []
+    logStarts = []
+    count = 0
+    for path in paths:
+        log = telemetry_reader.ReadLog(path)
+        logTargets, starts = telemetry_reader.Targets(log)
+        log = telemetry_reader.Samples(log)
+        samples.append(log)
+        targets.append(logTargets)
+        targetStarts.append(starts + count)
+        logStarts.append(count)
+        count += len(log)
+    if not paths:
+        empty = numpy.zeros(0, dtype=telemetry_reader.RECORD_DTYPE)
+        return empty, empty, numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0, dtype=numpy.int64)
+    return (numpy.concatenate(samples), numpy.concatenate(targets), numpy.concatenate(targetStarts),
+        numpy.array(logStarts, dtype=numpy.int64))
+
+
+def _MoveBoundaries(samples, logStarts):
+    #The index of the first sample of every move, the same way as \
+    #telemetry_reader.MoveRanges() but also at the start of every log, \
+    #followed by the number of samples
+    labels = telemetry_reader.Labels(samples)
+    newMove = numpy.zeros(len(samples) + 1, dtype=bool)
+    newMove[1:-1] = (labels[1:] != labels[:-1]) | ((samples["label"][1:] & telemetry_log.MOVE_START) != 0) | \
+        (numpy.abs(numpy.diff(samples["time"].astype(numpy.int64))) > 100000)
+    newMove[logStarts] = True
+    newMove[-1] = True
+    return numpy.flatnonzero(newMove)
+
+
+def _Wrap(tenths):
+    #An angle in tenths of a degree brought into -1800 to 1799
+    return (tenths + 1800) % 3600 - 1800
+
+
+def Analyze(samples, targets, targetStarts, logStarts=None, settleBand=1.0):
+    """
+    Works out the metrics of every GyroTurn and GyroDriveOnHeading that has \
+    a target record, see ``LoadLogs()``.
+
+    Parameters
+    ----------
+    settleBand: How close to the target a turn has to stay to count as settled
+    type: float
+    values: degrees above 0
+    default: 1.0
+
+    Returns
+    -------
+    A dictionary of NumPy arrays with one entry per move: log, label, \
+    target, heading, speed, variant and every metric in TURN_METRICS and \
+    DRIVE_METRICS. Metrics that do not apply to a move are NaN.
+    """
+    if logStarts is None:
+        logStarts = numpy.zeros(1, dtype=numpy.int64)
+    boundaries = _MoveBoundaries(samples, logStarts)
+    #Only moves that start right after a target record
+    last = len(boundaries) - 1
+    place = numpy.searchsorted(boundaries, targetStarts)
+    found = (place < last) & (boundaries[numpy.minimum(place, last)] == targetStarts)
+    #A move that wrote no samples, such as a turn that was already past its \
+    #angle, leaves its target right in front of the next move's. Only the \
+    #last target before a move is its own, and only if the labels match.
+    found[:-1] &= targetStarts[:-1] != targetStarts[1:]
+    found[found] &= telemetry_reader.Labels(samples[targetStarts[found]]) == telemetry_reader.Labels(targets[found])
+    targets = targets[found]
+    starts = targetStarts[found]
+    ends = boundaries[place[found] + 1]
+    labels = telemetry_reader.Labels(targets)
+    moveCount = len(starts)
+
+    #Copy the samples of those moves next to each other, so every move is \
+    #one slice and reduceat() can add them up
+    lengths = ends - starts
+    moveStarts = numpy.zeros(moveCount, dtype=numpy.int64)
+    numpy.cumsum(lengths[:-1], out=moveStarts[1:])
+    move = numpy.repeat(numpy.arange(moveCount), lengths)
+    index = numpy.arange(lengths.sum()) - moveStarts[move] + starts[move]
+    moveLasts = moveStarts + lengths - 1
+    picked = samples[index]
+    time = picked["time"].astype(numpy.int64)
+    yaw = picked["yaw"].astype(numpy.int64)
+    speed = picked["speed"].astype(numpy.int64)
+    steering = picked["steering"].astype(numpy.int64)
+    position = numpy.arange(len(index))
+
+    #How long each pass lasted, and the whole move
+    passUs = numpy.zeros(len(index), dtype=numpy.int64)
+    passUs[:-1] = numpy.diff(time)
+    passUs[moveLasts] = 0
+    seconds = (time[moveLasts] - time[moveStarts]) / 1000000
+
+    def Total(values):
+        if len(values) == 0:
+            return numpy.zeros(0)
+        return numpy.add.reduceat(values, moveStarts)
+
+    def PhaseSeconds(inPhase):
+        return Total(numpy.where(inPhase, passUs, 0)) / 1000000
+
+    isTurn = labels == TURN
+    isDrive = labels == DRIVE
+    nan = numpy.full(moveCount, numpy.nan)
+    result = {"log": numpy.searchsorted(logStarts, starts, side="right") - 1, "label": labels,
+        "target": targets["left"] / 10, "heading": targets["right"] / 10, "speed": targets["speed"].astype(int),
+        "variant": targets["steering"].astype(int), "seconds": seconds}
+    for name in TURN_METRICS + DRIVE_METRICS:
+        result.setdefault(name, nan.copy())
+    if moveCount == 0:
+        return result
+
+    #Turns: the yaw that keeps counting past +-180, like the turn itself uses
+    change = numpy.zeros(len(index), dtype=numpy.int64)
+    change[1:] = _Wrap(numpy.diff(yaw))
+    change[moveStarts] = 0
+    turned = numpy.cumsum(change)
+    turned -= turned[moveStarts][move]
+    unwrapped = yaw[moveStarts][move] + turned
+    targetTenths = targets["left"].astype(numpy.int64)
+    direction = numpy.where(targetTenths >= yaw[moveStarts], 1, -1)
+    error = unwrapped - targetTenths[move]
+    past = numpy.maximum.reduceat(direction[move] * error, moveStarts)
+    result["overshoot"] = numpy.where(isTurn, numpy.maximum(past, 0) / 10, numpy.nan)
+    result["finalError"] = numpy.where(isTurn, error[moveLasts] / 10, numpy.nan)
+    outside = numpy.where(numpy.abs(error) > settleBand * 10, position, -1)
+    lastOutside = numpy.maximum.reduceat(outside, moveStarts)
+    settled = numpy.where(lastOutside < 0, moveStarts, numpy.minimum(lastOutside + 1, moveLasts))
+    settleSeconds = (time[settled] - time[moveStarts]) / 1000000
+    result["settleSeconds"] = numpy.where(isTurn & (lastOutside < moveLasts), settleSeconds, numpy.nan)
+    #Turning until the first pass with the motors stopped, then settling \
+    #while stopped and creeping while moving again
+    stopped = (speed == 0) & (steering == 0)
+    firstStop = numpy.minimum.reduceat(numpy.where(stopped, position, len(index)), moveStarts)
+    beforeStop = position < firstStop[move]
+    result["turnSeconds"] = numpy.where(isTurn, PhaseSeconds(beforeStop), numpy.nan)
+    result["settlePhaseSeconds"] = numpy.where(isTurn, PhaseSeconds(stopped), numpy.nan)
+    result["creepSeconds"] = numpy.where(isTurn, PhaseSeconds(~beforeStop & ~stopped), numpy.nan)
+
+    #Drives: cruising from the first pass at top speed to the last one
+    topSpeed = numpy.maximum.reduceat(speed, moveStarts)
+    atTop = numpy.where(speed >= topSpeed[move] - 1, position, -1)
+    lastTop = numpy.maximum.reduceat(atTop, moveStarts)
+    firstTop = numpy.minimum.reduceat(numpy.where(atTop >= 0, atTop, len(index)), moveStarts)
+    accel = position < firstTop[move]
+    decel = position > lastTop[move]
+    cruise = ~accel & ~decel
+    headingError = _Wrap(yaw - targets["right"].astype(numpy.int64)[move]) / 10
+    cruisePasses = Total(cruise.astype(numpy.int64))
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        headingRms = numpy.sqrt(Total(numpy.where(cruise, headingError ** 2, 0)) / cruisePasses)
+    result["headingRms"] = numpy.where(isDrive, headingRms, numpy.nan)
+    encoders = (picked["left"].astype(numpy.int64) + picked["right"].astype(numpy.int64)) / 2
+    cmPerDegree = targets["yaw"] / 100 / 360
+    driven = (encoders[moveLasts] - encoders[moveStarts]) * cmPerDegree
+    result["distanceError"] = numpy.where(isDrive, driven - targets["left"] / 10, numpy.nan)
+    result["accelSeconds"] = numpy.where(isDrive, PhaseSeconds(accel), numpy.nan)
+    result["cruiseSeconds"] = numpy.where(isDrive, PhaseSeconds(cruise), numpy.nan)
+    result["decelSeconds"] = numpy.where(isDrive, PhaseSeconds(decel), numpy.nan)
+    return result
+
+
+def _GroupStatistics(group, groupCount, values):
+    #Mean, standard deviation and 95th percentile of `values` in each group, \
+    #leaving out NaN, without a Python loop over the groups
+    keep = ~numpy.isnan(values)
+    group = group[keep]
+    values = values[keep]
+    counts = numpy.bincount(group, minlength=groupCount)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        mean = numpy.bincount(group, values, groupCount) / counts
+        spread = numpy.sqrt(numpy.bincount(group, (values - mean[group]) ** 2, groupCount) / counts)
+    order = numpy.lexsort((values, group))
+    firsts = numpy.zeros(groupCount, dtype=numpy.int64)
+    numpy.cumsum(counts[:-1], out=firsts[1:])
+    p95 = numpy.full(groupCount, numpy.nan)
+    has = counts > 0
+    p95[has] = values[order][firsts[has] + numpy.ceil(0.95 * counts[has]).astype(numpy.int64) - 1]
+    return mean, spread, p95
+
+
+def Summarize(moves):
+    """
+    Groups the moves from ``Analyze()`` by label, target, heading, speed and \
+    variant.
+
+    Returns
+    -------
+    A list of (key, count, statistics) with one entry per group. key is \
+    (label name, target, heading, speed, variant) and statistics is a \
+    dictionary of metric name to (mean, standard deviation, 95th percentile).
+    """
+    if len(moves["label"]) == 0:
+        return []
+    keys = numpy.rec.fromarrays([moves["label"], moves["target"], moves["heading"], moves["speed"],
+        moves["variant"]], names="label,target,heading,speed,variant")
+    unique, group = numpy.unique(keys, return_inverse=True)
+    group = group.ravel()
+    counts = numpy.bincount(group, minlength=len(unique))
+    statistics = {}
+    for name in METRIC_NAMES:
+        statistics[name] = _GroupStatistics(group, len(unique), moves[name])
+    summary = []
+    for i, key in enumerate(unique):
+        names = TURN_METRICS if key["label"] == TURN else DRIVE_METRICS
+        summary.append(((telemetry_log.LABELS[key["label"]], float(key["target"]), float(key["heading"]),
+            int(key["speed"]), int(key["variant"])), int(counts[i]),
+            dict((name, tuple(float(value[i]) for value in statistics[name])) for name in names)))
+    return summary
+
+
+def Report(summary):
+    """
+    Prints the groups from ``Summarize()``.
+    """
+    for key, count, statistics in summary:
+        label, target, heading, speed, variant = key
+        if label == "GyroTurn":
+            title = "GyroTurn to " + str(target) + ", speed " + str(speed) + \
+                (", predictive" if variant else ", classic")
+        else:
+            title = label + " " + str(target) + " cm on heading " + str(heading) + ", speed " + str(speed)
+        print(title + ": " + str(count) + " moves")
+        print("  " + "".ljust(20) + "mean".rjust(9) + "std".rjust(9) + "p95".rjust(9))
+        for name, values in statistics.items():
+            print("  " + METRIC_NAMES[name].ljust(20) + "".join(_Number(value).rjust(9) for value in values))
+
+
+def _Number(value):
+    if numpy.isnan(value):
+        return "-"
+    return str(round(value, 3))
+
+
+def WriteCsv(moves, path):
+    """
+    Saves one line per move from ``Analyze()`` to a comma separated file.
+    """
+    columns = ["log", "label", "target", "heading", "speed", "variant"] + list(METRIC_NAMES)
+    with open(path, "w") as stream:
+        stream.write(",".join(columns) + "\n")
+        for row in zip(*[moves[name] for name in columns]):
+            values = [str(value) for value in row]
+            values[1] = telemetry_log.LABELS[row[1]]
+            stream.write(",".join("" if value == "nan" else value for value in values) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the drives and turns in telemetry logs.")
+    parser.add_argument("logs", nargs="+", help="telemetry logs from the hub or from replay.py --record")
+    parser.add_argument("--settle-band", type=float, default=1.0,
+        help="degrees from the target a turn has to stay within to count as settled")
+    parser.add_argument("--csv", help="also save the numbers for every move to this comma separated file")
+    args = parser.parse_args()
+    samples, targets, targetStarts, logStarts = LoadLogs(args.logs)
+    moves = Analyze(samples, targets, targetStarts, logStarts, args.settle_band)
+    if len(moves["label"]) == 0:
+        sys.exit("No drives or turns with target records in these logs")
+    print(str(len(args.logs)) + " logs, " + str(len(moves["label"])) + " moves")
+    Report(Summarize(moves))
+    if args.csv:
+        WriteCsv(moves, args.csv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+"""
+Simulates thousands of robots at once with NumPy, for tuning.
+
+Each robot in the batch has its own settings (top speed, PID gains, turn
+speeds and so on) and its own physical differences (wheel slip, gyro drift,
+motor lag). Every control loop pass runs the same control law as
+GyroDriveOnHeading or GyroTurn in base_robot.py, but for the whole batch at
+once, and the physics is the same model as sim_world.py.
+
+    >>> import numpy
+    >>> batch = BatchWorld(10000, seed=1)
+    >>> settings = RobotDefaults()
+    >>> settings["driveMaxSpeed"] = numpy.linspace(40, 100, 10000)
+    >>> results = batch.RunDrive(60, settings)
+    >>> results["seconds"].min(), results["distanceError"].max()
+
+Compared to the one robot simulator this leaves out the time each sensor
+call takes, learning the turn coast time across turns, and S-curve speed
+profiles (driveJerk).
+
+Nothing in here runs on the hub.
+"""
+import os
+import sys
+
+import numpy
+
+_DESKTOP = os.path.dirname(os.path.abspath(__file__))
+_REPO = os.path.dirname(_DESKTOP)
+if _DESKTOP not in sys.path:
+    sys.path.insert(0, _DESKTOP)
+if _REPO not in sys.path:
+    sys.path.insert(1, _REPO)
+
+#Settings a batch can vary, with the BaseRobot attribute they come from
+DRIVE_SETTINGS = ("driveMaxSpeed", "driveMinSpeed", "driveAccel", "driveDecel")
+TURN_SETTINGS = ("gyroTurnMaxSpeed", "gyroTurnMinSpeed", "gyroTurnSlowDownAngle", "gyroTurnTolerance",
+    "turnCoastTime")
+
+
+def RobotDefaults():
+    """
+    The settings of a freshly made BaseRobot, as a dictionary. The heading \
+    PID gain schedule is under "headingGains" as rows of (speed, kp, ki, kd). \
+    Add "headingKpScale", "headingKiScale" and "headingKdScale" to multiply \
+    the schedule's gains, or "headingKp", "headingKi" and "headingKd" to use \
+    fixed gains instead.
+    """
+    import sim_world
+    import base_robot
+    previous = sim_world._world
+    sim_world.SetWorld(sim_world.World(clock=sim_world.VirtualClock()))
+    try:
+        robot = base_robot.BaseRobot()
+    finally:
+        sim_world.SetWorld(previous)
+    settings = {}
+    for name in DRIVE_SETTINGS + TURN_SETTINGS[:-1]:
+        settings[name] = getattr(robot, name)
+    settings["turnCoastTime"] = robot._turnCoastTime
+    settings["headingGains"] = [tuple(row) for row in robot.headingGains.entries]
+    settings["headingOutputLimit"] = robot.headingPid.outputLimit
+    settings["headingIntegralLimit"] = robot.headingPid.integralLimit
+    settings["fullSpeedDps"] = robot._motorFullSpeed
+    settings["tireCircum"] = robot._tireCircum
+    settings["trackWidth"] = robot._trackWidth
+    settings["rateHz"] = robot.controlLoop.rateHz
+    return settings
+
+
+class BatchWorld():
+    """
+    N simulated robots. Every physical parameter can be a single number for \
+    the whole batch, or an array with one value per robot. The names are \
+    the same as for sim_world.World.
+    """
+    def __init__(self, n, trackWidth=11.2, wheelDiameter=5.6, fullSpeedDps=1000,
+            motorTimeConstant=0.05, motorAccelDps2=8000, brakeTimeConstant=0.03,
+            coastTimeConstant=0.12, gyroNoise=0.2, gyroDriftDps=0.0, wheelScaleLeft=1.0,
+            wheelScaleRight=1.0, seed=None, stepSeconds=0.002):
+        self.n = n
+        self.trackWidth = self._Column(trackWidth)
+        self.cmPerDegree = self._Column(wheelDiameter) * numpy.pi / 360
+        self.fullSpeedDps = fullSpeedDps
+        self.motorTimeConstant = self._Column(motorTimeConstant)
+        self.motorAccelDps2 = self._Column(motorAccelDps2)
+        self.brakeTimeConstant = self._Column(brakeTimeConstant)
+        self.coastTimeConstant = self._Column(coastTimeConstant)
+        self.gyroNoise = self._Column(gyroNoise)
+        self.gyroDriftDps = self._Column(gyroDriftDps)
+        self.wheelScaleLeft = self._Column(wheelScaleLeft)
+        self.wheelScaleRight = self._Column(wheelScaleRight)
+        self.stepSeconds = stepSeconds
+        self.random = numpy.random.default_rng(seed)
+        self.Reset()
+
+    def _Column(self, value):
+        return numpy.broadcast_to(numpy.asarray(value, dtype=float), (self.n,)).copy()
+
+    def Reset(self):
+        """
+        Puts every robot back at (0, 0, 0), stopped, with the gyro at 0.
+        """
+        n = self.n
+        self.time = 0.0
+        self.x = numpy.zeros(n)
+        self.y = numpy.zeros(n)
+        self.heading = numpy.zeros(n)
+        self.yawZero = numpy.zeros(n)
+        #Motor speeds and positions in motor degrees. The left motor is \
+        #mirrored, so it turns backwards when the robot goes forward.
+        self.leftDps = numpy.zeros(n)
+        self.rightDps = numpy.zeros(n)
+        self.leftDegrees = numpy.zeros(n)
+        self.rightDegrees = numpy.zeros(n)
+        self.leftTarget = numpy.zeros(n)
+        self.rightTarget = numpy.zeros(n)
+        #0 running, 1 braking, 2 coasting
+        self.mode = numpy.full(n, 2, dtype=numpy.int8)
+
+    #What the control laws use
+
+    def Yaw(self):
+        """
+        Gyro yaw readings, whole degrees from -180 to 179.
+        """
+        yaw = self.heading - self.yawZero + self.gyroDriftDps * self.time
+        yaw = yaw + self.random.standard_normal(self.n) * self.gyroNoise
+        yaw = numpy.round(yaw)
+        return (yaw + 180) % 360 - 180
+
+    def ResetYaw(self):
+        self.yawZero = self.heading + self.gyroDriftDps * self.time
+
+    def RightCounted(self):
+        return numpy.round(self.rightDegrees)
+
+    def LeftCounted(self):
+        return numpy.round(self.leftDegrees)
+
+    def StartSteering(self, steering, speed, active):
+        """
+        MotorPair.start(steering, speed) for the robots in `active`.
+        """
+        steering = numpy.clip(steering, -100, 100)
+        speed = numpy.clip(speed, -100, 100)
+        left = numpy.where(steering >= 0, speed, speed * (50 + steering) / 50)
+        right = numpy.where(steering >= 0, speed * (50 - steering) / 50, speed)
+        self.StartTank(left, right, active)
+
+    def StartTank(self, leftSpeed, rightSpeed, active):
+        """
+        MotorPair.start_tank(left, right) for the robots in `active`.
+        """
+        scale = self.fullSpeedDps / 100
+        self.leftTarget = numpy.where(active, -numpy.clip(leftSpeed, -100, 100) * scale, self.leftTarget)
+        self.rightTarget = numpy.where(active, numpy.clip(rightSpeed, -100, 100) * scale, self.rightTarget)
+        self.mode = numpy.where(active, 0, self.mode)
+
+    def Stop(self, active, brake=True):
+        """
+        MotorPair.stop() for the robots in `active`.
+        """
+        self.leftTarget = numpy.where(active, 0.0, self.leftTarget)
+        self.rightTarget = numpy.where(active, 0.0, self.rightTarget)
+        self.mode = numpy.where(active, 1 if brake else 2, self.mode).astype(numpy.int8)
+
+    def Advance(self, seconds):
+        """
+        Moves every robot forward in time.
+        """
+        steps = max(1, int(round(seconds / self.stepSeconds)))
+        dt = seconds / steps
+        #The lag of each motor depends on whether it is running, braking or coasting
+        timeConstant = numpy.where(self.mode == 0, self.motorTimeConstant,
+            numpy.where(self.mode == 1, self.brakeTimeConstant, self.coastTimeConstant))
+        blend = 1 - numpy.exp(-dt / timeConstant)
+        running = self.mode == 0
+        limit = numpy.where(running, self.motorAccelDps2 * dt, numpy.inf)
+        lowest = -limit
+        #cm the robot moves per motor degree per second, over one step
+        leftScale = -self.cmPerDegree * self.wheelScaleLeft * dt
+        rightScale = self.cmPerDegree * self.wheelScaleRight * dt
+        #Turning is done by rotating the heading's cos and sin a tiny bit each \
+        #step, which is much quicker than working out cos and sin every step
+        cosine = numpy.cos(numpy.radians(self.heading))
+        sine = numpy.sin(numpy.radians(self.heading))
+        turned = numpy.zeros(self.n)
+        for step in range(steps):
+            self.leftDps += numpy.minimum(numpy.maximum((self.leftTarget - self.leftDps) * blend, lowest), limit)
+            self.rightDps += numpy.minimum(numpy.maximum((self.rightTarget - self.rightDps) * blend, lowest), limit)
+            self.leftDegrees += self.leftDps * dt
+            self.rightDegrees += self.rightDps * dt
+            left = self.leftDps * leftScale
+            right = self.rightDps * rightScale
+            #Radians turned and cm moved in this step
+            turn = (left - right) / self.trackWidth
+            moved = (left + right) * 0.5
+            half = turn * 0.5
+            self.x += moved * (cosine - sine * half)
+            self.y += moved * (sine + cosine * half)
+            shrink = 1 - turn * turn * 0.5
+            cosine, sine = cosine * shrink - sine * turn, sine * shrink + cosine * turn
+            turned += turn
+        self.heading += numpy.degrees(turned)
+        self.time += seconds
+
+    #Whole moves
+
+    def RunDrive(self, distance, settings, heading=0, timeLimit=10.0, settleSeconds=0.5, brake=False):
+        """
+        Runs GyroDriveOnHeading(distance, heading) on every robot, starting \
+        from where they are now. The motors coast at the end, the SPIKE \
+        default. With `brake` True they brake, like a robot whose drive \
+        motors were set to "brake".
+
+        Returns
+        -------
+        A dictionary of arrays, one value per robot:
+        - seconds: how long the drive took, until the motors were stopped
+        - distance: how far the robot went along its start heading, cm
+        - distanceError: distance minus what was asked for
+        - lateral: how far it ended up to the side of the line, cm
+        - headingError: final heading minus the target, degrees
+        - headingRms: root mean square of the gyro heading error while driving
+        - passes: control loop passes
+        - finished: False if the drive ran out of time
+        """
+        n = self.n
+        rateHz = settings.get("rateHz", 100)
+        dt = 1 / rateHz
+        tireCircum = settings.get("tireCircum", self.cmPerDegree[0] * 360)
+        maxSpeed = self._Setting(settings, "driveMaxSpeed")
+        minSpeed = numpy.minimum(self._Setting(settings, "driveMinSpeed"), maxSpeed)
+        toDps = settings.get("fullSpeedDps", self.fullSpeedDps) / 100
+        accel = self._Setting(settings, "driveAccel") * toDps
+        decel = self._Setting(settings, "driveDecel") * toDps
+        vMin = minSpeed * toDps
+        vMax = maxSpeed * toDps
+        total = numpy.full(n, distance / tireCircum * 360)
+        outputLimit = settings.get("headingOutputLimit", 100)
+        integralLimit = settings.get("headingIntegralLimit", outputLimit)
+
+        startX = self.x.copy()
+        startY = self.y.copy()
+        startHeading = self.heading.copy()
+        self.ResetYaw()
+        startDegrees = self.RightCounted()
+        integral = numpy.zeros(n)
+        lastYaw = numpy.zeros(n)
+        saturated = numpy.zeros(n)
+        first = True
+        active = total > 0
+        seconds = numpy.zeros(n)
+        passes = numpy.zeros(n)
+        squaredError = numpy.zeros(n)
+        targetHeading = numpy.full(n, float(heading))
+        for tick in range(int(timeLimit * rateHz)):
+            counted = self.RightCounted() - startDegrees
+            finishing = active & (counted >= total)
+            if finishing.any():
+                self.Stop(finishing, brake)
+                seconds = numpy.where(finishing, self.time, seconds)
+                active = active & ~finishing
+            if not active.any():
+                break
+            yaw = self.Yaw()
+            speed = numpy.minimum(vMax, numpy.minimum(
+                numpy.sqrt(vMin * vMin + 2 * accel * numpy.maximum(counted, 0)),
+                numpy.sqrt(vMin * vMin + 2 * decel * numpy.maximum(total - counted, 0)))) / toDps
+            yaw = numpy.where(targetHeading - yaw > 180, yaw + 360,
+                numpy.where(targetHeading - yaw < -180, yaw - 360, yaw))
+            kp, ki, kd = self._HeadingGains(settings, speed)
+            error = targetHeading - yaw
+            #The same protections as pid.PID
+            allowed = (saturated == 0) | ((saturated > 0) != (error > 0))
+            integral = numpy.where(allowed & active,
+                numpy.clip(integral + ki * error * dt, -integralLimit, integralLimit), integral)
+            derivative = numpy.zeros(n) if first else -(yaw - lastYaw) / dt
+            first = False
+            lastYaw = yaw
+            output = kp * error + integral + kd * derivative
+            saturated = numpy.where(output > outputLimit, 1, numpy.where(output < -outputLimit, -1, 0))
+            steering = numpy.round(numpy.clip(output, -outputLimit, outputLimit))
+            self.StartSteering(steering, numpy.trunc(speed), active)
+            squaredError += numpy.where(active, error * error, 0)
+            passes += active
+            self.Advance(dt)
+        finished = ~active
+        seconds = numpy.where(active, self.time, seconds)
+        self.Stop(active, brake)
+        self.Advance(settleSeconds)
+
+        cosine = numpy.cos(numpy.radians(startHeading))
+        sine = numpy.sin(numpy.radians(startHeading))
+        dx = self.x - startX
+        dy = self.y - startY
+        along = dx * cosine + dy * sine
+        return {
+            "seconds": seconds,
+            "distance": along,
+            "distanceError": along - distance,
+            "lateral": -dx * sine + dy * cosine,
+            "headingError": _Wrap(self.heading - startHeading - heading),
+            "headingRms": numpy.sqrt(squaredError / numpy.maximum(passes, 1)),
+            "passes": passes,
+            "finished": finished,
+        }
+
+    def RunTurn(self, angle, settings, timeLimit=5.0):
+        """
+        Runs the predictive GyroTurn(angle) on every robot, right after a \
+        gyro reset.
+
+        Returns
+        -------
+        A dictionary of arrays, one value per robot:
+        - seconds: how long the turn took, including settling and creeping
+        - headingError: how far the robot really ended up from `angle`
+        - overshoot: the furthest the robot went past `angle`, degrees
+        - creeps: how many creep corrections were needed
+        - finished: False if the turn ran out of time
+        """
+        n = self.n
+        rateHz = settings.get("rateHz", 100)
+        dt = 1 / rateHz
+        maxSpeed = self._Setting(settings, "gyroTurnMaxSpeed")
+        minSpeedSetting = self._Setting(settings, "gyroTurnMinSpeed")
+        slowDownAngle = self._Setting(settings, "gyroTurnSlowDownAngle")
+        tolerance = self._Setting(settings, "gyroTurnTolerance")
+        coastTime = self._Setting(settings, "turnCoastTime")
+        #The robot measures the turn rate with the encoders, using the wheel \
+        #size and track width it was set up with
+        tireCircum = settings.get("tireCircum", self.cmPerDegree[0] * 360)
+        turnPerDegree = numpy.degrees(tireCircum / 360 / settings.get("trackWidth", self.trackWidth))
+
+        self.ResetYaw()
+        startHeading = self.heading.copy()
+        rawYaw = self.Yaw()
+        turnYaw = rawYaw.copy()
+        rate = numpy.zeros(n)
+        wheels = None
+        #False for a creep until the robot is seen turning the right way
+        turning = numpy.ones(n, dtype=bool)
+        direction = numpy.where(angle > 0, 1.0, -1.0) * numpy.ones(n)
+        #0 turning, 1 settling, 2 creeping, 3 done
+        phase = numpy.where(direction * (angle - turnYaw) <= 0, 3, 0)
+        creeps = numpy.zeros(n)
+        settlePasses = numpy.zeros(n)
+        stillPasses = numpy.zeros(n)
+        seconds = numpy.zeros(n)
+        overshoot = numpy.zeros(n)
+        startTime = self.time
+        for tick in range(int(timeLimit * rateHz)):
+            if (phase == 3).all():
+                break
+            yaw = self.Yaw()
+            change = yaw - rawYaw
+            change = numpy.where(change > 180, change - 360, numpy.where(change < -180, change + 360, change))
+            #The left motor is mirrored
+            newWheels = -self.LeftCounted() - self.RightCounted()
+            if wheels is not None:
+                rate = 0.5 * rate + 0.5 * (newWheels - wheels) * turnPerDegree / dt
+            wheels = newWheels
+            turnYaw += change
+            rawYaw = yaw
+            trueTurn = self.heading - startHeading
+            overshoot = numpy.maximum(overshoot, numpy.sign(angle) * (trueTurn - angle))
+
+            #Settling: wait until the robot is still, then creep right away if it missed
+            settling = phase == 1
+            settlePasses += settling
+            still = numpy.abs(rate) < 5
+            stillPasses = numpy.where(settling, numpy.where(still, stillPasses + 1, 0), stillPasses)
+            settled = settling & ((stillPasses >= 3) | (settlePasses >= 0.5 * rateHz))
+            error = angle - turnYaw
+            done = settled & ((numpy.abs(error) <= tolerance) | (creeps >= 2))
+            creep = settled & ~done
+            seconds = numpy.where(done, self.time - startTime, seconds)
+            phase = numpy.where(done, 3, numpy.where(creep, 2, phase))
+            creeps += creep
+            direction = numpy.where(creep, numpy.where(error > 0, 1.0, -1.0), direction)
+            turning = numpy.where(creep, False, turning) | (direction * rate > 0)
+
+            #Turning and creeping: stop when the coast would carry the robot onto \
+            #the angle. A creep only counts on the coast once it is turning.
+            moving = (phase == 0) | (phase == 2)
+            remaining = direction * (angle - turnYaw)
+            coast = numpy.abs(rate) * (coastTime + dt / 2)
+            stopping = moving & ((remaining <= 0) | (turning & (remaining <= coast)))
+            top = numpy.where(phase == 0, maxSpeed, minSpeedSetting)
+            low = numpy.minimum(minSpeedSetting, top)
+            tapered = numpy.sqrt(low * low + (top * top - low * low) *
+                numpy.clip(remaining, 0, None) / slowDownAngle)
+            speed = numpy.trunc(numpy.where(remaining >= slowDownAngle, top, tapered)) * direction
+            self.StartTank(speed, -speed, moving & ~stopping)
+            self.Stop(stopping, brake=True)
+            phase = numpy.where(stopping, 1, phase)
+            settlePasses = numpy.where(stopping, 0, settlePasses)
+            stillPasses = numpy.where(stopping, 0, stillPasses)
+            self.Advance(dt)
+        finished = phase == 3
+        seconds = numpy.where(finished, seconds, self.time - startTime)
+        return {
+            "seconds": seconds,
+            "headingError": _Wrap(self.heading - startHeading - angle),
+            "overshoot": overshoot,
+            "creeps": creeps,
+            "finished": finished,
+        }
+
+    def _Setting(self, settings, name):
+        return numpy.broadcast_to(numpy.asarray(settings[name], dtype=float), (self.n,))
+
+    def _HeadingGains(self, settings, speed):
+        if "headingKp" in settings:
+            return (self._Setting(settings, "headingKp"), self._Setting(settings, "headingKi"),
+                self._Setting(settings, "headingKd"))
+        #Blend between the rows of the schedule, like pid.GainSchedule, then \
+        #scale each robot's gains if the settings ask for it
+        rows = numpy.asarray(sorted(settings["headingGains"]), dtype=float)
+        speed = numpy.abs(speed)
+        gains = []
+        for column, name in ((1, "headingKpScale"), (2, "headingKiScale"), (3, "headingKdScale")):
+            gain = numpy.interp(speed, rows[:, 0], rows[:, column])
+            if name in settings:
+                gain = gain * self._Setting(settings, name)
+            gains.append(gain)
+        return tuple(gains)
+
+
+def _Wrap(angle):
+    return (angle + 180) % 360 - 180
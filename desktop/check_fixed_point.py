@@ -0,0 +1,175 @@
+"""
+Checks that fixed_point.py gives the same answers as the float code it
+stands in for.
+
+    python desktop/check_fixed_point.py
+    python desktop/check_fixed_point.py --trials 1000 --seed 3
+
+The heading PID, the speed profile lookup and odometry are each given the
+same random inputs in their float and fixed point versions. Then the
+benchmarks in benchmarks.py run on the simulated robot with BaseRobot() and
+with BaseRobot(fixedPoint=True). The biggest difference for each check is
+printed next to how big it is allowed to be, and the program exits with an
+error if any check is over. Run it after changing fixed_point.py, pid.py,
+odometry.py or the turn and drive controllers.
+
+It needs NumPy (pip install numpy). Nothing in here runs on the hub.
+"""
+import argparse
+import sys
+
+import numpy as np
+
+import run_mission
+import sim_world
+
+#How far apart the two versions can be. Steering and speeds are whole \
+#percents, poses are cm and degrees.
+ALLOWED = {
+    "PID steering": 1,
+    "profile speed": 1,
+    "odometry position": 0.5,
+    "odometry heading": 0.5,
+    "benchmark error": 0.5,
+    "benchmark heading": 1,
+}
+
+
+def CheckPid(rng, trials, schedule):
+    """
+    The biggest difference in steering between PID and FixedPID, driving \
+    random yaw readings through `schedule` at random speeds.
+    """
+    from pid import PID
+    from fixed_point import FixedPID, FixedGainSchedule
+    fixedGains = FixedGainSchedule(schedule)
+    worst = 0
+    for trial in range(trials):
+        floatPid = PID(1, outputLimit=100)
+        fixedPid = FixedPID(1, outputLimit=100)
+        heading = int(rng.integers(-20, 21))
+        yaws = np.cumsum(rng.integers(-3, 4, 300))
+        speeds = rng.integers(0, 101, 300)
+        for yaw, speed in zip(yaws.tolist(), speeds.tolist()):
+            schedule.Apply(floatPid, speed)
+            fixedGains.Apply(fixedPid, speed)
+            steering = int(round(floatPid.Update(heading, yaw, 0.01)))
+            worst = max(worst, abs(steering - fixedPid.Update(heading, yaw, 0.01)))
+    return worst
+
+
+def CheckProfile(rng, trials):
+    """
+    The biggest difference in whole percent speed between MotionProfile and \
+    FixedProfile, at every motor degree of random profiles.
+    """
+    from motion_profile import MotionProfile
+    from fixed_point import FixedProfile
+    worst = 0
+    for trial in range(trials):
+        distance = float(rng.uniform(20, 3000))
+        maxSpeed = int(rng.integers(20, 101))
+        jerk = None if rng.random() < 0.5 else float(rng.uniform(500, 3000))
+        profile = MotionProfile(distance, maxSpeed, int(rng.integers(5, 20)), float(rng.uniform(100, 400)),
+            float(rng.uniform(100, 400)), jerk)
+        fixed = FixedProfile(profile)
+        for position in range(-5, int(distance) + 10):
+            worst = max(worst, abs(int(profile.SpeedAt(position)) - fixed.SpeedAt(position)))
+    return worst
+
+
+def CheckOdometry(rng, trials, tireCircum, trackWidth):
+    """
+    The biggest differences in position and heading between Odometry and \
+    FixedOdometry, following random wheel moves for 1000 passes each.
+    """
+    from odometry import Odometry
+    from fixed_point import FixedOdometry
+    worstPosition = 0
+    worstHeading = 0
+    for trial in range(trials):
+        gyroWeight = float(rng.choice([0.0, 0.5, 1.0]))
+        floatOdometry = Odometry(tireCircum, trackWidth, gyroWeight)
+        fixedOdometry = FixedOdometry(tireCircum, trackWidth, gyroWeight)
+        forward = rng.integers(-5, 20, 1000)
+        turn = rng.integers(-6, 7, 1000)
+        left = np.cumsum(forward + turn)
+        right = np.cumsum(forward - turn)
+        #The gyro follows the encoders, in whole degrees like the real one
+        heading = np.degrees((left - right) * tireCircum / 360 / trackWidth)
+        yaws = (np.round(heading).astype(int) + 180) % 360 - 180
+        for l, r, yaw in zip(left.tolist(), right.tolist(), yaws.tolist()):
+            floatOdometry.Update(l, r, yaw)
+            fixedOdometry.Update(l, r, yaw)
+        x, y, h = floatOdometry.Pose()
+        fx, fy, fh = fixedOdometry.Pose()
+        worstPosition = max(worstPosition, float(np.hypot(x - fx, y - fy)))
+        worstHeading = max(worstHeading, abs((h - fh + 180) % 360 - 180))
+    return worstPosition, worstHeading
+
+
+def RunBenchmarks(fixedPoint, seed):
+    """
+    Runs benchmarks.py on a new noise free simulated robot. Returns the \
+    results by name.
+    """
+    world = sim_world.World(gyroNoise=0.0, seed=seed, clock=sim_world.VirtualClock())
+    sim_world.SetWorld(world)
+    import base_robot
+    import benchmarks
+    br = base_robot.BaseRobot(fixedPoint=fixedPoint)
+    results = benchmarks.RunAll(br, returnToStart=False, report=False)
+    return dict((result["name"], result) for result in results)
+
+
+def CheckBenchmarks(seed):
+    """
+    The biggest differences in how close the robot ended up, between \
+    BaseRobot() and BaseRobot(fixedPoint=True).
+    """
+    floatResults = RunBenchmarks(False, seed)
+    fixedResults = RunBenchmarks(True, seed)
+    worstError = 0
+    worstHeading = 0
+    for name, result in floatResults.items():
+        fixed = fixedResults[name]
+        worstError = max(worstError, abs(result["error"] - fixed["error"]))
+        worstHeading = max(worstHeading, abs(result["headingError"] - fixed["headingError"]))
+    return worstError, worstHeading, len(floatResults)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the fixed point controllers against the float ones.")
+    parser.add_argument("--trials", type=int, default=200, help="random cases for each check")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    #The robot's own settings, so the checks use the gains and wheels it drives with
+    sim_world.SetWorld(sim_world.World(gyroNoise=0.0, seed=args.seed, clock=sim_world.VirtualClock()))
+    import base_robot
+    br = base_robot.BaseRobot()
+
+    checks = []
+    checks.append(("PID steering", args.trials, CheckPid(rng, args.trials, br.headingGains)))
+    checks.append(("profile speed", args.trials, CheckProfile(rng, args.trials)))
+    position, heading = CheckOdometry(rng, args.trials, br._tireCircum, br._trackWidth)
+    checks.append(("odometry position", args.trials, position))
+    checks.append(("odometry heading", args.trials, heading))
+    error, heading, count = CheckBenchmarks(args.seed)
+    checks.append(("benchmark error", count, error))
+    checks.append(("benchmark heading", count, heading))
+
+    print("check               cases  biggest difference  allowed")
+    allPassed = True
+    for name, cases, worst in checks:
+        passed = worst <= ALLOWED[name]
+        allPassed = allPassed and passed
+        print(name.ljust(20) + str(cases).ljust(7) + str(round(worst, 3)).ljust(20) + str(ALLOWED[name]) + \
+            ("" if passed else "  TOO FAR APART"))
+    if not allPassed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
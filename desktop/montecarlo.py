@@ -0,0 +1,183 @@
+"""
+Runs a mission many times on simulated robots that are each a little bit
+different, to see how often it really works.
+
+    python desktop/montecarlo.py mission1.py --runs 2000
+    python desktop/montecarlo.py mission1.py --runs 5000 --wheel-slip 0.03 --json results.json
+
+Every run gets its own random wheel slip, gyro drift, gyro noise, motor lag
+and start position error. First the mission is run once on a perfect robot,
+and the pose it ends at is the target. Then all of the runs are spread over
+every core of the computer, and the report shows how far from the target the
+runs ended up and how long they took.
+
+Nothing in here runs on the hub.
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import run_mission
+import sim_world
+
+
+def RunTrial(path, settings, timeLimit):
+    """
+    Runs the mission once on a World made from `settings`. Returns a \
+    dictionary with the final pose, the simulated time, and whether the \
+    mission finished.
+    """
+    world = sim_world.World(clock=sim_world.VirtualClock(), timeLimit=timeLimit, **settings)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            finished = run_mission.RunMission(path, world)
+            error = None
+        except Exception as problem:
+            finished = False
+            error = type(problem).__name__ + ": " + str(problem)
+    x, y, heading = world.Pose()
+    return {"finished": finished, "error": error, "x": x, "y": y, "heading": heading,
+        "seconds": world.time}
+
+
+def RandomSettings(rng, args):
+    """
+    One robot's worth of random differences, as World parameters.
+    """
+    return {
+        "wheelScaleLeft": rng.gauss(1.0, args.wheel_slip),
+        "wheelScaleRight": rng.gauss(1.0, args.wheel_slip),
+        "gyroDriftDps": rng.gauss(0.0, args.gyro_drift),
+        "gyroNoise": args.gyro_noise,
+        "motorTimeConstant": 0.05 * rng.uniform(1 - args.motor_spread, 1 + args.motor_spread),
+        "x": rng.gauss(0.0, args.start_error),
+        "y": rng.gauss(0.0, args.start_error),
+        "heading": rng.gauss(0.0, args.start_heading_error),
+        "trackWidth": args.track_width,
+        "seed": rng.randrange(1 << 30),
+    }
+
+
+def _Worker(job):
+    #Runs in a pool process
+    path, settings, timeLimit = job
+    result = RunTrial(path, settings, timeLimit)
+    result["settings"] = settings
+    return result
+
+
+def Percentile(values, fraction):
+    """
+    The value below which `fraction` of `values` fall.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    position = fraction * (len(ordered) - 1)
+    low = int(math.floor(position))
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def Describe(name, values, unit):
+    """
+    A one line summary of a list of numbers.
+    """
+    if not values:
+        return name + ": no runs"
+    mean = sum(values) / len(values)
+    return name + ": mean " + _Round(mean) + unit + ", median " + _Round(Percentile(values, 0.5)) + \
+        unit + ", 95% " + _Round(Percentile(values, 0.95)) + unit + ", worst " + \
+        _Round(max(values)) + unit
+
+
+def _Round(value):
+    return str(round(value, 2))
+
+
+def _HeadingError(heading, target):
+    error = (heading - target) % 360
+    if error > 180:
+        error -= 360
+    return abs(error)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a mission many times with random robot differences.")
+    parser.add_argument("mission", help="the mission program, for example mission1.py")
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="default: every core")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--track-width", type=float, default=11.2, help="cm between the drive wheels")
+    parser.add_argument("--wheel-slip", type=float, default=0.02,
+        help="spread of how far each wheel really rolls, 0.02 is 2 percent")
+    parser.add_argument("--gyro-drift", type=float, default=0.05, help="spread of gyro drift, degrees per second")
+    parser.add_argument("--gyro-noise", type=float, default=0.2, help="gyro noise in degrees")
+    parser.add_argument("--motor-spread", type=float, default=0.2,
+        help="motor lag varies by up to this fraction either way")
+    parser.add_argument("--start-error", type=float, default=0.5, help="spread of the start position, cm")
+    parser.add_argument("--start-heading-error", type=float, default=1.0,
+        help="spread of the start heading, degrees")
+    parser.add_argument("--tolerance", type=float, default=3.0, help="cm from the target that still counts as success")
+    parser.add_argument("--heading-tolerance", type=float, default=5.0,
+        help="degrees from the target heading that still counts as success")
+    parser.add_argument("--time-limit", type=float, default=150.0, help="simulated seconds before a run is stopped")
+    parser.add_argument("--json", help="save every run to this file")
+    args = parser.parse_args()
+    path = os.path.abspath(args.mission)
+
+    #The perfect robot sets the target
+    perfect = {"gyroNoise": 0.0, "trackWidth": args.track_width, "seed": args.seed}
+    target = RunTrial(path, perfect, args.time_limit)
+    if not target["finished"]:
+        sys.exit("The mission did not finish on a perfect robot: " + str(target["error"]))
+    print("Target: x " + _Round(target["x"]) + " cm, y " + _Round(target["y"]) + " cm, heading " + \
+        _Round(target["heading"]) + ", " + _Round(target["seconds"]) + " s")
+
+    rng = random.Random(args.seed)
+    jobs = [(path, RandomSettings(rng, args), args.time_limit) for n in range(args.runs)]
+    startWall = time.perf_counter()
+    with multiprocessing.Pool(args.processes) as pool:
+        results = list(pool.imap_unordered(_Worker, jobs, chunksize=max(1, args.runs // (args.processes * 8))))
+    wallSeconds = time.perf_counter() - startWall
+
+    distances = []
+    headingErrors = []
+    seconds = []
+    successes = 0
+    failures = 0
+    for result in results:
+        if not result["finished"]:
+            failures += 1
+            continue
+        distance = math.hypot(result["x"] - target["x"], result["y"] - target["y"])
+        headingError = _HeadingError(result["heading"], target["heading"])
+        result["distanceError"] = distance
+        result["headingError"] = headingError
+        distances.append(distance)
+        headingErrors.append(headingError)
+        seconds.append(result["seconds"])
+        if distance <= args.tolerance and headingError <= args.heading_tolerance:
+            successes += 1
+
+    print(str(args.runs) + " runs on " + str(args.processes) + " processes in " + _Round(wallSeconds) + " s")
+    print("Success: " + _Round(100 * successes / args.runs) + "% within " + str(args.tolerance) + " cm and " + \
+        str(args.heading_tolerance) + " degrees, " + str(failures) + " runs did not finish")
+    print(Describe("Position error", distances, " cm"))
+    print(Describe("Heading error", headingErrors, " deg"))
+    print(Describe("Run time", seconds, " s"))
+    if args.json:
+        with open(args.json, "w") as stream:
+            json.dump({"target": target, "arguments": vars(args), "runs": results}, stream, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Replays a recorded run through the unchanged mission and robot code.
+
+    python desktop/replay.py mission1.py run1.log
+    python desktop/replay.py mission1.py logs/*.log --tolerance 1
+    python desktop/replay.py mission1.py run1.log --record
+
+A telemetry log saved with br.StartTelemetryLog() holds what the sensors read
+on every control loop pass (gyro yaw, both drive encoders, reflected light)
+and what the robot told the drive motors to do. Replaying runs the mission
+program again, but the gyro, encoders and color sensor give back the
+recorded readings instead of simulated ones. The speed and steering that
+base_robot.py asks for on every pass are compared with the recorded ones,
+so a change to a controller shows up as exactly the passes it changed. With
+no change to base_robot.py a replay should match its log.
+
+Readings taken between moves, for example by SetPose() or GetPose(), are not
+in the log. The replay uses the reading at the start of the next move
+instead, which can be a degree off if the robot was still rolling, so the
+odometry of a replay can drift from the recording by a degree or so. Use
+--tolerance 1 for missions that use it.
+
+The mission has to call br.StartTelemetryLog() at the same point as when the
+log was recorded. The path it gives is ignored: nothing is written on a
+replay unless --save-dir is given. Color names are not in the log, so a
+replay sees the color of the simulated mat.
+
+--record makes the log by running the mission on the simulated robot
+instead of reading it, which is handy for building up a set of runs to check
+against.
+
+It needs NumPy (pip install numpy). Nothing in here runs on the hub.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import run_mission
+import sim_world
+import telemetry_reader
+import telemetry_log
+
+#Degrees the yaw can change between two moves without being reset
+YAW_RESET_JUMP = 5
+
+
+class ReplayMotor(sim_world.SimMotor):
+    """
+    A drive motor whose encoder gives back the recorded counts. It still \
+    moves in the simulation, so blocking motor moves finish as usual.
+    """
+    def __init__(self, world, port, field, sign):
+        sim_world.SimMotor.__init__(self, world, port)
+        self.field = field
+        self.sign = sign
+
+    def Counted(self):
+        return self.sign * self.world.Sample(self.field)
+
+
+class ReplayWorld(sim_world.World):
+    """
+    A World whose gyro, drive encoders and reflected light come from a \
+    telemetry log, and which compares every pass the robot code writes to \
+    its telemetry log with the recorded one.
+
+    While a move is running, the readings in one control loop pass are the \
+    ones recorded for the same pass of the same move. The first reading of \
+    each sensor in the pass just after a move carries on the way it was \
+    going, because that is the reading that ended the move. After that the \
+    readings are the ones at the start of the next move. If the yaw jumps \
+    more than YAW_RESET_JUMP degrees between the two moves it was reset in \
+    between, so the gyro keeps the reading that ended the last move until \
+    the yaw is reset.
+
+    Parameters
+    ----------
+    log: The recorded run, from ``telemetry_reader.ReadLog()``
+    tolerance: How far apart the recorded and replayed speed or steering \
+        can be and still count as the same
+    settings: Other World parameters
+    """
+    def __init__(self, log, tolerance=0, **settings):
+        settings.setdefault("clock", sim_world.VirtualClock())
+        settings.setdefault("gyroNoise", 0.0)
+        #Only the attachment motors are simulated, so rough steps are fine
+        settings.setdefault("stepSeconds", 0.005)
+        #A replay that went a different way may never finish a move
+        if settings.get("timeLimit") is None:
+            settings["timeLimit"] = 2 * (int(log["time"][-1]) if len(log) else 0) / 1000000 + 10
+        sim_world.World.__init__(self, **settings)
+        log = telemetry_reader.Samples(log)
+        self.log = log
+        self.tolerance = tolerance
+        self.ranges = telemetry_reader.MoveRanges(log)
+        self.stopped = (log["speed"] == 0) & (log["steering"] == 0)
+        self.labels = telemetry_reader.Labels(log)
+        self.times = log["time"] / 1000000
+        self.values = {"left": log["left"].astype(float), "right": log["right"].astype(float),
+            "yaw": log["yaw"] / 10, "light": log["light"].astype(float)}
+        #The left motor is mirrored, the log counts it forward
+        self.motors[self.leftPort] = ReplayMotor(self, self.leftPort, "left", -1)
+        self.motors[self.rightPort] = ReplayMotor(self, self.rightPort, "right", 1)
+        self.results = [{"label": telemetry_log.LABELS[self.labels[start]], "recorded": end - start,
+            "replayed": 0, "different": 0, "speed": 0, "steering": 0, "firstDifference": None}
+            for start, end in self.ranges]
+        self.extraPasses = 0
+        self.finished = True
+        self.move = -1
+        self.next = 0
+        self._sampleTime = 0.0
+        self._carriedOn = {}
+        self._yawReset = False
+
+    def Sample(self, field):
+        """
+        The recorded value of `field` for the pass that is running now.
+        """
+        values = self.values[field]
+        if len(values) == 0:
+            return 0
+        if 0 <= self.move < len(self.ranges) and not (field == "yaw" and self._yawReset):
+            start, end = self.ranges[self.move]
+            if self.next < end:
+                return values[self.next]
+            #The first reading just after the end of the move is the one that \
+            #ended it, so the robot keeps going the way it was. A move that \
+            #logged the pass that stopped the motors already has it.
+            if end - start >= 2 and not self.stopped[end - 1] and field not in self._carriedOn:
+                self._carriedOn[field] = values[end - 1]
+                period = self.times[end - 1] - self.times[end - 2]
+                if self.time - self._sampleTime <= 1.5 * period:
+                    self._carriedOn[field] = 2 * values[end - 1] - values[end - 2]
+                    return self._carriedOn[field]
+            #A big jump in yaw means the yaw is reset before the next move, \
+            #so until then it stays where the move left it
+            held = self._carriedOn.get(field, values[end - 1])
+            if field == "yaw" and abs(self._Following(values, held) - held) > YAW_RESET_JUMP:
+                return held
+        return self._Following(values, values[-1])
+
+    def _Following(self, values, otherwise):
+        #The first reading of the next move
+        following = self.move + 1
+        if following < len(self.ranges):
+            return values[self.ranges[following][0]]
+        return otherwise
+
+    def Yaw(self):
+        yaw = int(round(self.Sample("yaw")))
+        return (yaw + 180) % 360 - 180
+
+    def ResetYaw(self):
+        #The recorded yaw was already reset, so only remember that it happened
+        self._yawReset = True
+
+    def Look(self):
+        color, reflection = sim_world.World.Look(self)
+        return (color, self.Sample("light"))
+
+    def OnSample(self, label, speed, steering, first):
+        """
+        Compares one pass of the replay with the recorded pass. Called by \
+        ReplayLog.
+        """
+        if first or self.move < 0:
+            self.move += 1
+            self._yawReset = False
+            self._carriedOn.clear()
+            if self.move < len(self.ranges):
+                self.next = self.ranges[self.move][0]
+        self._sampleTime = self.time
+        if self.move >= len(self.ranges):
+            self.extraPasses += 1
+            return
+        result = self.results[self.move]
+        result["replayed"] += 1
+        start, end = self.ranges[self.move]
+        if self.next >= end:
+            return
+        record = self.log[self.next]
+        #Compare them the way the log stores them
+        speedChange = abs(max(-100, min(100, int(speed))) - int(record["speed"]))
+        steeringChange = abs(max(-100, min(100, int(steering))) - int(record["steering"]))
+        result["speed"] = max(result["speed"], speedChange)
+        result["steering"] = max(result["steering"], steeringChange)
+        if label != result["label"] or speedChange > self.tolerance or steeringChange > self.tolerance:
+            result["different"] += 1
+            if result["firstDifference"] is None:
+                result["firstDifference"] = self.next - start
+        self.next += 1
+
+    def Matches(self):
+        """
+        True if the mission finished and every move had the same number of \
+        passes and the same commands as the recording.
+        """
+        if self.extraPasses or not self.finished:
+            return False
+        for result in self.results:
+            if result["different"] or result["replayed"] != result["recorded"]:
+                return False
+        return True
+
+
+class ReplayLog(telemetry_log.TelemetryLog):
+    """
+    Takes the place of TelemetryLog during a replay. Every pass is handed to \
+    the ReplayWorld to compare, then written to `path` as usual.
+    """
+    def Add(self, label, left, right, yaw, speed, steering, light, first=False):
+        sim_world.CurrentWorld().OnSample(label, speed, steering, first)
+        telemetry_log.TelemetryLog.Add(self, label, left, right, yaw, speed, steering, light, first)
+
+
+@contextlib.contextmanager
+def _LogsGoTo(makeLog):
+    #base_robot makes its TelemetryLog with the name it imported, so that is \
+    #the one to swap out
+    import base_robot
+    original = base_robot.TelemetryLog
+    base_robot.TelemetryLog = makeLog
+    try:
+        yield
+    finally:
+        base_robot.TelemetryLog = original
+
+
+def Record(mission, path, world):
+    """
+    Runs `mission` on `world` with the telemetry log going to `path`. \
+    Returns True if the mission finished.
+    """
+    with _LogsGoTo(lambda ignored, chunkRecords=64: telemetry_log.TelemetryLog(path, chunkRecords)):
+        return run_mission.RunMission(mission, world)
+
+
+def Replay(mission, log, tolerance=0, savePath=None, quiet=True, timeLimit=None):
+    """
+    Replays `log`, a recorded run from ``telemetry_reader.ReadLog()``, \
+    through `mission`. Returns the ReplayWorld, which holds the results. \
+    With no `timeLimit` the replay stops at twice the recorded time plus \
+    10 simulated seconds.
+    """
+    world = ReplayWorld(log, tolerance, timeLimit=timeLimit)
+    savePath = savePath if savePath else os.devnull
+    output = io.StringIO()
+    with _LogsGoTo(lambda ignored, chunkRecords=64: ReplayLog(savePath, chunkRecords)):
+        with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+            world.finished = run_mission.RunMission(mission, world)
+    return world
+
+
+def Report(path, world, seconds):
+    """
+    Prints how each move of a replay compared with the recording.
+    """
+    print(path + ": " + ("same" if world.Matches() else "DIFFERENT") + ", " + str(len(world.results)) + \
+        " moves replayed in " + str(round(seconds * 1000)) + " ms")
+    for result in world.results:
+        line = "  " + result["label"].ljust(20) + str(result["recorded"]).rjust(5) + " passes, replay " + \
+            str(result["replayed"]).rjust(5)
+        if result["different"]:
+            line += ", " + str(result["different"]) + " different from pass " + str(result["firstDifference"]) + \
+                ", speed up to " + str(result["speed"]) + " off, steering up to " + str(result["steering"]) + " off"
+        print(line)
+    if world.extraPasses:
+        print("  " + str(world.extraPasses) + " passes after the end of the recording")
+    if not world.finished:
+        print("  the mission did not finish")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded runs through the mission and robot code.")
+    parser.add_argument("mission", help="the mission program the logs were recorded with")
+    parser.add_argument("logs", nargs="+", help="telemetry logs to replay")
+    parser.add_argument("--tolerance", type=int, default=0,
+        help="how far apart speed or steering can be and still count as the same")
+    parser.add_argument("--save-dir", help="save the replayed telemetry logs in this folder")
+    parser.add_argument("--record", action="store_true",
+        help="make the log by running the mission on the simulated robot, instead of replaying it")
+    parser.add_argument("--verbose", action="store_true", help="show what the mission prints")
+    run_mission.AddWorldArguments(parser)
+    args = parser.parse_args()
+    mission = os.path.abspath(args.mission)
+
+    if args.record:
+        if len(args.logs) != 1:
+            sys.exit("--record makes one log at a time")
+        if not Record(mission, args.logs[0], run_mission.MakeWorld(args)):
+            sys.exit(1)
+        return
+
+    allMatch = True
+    for path in args.logs:
+        savePath = None
+        if args.save_dir:
+            savePath = os.path.join(args.save_dir, os.path.basename(path))
+        startWall = time.perf_counter()
+        world = Replay(mission, telemetry_reader.ReadLog(path), args.tolerance, savePath, not args.verbose,
+            args.time_limit)
+        Report(path, world, time.perf_counter() - startWall)
+        allMatch = allMatch and world.Matches()
+    if not allMatch:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Runs the benchmarks in benchmarks.py on the simulated robot.
+
+    python desktop/run_benchmarks.py --json before.json
+    python desktop/run_benchmarks.py --json after.json --compare before.json
+
+Every benchmark prints how long it took in simulated time and in real time,
+the control loop rate, and how close the robot ended up. --compare shows how
+much each number changed since an earlier run, so a change to base_robot.py
+can be checked for speed and accuracy. The same benchmarks run on the hub
+with the same report, see benchmarks.py.
+
+After them GyroTurn runs a set of turns on robots with a noisy gyro, one for
+each of --noisy-seeds, and is measured against where the simulated robot
+really points rather than against its own gyro. The program exits with an
+error if any of those turns is more than --noisy-limit degrees off.
+
+Nothing in here runs on the hub.
+"""
+import argparse
+import sys
+import time
+
+import run_mission
+import sim_world
+
+
+def Compare(results, previous):
+    """
+    Prints how much each benchmark changed since `previous`.
+    """
+    old = dict((result["name"], result) for result in previous)
+    print("Change since the earlier run:")
+    print("benchmark                          seconds  loop Hz  error  overshoot")
+    for result in results:
+        if result["name"] not in old:
+            continue
+        before = old[result["name"]]
+        print(result["name"].ljust(35) + _Change(result, before, "seconds", 3).ljust(9) + \
+            _Change(result, before, "loopHz", 1).ljust(9) + _Change(result, before, "error", 2, True).ljust(7) + \
+            _Change(result, before, "overshoot", 2))
+
+
+def _Change(result, before, key, digits, size=False):
+    #Errors can be either sign, so compare how big they are
+    now = abs(result[key]) if size else result[key]
+    then = abs(before[key]) if size else before[key]
+    change = round(now - then, digits)
+    return ("+" if change > 0 else "") + str(change)
+
+
+#Turns for the noisy gyro check, both ways round
+NOISY_TURNS = (30, -30, 45, -45, 90, -90, 135, -135, 180, -180)
+
+
+def NoisyTurns(args):
+    """
+    Runs NOISY_TURNS on a robot whose gyro has --noisy-gyro noise, once for \
+    every seed. Returns how many turns there were and the biggest error \
+    from the real heading, in degrees.
+    """
+    import base_robot
+    import benchmarks
+    count = 0
+    worst = 0
+    for seed in range(args.noisy_seeds):
+        world = sim_world.World(trackWidth=args.track_width, wheelDiameter=args.wheel_diameter,
+            motorTimeConstant=args.motor_lag, gyroNoise=args.noisy_gyro, seed=seed,
+            clock=sim_world.VirtualClock())
+        sim_world.SetWorld(world)
+        br = base_robot.BaseRobot()
+        for angle in NOISY_TURNS:
+            #GyroTurn() turns to a yaw, so start every turn from 0
+            br.ResetYaw()
+            world.Sync()
+            start = world.heading
+            br.GyroTurn(angle)
+            world.Sleep(benchmarks.SETTLE_SECONDS)
+            world.Sync()
+            error = (world.heading - start - angle + 180) % 360 - 180
+            worst = max(worst, abs(error))
+            count += 1
+    return count, worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the BaseRobot drive and turn methods on a simulated robot.")
+    parser.add_argument("--only", nargs="+", help="names of the benchmarks to run, for example 'GyroTurn 90'")
+    parser.add_argument("--json", help="save the results to this file")
+    parser.add_argument("--compare", help="results saved by an earlier run")
+    parser.add_argument("--noisy-gyro", type=float, default=0.3,
+        help="gyro noise for the noisy gyro turns, in degrees")
+    parser.add_argument("--noisy-seeds", type=int, default=5, help="robots to try the noisy gyro turns on, 0 skips them")
+    parser.add_argument("--noisy-limit", type=float, default=2.0,
+        help="degrees a noisy gyro turn can end up from the real heading")
+    run_mission.AddWorldArguments(parser)
+    parser.set_defaults(seed=1)
+    args = parser.parse_args()
+
+    world = run_mission.MakeWorld(args)
+    sim_world.SetWorld(world)
+    import base_robot
+    import benchmarks
+    br = base_robot.BaseRobot()
+    #There is no table edge to run off
+    results = benchmarks.RunAll(br, args.only, returnToStart=False, wallClock=time.perf_counter)
+    if args.json:
+        benchmarks.SaveResults(results, args.json)
+    if args.compare:
+        Compare(results, benchmarks.LoadResults(args.compare))
+    if any(result["passes"] == 0 for result in results):
+        sys.exit("A benchmark did not run any control loop passes")
+    if args.noisy_seeds > 0:
+        count, worst = NoisyTurns(args)
+        print("Noisy gyro (" + str(args.noisy_gyro) + " degrees): " + str(count) + " turns, biggest error " + \
+            str(round(worst, 2)) + " degrees, allowed " + str(args.noisy_limit))
+        if worst > args.noisy_limit:
+            sys.exit("A noisy gyro turn ended up too far from the real heading")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Runs a mission program on the computer with a simulated robot.
+
+    python desktop/run_mission.py mission1.py
+    python desktop/run_mission.py master.py --track-width 11.5 --gyro-noise 0.5
+
+The mission runs unchanged: it imports base_robot and the spike module as
+usual, but the spike module is the desktop stand-in, so the motors and
+sensors belong to a simulated robot. When the mission ends the robot's final
+position and the simulated time are printed.
+
+Simulated time only moves forward when the mission waits or talks to the
+robot, so a whole mission takes well under a second. Use --real-time to
+watch it at the speed of a real robot.
+
+Nothing in here runs on the hub.
+"""
+import argparse
+import os
+import runpy
+import sys
+
+_DESKTOP = os.path.dirname(os.path.abspath(__file__))
+_REPO = os.path.dirname(_DESKTOP)
+#The desktop spike package must be found before the spike.py hints file
+if _DESKTOP not in sys.path:
+    sys.path.insert(0, _DESKTOP)
+if _REPO not in sys.path:
+    sys.path.insert(1, _REPO)
+
+import sim_world
+
+
+def AddWorldArguments(parser):
+    """
+    Adds command line options for the robot and the table.
+    """
+    parser.add_argument("--track-width", type=float, default=11.2, help="cm between the drive wheels")
+    parser.add_argument("--wheel-diameter", type=float, default=5.6, help="drive wheel diameter in cm")
+    parser.add_argument("--motor-lag", type=float, default=0.05, help="motor time constant in seconds")
+    parser.add_argument("--gyro-noise", type=float, default=0.2, help="gyro noise in degrees")
+    parser.add_argument("--gyro-drift", type=float, default=0.0, help="gyro drift in degrees per second")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for the noise")
+    parser.add_argument("--time-limit", type=float, default=None, help="stop after this many simulated seconds")
+    parser.add_argument("--real-time", action="store_true",
+        help="run at the speed of a real robot instead of as fast as possible")
+
+
+def MakeWorld(args):
+    """
+    Makes a World from the options added by ``AddWorldArguments()``.
+    """
+    return sim_world.World(trackWidth=args.track_width, wheelDiameter=args.wheel_diameter,
+        motorTimeConstant=args.motor_lag, gyroNoise=args.gyro_noise,
+        gyroDriftDps=args.gyro_drift, seed=args.seed, timeLimit=args.time_limit,
+        clock=sim_world.RealClock() if args.real_time else sim_world.VirtualClock())
+
+
+def RunMission(path, world):
+    """
+    Runs the mission program at `path` against `world`. Returns True if the \
+    mission ran to the end, or called sys.exit() or sys.exit(0). Like \
+    python, a message such as sys.exit("Angle must be between -180 and \
+    180") counts as an error.
+    """
+    sim_world.SetWorld(world)
+    startTime = world.time
+    finished = True
+    try:
+        runpy.run_path(path, run_name="__main__")
+    except SystemExit as stop:
+        finished = stop.code is None or stop.code == 0
+        if isinstance(stop.code, str):
+            print(stop.code)
+    except sim_world.SimulationTimeout as timeout:
+        print("Simulation stopped: " + str(timeout))
+        finished = False
+    if finished:
+        world.Sync()
+    x, y, heading = world.Pose()
+    print("Simulated " + str(round(world.time - startTime, 2)) + " s, robot at x " + \
+        str(round(x, 1)) + " cm, y " + str(round(y, 1)) + " cm, heading " + str(round(heading, 1)))
+    return finished
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a mission program on a simulated robot.")
+    parser.add_argument("mission", help="the mission program, for example mission1.py")
+    AddWorldArguments(parser)
+    args = parser.parse_args()
+    if not RunMission(args.mission, MakeWorld(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
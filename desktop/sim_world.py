@@ -0,0 +1,356 @@
+"""
+Physics model behind the desktop stand-in for the spike module.
+
+The World holds the simulated robot: a differential drive base with two
+drive motors, two attachment motors, a gyro and a color sensor looking at the
+field mat. The classes in desktop/spike read and command the World, and the
+World moves the robot forward in time whenever the program talks to it.
+
+Nothing in here runs on the hub.
+"""
+import math
+import random
+import time
+
+
+class SimulationTimeout(Exception):
+    """
+    Raised when the simulated clock passes the World's time limit, for \
+    example a mission that waits forever for a button.
+    """
+    pass
+
+
+class RealClock():
+    """
+    Simulated time follows the computer's clock, so a 2 second move takes \
+    2 seconds.
+    """
+    def __init__(self):
+        self._start = time.perf_counter()
+
+    def Now(self):
+        return time.perf_counter() - self._start
+
+    def Sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def Charge(self, seconds):
+        #Real calls already take real time
+        pass
+
+
+
+class VirtualClock():
+    """
+    Simulated time that only moves when the program waits or talks to the \
+    robot, so a 2.5 minute mission finishes in a fraction of a second. Each \
+    call to the robot costs ``World.callSeconds``, like it does on the hub.
+    """
+    def __init__(self):
+        self._now = 0.0
+
+    def Now(self):
+        return self._now
+
+    def Sleep(self, seconds):
+        if seconds > 0:
+            self._now += seconds
+
+    def Charge(self, seconds):
+        self._now += seconds
+
+class Field():
+    """
+    The field mat as the color sensor sees it: a plain background with \
+    straight painted lines on it. Coordinates are in cm.
+
+    Example
+    -------
+    >>> field = Field()
+    >>> field.AddLine(0, 10, 100, 10, width=2, color='black', reflection=10)
+    """
+    def __init__(self, color='white', reflection=95):
+        self.color = color
+        self.reflection = reflection
+        self.lines = []
+
+    def AddLine(self, x1, y1, x2, y2, width=2.0, color='black', reflection=10):
+        self.lines.append((x1, y1, x2, y2, width, color, reflection))
+
+    def Look(self, x, y):
+        """
+        Returns (color, reflection) at the point x, y. Where lines cross, the \
+        sensor sees the darkest one, whatever order they were added in. A \
+        point on a line is that line's color, even if it is also on the edge \
+        of another line.
+        """
+        solid = None
+        edge = None
+        for line in self.lines:
+            x1, y1, x2, y2, width, color, reflection = line
+            dx = x2 - x1
+            dy = y2 - y1
+            lengthSquared = dx * dx + dy * dy
+            if lengthSquared == 0:
+                t = 0
+            else:
+                t = ((x - x1) * dx + (y - y1) * dy) / lengthSquared
+                t = max(0.0, min(1.0, t))
+            px = x1 + t * dx - x
+            py = y1 + t * dy - y
+            distance = math.sqrt(px * px + py * py)
+            halfWidth = width / 2
+            if distance <= halfWidth:
+                if solid is None or reflection < solid[1]:
+                    solid = (color, reflection)
+            #The sensor sees a blend of line and mat across a 1 cm wide edge
+            elif solid is None and distance <= halfWidth + 1.0:
+                blend = reflection + (self.reflection - reflection) * (distance - halfWidth)
+                if edge is None or blend < edge[1]:
+                    edge = (self.color, blend)
+        if solid is not None:
+            return solid
+        if edge is not None:
+            return edge
+        return (self.color, self.reflection)
+
+
+class SimMotor():
+    """
+    One motor: speed control with a first order lag and an acceleration \
+    limit, a stop action, and an encoder.
+    """
+    def __init__(self, world, port):
+        self.world = world
+        self.port = port
+        self.targetDps = 0.0
+        self.dps = 0.0
+        self.degrees = 0.0
+        self.countedOffset = 0.0
+        self.stopAction = 'coast'
+        self.stopping = None
+        #A stopped motor that has spun down is skipped by the physics
+        self.resting = True
+        self.holdDegrees = 0.0
+        self.stalled = False
+        self.interrupted = False
+        self.power = None
+
+    def Run(self, speedPercent):
+        self.stopping = None
+        self.resting = False
+        self.power = None
+        self.targetDps = max(-100, min(100, speedPercent)) * self.world.fullSpeedDps / 100
+
+    def RunAtPower(self, powerPercent):
+        self.stopping = None
+        self.resting = False
+        self.power = max(-100, min(100, powerPercent))
+        self.targetDps = self.power * self.world.fullSpeedDps / 100
+
+    def Stop(self, action=None):
+        if action is None:
+            action = self.stopAction
+        self.stopping = action
+        self.power = None
+        self.targetDps = 0.0
+        self.holdDegrees = self.degrees
+
+    def Step(self, dt):
+        if self.resting:
+            return
+        world = self.world
+        if self.stopping == 'coast':
+            timeConstant = world.coastTimeConstant
+        elif self.stopping == 'brake':
+            timeConstant = world.brakeTimeConstant
+        elif self.stopping == 'hold':
+            #Holding pulls back towards where the motor stopped
+            self.targetDps = (self.holdDegrees - self.degrees) * 20
+            timeConstant = world.brakeTimeConstant
+        else:
+            timeConstant = world.motorTimeConstant
+        change = (self.targetDps - self.dps) * (1 - math.exp(-dt / timeConstant))
+        if self.stopping is None:
+            limit = world.motorAccelDps2 * dt
+            change = max(-limit, min(limit, change))
+        self.dps += change
+        self.degrees += self.dps * dt
+        if self.stopping is not None and abs(self.dps) < 0.5 and \
+                (self.stopping != 'hold' or abs(self.holdDegrees - self.degrees) < 0.05):
+            self.dps = 0.0
+            self.resting = True
+
+    def Counted(self):
+        return self.degrees - self.countedOffset
+
+
+class World():
+    """
+    A simulated SPIKE Prime robot on an FLL table.
+
+    Parameters
+    ----------
+    trackWidth: Distance between the two drive wheels in cm (default 11.2)
+    wheelDiameter: Drive wheel diameter in cm (default 5.6)
+    leftPort, rightPort: Drive motor ports (default 'E' and 'A'). The left \
+        motor is mounted mirrored, so its encoder counts down going forward.
+    fullSpeedDps: Motor degrees per second at speed 100 (default 1000)
+    motorTimeConstant: Seconds for a motor to get most of the way to a new \
+        speed (default 0.05)
+    motorAccelDps2: Most a motor can speed up, degrees per second squared
+    brakeTimeConstant, coastTimeConstant: How fast a stopped motor spins down
+    gyroNoise: Standard deviation of the gyro noise in degrees
+    gyroDriftDps: Gyro drift in degrees per second
+    wheelScaleLeft, wheelScaleRight: How far each wheel really rolls compared \
+        to its size, 1.0 is perfect. Use this for wheel slip and worn tires.
+    x, y, heading: Where the robot starts, cm and degrees. x is forward and \
+        y is to the right of a robot facing heading 0, and heading grows \
+        clockwise like the gyro.
+    field: What the color sensor sees (a Field)
+    sensorOffset: How far in front of the wheels the color sensor is, cm
+    timeLimit: Seconds of simulated time before SimulationTimeout is raised
+    seed: Random seed for the noise
+    clock: Where simulated time comes from, a RealClock or a VirtualClock. \
+        None uses a RealClock.
+    callSeconds: How much time each call to a motor or sensor takes
+    stepSeconds: Longest physics step in seconds
+    """
+    def __init__(self, trackWidth=11.2, wheelDiameter=5.6, leftPort='E', rightPort='A',
+            fullSpeedDps=1000, motorTimeConstant=0.05, motorAccelDps2=8000,
+            brakeTimeConstant=0.03, coastTimeConstant=0.12, gyroNoise=0.2,
+            gyroDriftDps=0.0, wheelScaleLeft=1.0, wheelScaleRight=1.0,
+            x=0.0, y=0.0, heading=0.0, field=None, sensorOffset=6.0,
+            timeLimit=None, seed=None, clock=None, callSeconds=0.0003, stepSeconds=0.001):
+        self.trackWidth = trackWidth
+        self.wheelDiameter = wheelDiameter
+        self.leftPort = leftPort
+        self.rightPort = rightPort
+        self.fullSpeedDps = fullSpeedDps
+        self.motorTimeConstant = motorTimeConstant
+        self.motorAccelDps2 = motorAccelDps2
+        self.brakeTimeConstant = brakeTimeConstant
+        self.coastTimeConstant = coastTimeConstant
+        self.gyroNoise = gyroNoise
+        self.gyroDriftDps = gyroDriftDps
+        self.wheelScaleLeft = wheelScaleLeft
+        self.wheelScaleRight = wheelScaleRight
+        self.x = x
+        self.y = y
+        self.heading = heading
+        self.field = field if field is not None else Field()
+        self.sensorOffset = sensorOffset
+        self.timeLimit = timeLimit
+        self.random = random.Random(seed)
+        self.clock = clock if clock is not None else RealClock()
+        self.callSeconds = callSeconds
+        self.stepSeconds = stepSeconds
+        self.motors = {}
+        for port in 'ABCDEF':
+            self.motors[port] = SimMotor(self, port)
+        self.time = self.clock.Now()
+        self._yawZero = heading
+        self.calls = 0
+        self.buttonPressDelay = 0.5
+        self.display = None
+        self.statusLight = None
+
+    #Time
+
+    def Sync(self):
+        """
+        Brings the robot up to the current time. Every call from the spike \
+        classes goes through here.
+        """
+        self.calls += 1
+        self.clock.Charge(self.callSeconds)
+        self._AdvanceTo(self.clock.Now())
+
+    def Sleep(self, seconds):
+        """
+        Lets simulated time pass, for example in wait_for_seconds().
+        """
+        self.clock.Sleep(seconds)
+        self._AdvanceTo(self.clock.Now())
+
+    def _AdvanceTo(self, now):
+        if self.timeLimit is not None and now > self.timeLimit:
+            raise SimulationTimeout("simulated time passed " + str(self.timeLimit) + " s")
+        while self.time < now:
+            if self._Resting():
+                #Nothing is moving, so jump straight to now
+                self.time = now
+                return
+            dt = min(self.stepSeconds, now - self.time)
+            self._Step(dt)
+            self.time += dt
+
+    def _Resting(self):
+        for motor in self.motors.values():
+            if not motor.resting:
+                return False
+        return True
+
+    def _Step(self, dt):
+        for motor in self.motors.values():
+            if not motor.resting:
+                motor.Step(dt)
+        cmPerDegree = self.wheelDiameter * math.pi / 360
+        #The left motor is mirrored, so forward is negative motor degrees
+        left = -self.motors[self.leftPort].dps * cmPerDegree * self.wheelScaleLeft
+        right = self.motors[self.rightPort].dps * cmPerDegree * self.wheelScaleRight
+        speed = (left + right) / 2
+        turnRate = math.degrees((left - right) / self.trackWidth)
+        midHeading = math.radians(self.heading + turnRate * dt / 2)
+        self.x += speed * math.cos(midHeading) * dt
+        self.y += speed * math.sin(midHeading) * dt
+        self.heading += turnRate * dt
+
+    #Sensors
+
+    def Yaw(self):
+        yaw = self.heading - self._yawZero + self.gyroDriftDps * self.time
+        yaw += self.random.gauss(0, self.gyroNoise) if self.gyroNoise > 0 else 0
+        yaw = int(round(yaw))
+        return (yaw + 180) % 360 - 180
+
+    def ResetYaw(self):
+        self._yawZero = self.heading + self.gyroDriftDps * self.time
+
+    def Look(self):
+        h = math.radians(self.heading)
+        sx = self.x + self.sensorOffset * math.cos(h)
+        sy = self.y + self.sensorOffset * math.sin(h)
+        return self.field.Look(sx, sy)
+
+    def Motor(self, port):
+        return self.motors[port]
+
+    def Pose(self):
+        return (self.x, self.y, self.heading)
+
+
+_world = None
+
+
+def CurrentWorld():
+    """
+    The World the spike classes are talking to. One is made with default \
+    settings the first time it is needed.
+    """
+    global _world
+    if _world is None:
+        _world = World()
+    return _world
+
+
+def SetWorld(world):
+    """
+    Makes the spike classes talk to `world` from now on.
+    """
+    global _world
+    _world = world
+    return world
+
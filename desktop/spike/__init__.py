@@ -0,0 +1,517 @@
+"""
+Desktop stand-in for the SPIKE Prime spike module.
+
+These classes have the same names and methods as the ones on the hub, but
+they move a simulated robot (see sim_world.py) instead of real motors. Put
+the desktop folder first on the python path and base_robot.py and the
+mission programs run on a computer without any changes.
+
+Nothing in here runs on the hub.
+"""
+from sim_world import CurrentWorld
+
+_SPEED_LIMIT = 100
+_DISTANCE_UNITS = ('cm', 'in', 'rotations', 'degrees', 'seconds')
+_STOP_ACTIONS = ('coast', 'brake', 'hold')
+#How often blocking moves check whether they are done
+_POLL_SECONDS = 0.005
+
+
+def _CheckInt(name, value):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError(name + " is not an integer")
+
+
+def _CheckNumber(name, value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(name + " is not a number")
+
+
+def _Clamp(value):
+    return max(-_SPEED_LIMIT, min(_SPEED_LIMIT, value))
+
+
+def _WaitUntil(done):
+    world = CurrentWorld()
+    while not done():
+        world.Sleep(_POLL_SECONDS)
+
+
+class App():
+    def __init__(self):
+        pass
+
+    def play_sound(self, name, volume=100):
+        CurrentWorld().Sleep(1.0)
+
+    def start_sound(self, name, volume=100):
+        pass
+
+
+class Buttons():
+    """
+    The hub buttons. Nobody is there to press them, so they press \
+    themselves ``World.buttonPressDelay`` seconds after the program starts \
+    waiting.
+    """
+    def __init__(self, location):
+        self.location = location
+
+    def wait_until_pressed(self):
+        world = CurrentWorld()
+        world.Sleep(world.buttonPressDelay)
+
+    def wait_until_released(self):
+        CurrentWorld().Sync()
+
+    def was_pressed(self):
+        CurrentWorld().Sync()
+        return True
+
+    def is_pressed(self):
+        CurrentWorld().Sync()
+        return True
+
+
+Button = Buttons
+
+
+class LightMatrix():
+    def __init__(self):
+        pass
+
+    def show_image(self, image, brightness=100):
+        CurrentWorld().display = image
+
+    def set_pixel(self, x, y, brightness=100):
+        pass
+
+    def write(self, text):
+        CurrentWorld().display = str(text)
+
+    def off(self):
+        CurrentWorld().display = None
+
+
+class StatusLight():
+    def __init__(self):
+        pass
+
+    def on(self, color='white'):
+        CurrentWorld().statusLight = color
+
+    def off(self):
+        CurrentWorld().statusLight = None
+
+
+class Speaker():
+    def __init__(self):
+        self._volume = 100
+
+    def beep(self, note=60, seconds=0.2):
+        CurrentWorld().Sleep(seconds)
+
+    def start_beep(self, note=60):
+        pass
+
+    def stop(self):
+        pass
+
+    def get_volume(self):
+        return self._volume
+
+    def set_volume(self, volume):
+        self._volume = volume
+
+
+class MotionSensor():
+    def __init__(self):
+        pass
+
+    def reset_yaw_angle(self):
+        world = CurrentWorld()
+        world.Sync()
+        world.ResetYaw()
+
+    def get_yaw_angle(self):
+        world = CurrentWorld()
+        world.Sync()
+        return world.Yaw()
+
+    def get_orientation(self):
+        return 'front'
+
+    def get_gesture(self):
+        return None
+
+    def get_roll_angle(self):
+        return 0
+
+    def get_pitch_angle(self):
+        return 0
+
+    def was_gesture(self, gesture):
+        return False
+
+    def wait_for_new_gesture(self):
+        #Like the buttons, the hub is tapped after a while
+        world = CurrentWorld()
+        world.Sleep(world.buttonPressDelay)
+        return 'tapped'
+
+    def wait_for_new_orientation(self):
+        CurrentWorld().Sync()
+        return self.get_orientation()
+
+
+class ColorSensor():
+    def __init__(self, port):
+        self.port = port
+
+    def _Look(self):
+        world = CurrentWorld()
+        world.Sync()
+        return world.Look()
+
+    def get_color(self):
+        color, reflection = self._Look()
+        return color
+
+    def get_ambient_light(self):
+        return 50
+
+    def get_reflected_light(self):
+        color, reflection = self._Look()
+        return int(round(reflection))
+
+    def get_rgb_intensity(self):
+        reflection = self.get_reflected_light()
+        level = reflection * 1024 // 100
+        return (level, level, level, level)
+
+    def get_red(self):
+        return self.get_rgb_intensity()[0]
+
+    def get_green(self):
+        return self.get_rgb_intensity()[1]
+
+    def get_blue(self):
+        return self.get_rgb_intensity()[2]
+
+    def wait_until_color(self, color):
+        _WaitUntil(lambda: self.get_color() == color)
+
+    def wait_for_new_color(self):
+        first = self.get_color()
+        _WaitUntil(lambda: self.get_color() != first)
+        return self.get_color()
+
+    def light_up_all(self, brightness=100):
+        pass
+
+    def light_up(self, light_1=100, light_2=100, light_3=100):
+        pass
+
+
+class DistanceSensor():
+    def __init__(self, port):
+        self.port = port
+
+    def light_up_all(self, brightness=100):
+        pass
+
+    def light_up(self, right_top=100, left_top=100, right_bottom=100, left_bottom=100):
+        pass
+
+    def get_distance_cm(self, short_range=False):
+        CurrentWorld().Sync()
+        return None
+
+    def get_distance_inches(self, short_range=False):
+        CurrentWorld().Sync()
+        return None
+
+    def get_distance_percentage(self, short_range=False):
+        CurrentWorld().Sync()
+        return None
+
+    def wait_for_distance_farther_than(self, distance, unit='cm', short_range=False):
+        CurrentWorld().Sync()
+
+    def wait_for_distance_closer_than(self, distance, unit='cm', short_range=False):
+        CurrentWorld().Sync()
+
+
+class ForceSensor():
+    def __init__(self, port):
+        self.port = port
+
+    def is_pressed(self):
+        CurrentWorld().Sync()
+        return False
+
+    def get_force_newton(self):
+        CurrentWorld().Sync()
+        return 0
+
+    def get_force_percentage(self):
+        CurrentWorld().Sync()
+        return 0
+
+    def wait_until_pressed(self):
+        CurrentWorld().Sync()
+
+    def wait_until_released(self):
+        CurrentWorld().Sync()
+
+
+class Motor():
+    def __init__(self, port):
+        self.port = port
+        self._defaultSpeed = 75
+
+    def _Motor(self):
+        world = CurrentWorld()
+        world.Sync()
+        return world.Motor(self.port)
+
+    def _RunDegrees(self, degrees, speed):
+        motor = self._Motor()
+        start = motor.degrees
+        motor.Run(speed)
+        _WaitUntil(lambda: abs(motor.degrees - start) >= abs(degrees))
+        motor.Stop()
+
+    def run_to_position(self, degrees, direction='shortest path', speed=None):
+        _CheckInt("degrees", degrees)
+        if degrees < 0 or degrees > 359:
+            raise ValueError("degrees is not within the range of 0-359")
+        if direction not in ('shortest path', 'clockwise', 'counterclockwise'):
+            raise ValueError("direction is not one of the allowed values")
+        speed = abs(self._defaultSpeed if speed is None else speed)
+        change = (degrees - self.get_position()) % 360
+        if direction == 'counterclockwise' or (direction == 'shortest path' and change > 180):
+            change -= 360
+        if change != 0:
+            self._RunDegrees(change, speed if change > 0 else -speed)
+
+    def run_to_degrees_counted(self, degrees, speed=None):
+        _CheckInt("degrees", degrees)
+        speed = abs(self._defaultSpeed if speed is None else speed)
+        change = degrees - self.get_degrees_counted()
+        if change != 0:
+            self._RunDegrees(change, speed if change > 0 else -speed)
+
+    def run_for_degrees(self, degrees, speed=None):
+        _CheckInt("degrees", degrees)
+        speed = self._defaultSpeed if speed is None else speed
+        _CheckInt("speed", speed)
+        direction = 1 if (degrees >= 0) == (speed >= 0) else -1
+        self._RunDegrees(degrees, direction * abs(_Clamp(speed)))
+
+    def run_for_rotations(self, rotations, speed=None):
+        _CheckNumber("rotations", rotations)
+        speed = self._defaultSpeed if speed is None else speed
+        _CheckInt("speed", speed)
+        direction = 1 if (rotations >= 0) == (speed >= 0) else -1
+        self._RunDegrees(rotations * 360, direction * abs(_Clamp(speed)))
+
+    def run_for_seconds(self, seconds, speed=None):
+        _CheckNumber("seconds", seconds)
+        speed = self._defaultSpeed if speed is None else speed
+        _CheckInt("speed", speed)
+        motor = self._Motor()
+        motor.Run(_Clamp(speed))
+        CurrentWorld().Sleep(seconds)
+        motor.Stop()
+
+    def start(self, speed=None):
+        speed = self._defaultSpeed if speed is None else speed
+        _CheckInt("speed", speed)
+        self._Motor().Run(_Clamp(speed))
+
+    def stop(self):
+        self._Motor().Stop()
+
+    def start_at_power(self, power):
+        _CheckInt("power", power)
+        self._Motor().RunAtPower(power)
+
+    def get_speed(self):
+        motor = self._Motor()
+        return int(round(motor.dps * 100 / CurrentWorld().fullSpeedDps))
+
+    def get_position(self):
+        return int(round(self._Motor().degrees)) % 360
+
+    def get_degrees_counted(self):
+        return int(round(self._Motor().Counted()))
+
+    def get_default_speed(self):
+        return self._defaultSpeed
+
+    def was_interrupted(self):
+        return self._Motor().interrupted
+
+    def was_stalled(self):
+        return self._Motor().stalled
+
+    def set_degrees_counted(self, degrees_counted):
+        _CheckInt("degrees_counted", degrees_counted)
+        motor = self._Motor()
+        motor.countedOffset = motor.degrees - degrees_counted
+
+    def set_default_speed(self, default_speed):
+        _CheckInt("default_speed", default_speed)
+        self._defaultSpeed = _Clamp(default_speed)
+
+    def set_stop_action(self, action):
+        if not isinstance(action, str):
+            raise TypeError("action is not a string")
+        if action not in _STOP_ACTIONS:
+            raise ValueError("action is not one of the allowed values")
+        self._Motor().stopAction = action
+
+    def set_stall_detection(self, stop_when_stalled):
+        if not isinstance(stop_when_stalled, bool):
+            raise TypeError("stop_when_stalled is not a boolean")
+
+
+class MotorPair():
+    def __init__(self, port1, port2):
+        self.port1 = port1
+        self.port2 = port2
+        self._defaultSpeed = 100
+        self._cmPerRotation = 17.6
+        self._stopAction = 'coast'
+
+    def _Motors(self):
+        world = CurrentWorld()
+        world.Sync()
+        return (world.Motor(self.port1), world.Motor(self.port2))
+
+    def _RunTank(self, leftSpeed, rightSpeed):
+        #The first motor is mirrored on a driving base
+        left, right = self._Motors()
+        left.Run(-_Clamp(leftSpeed))
+        right.Run(_Clamp(rightSpeed))
+        return left, right
+
+    def _SteeringSpeeds(self, steering, speed):
+        steering = max(-100, min(100, steering))
+        if steering >= 0:
+            return speed, speed * (50 - steering) / 50
+        return speed * (50 + steering) / 50, speed
+
+    def _MoveTank(self, amount, unit, leftSpeed, rightSpeed):
+        _CheckNumber("amount", amount)
+        if not isinstance(unit, str):
+            raise TypeError("unit is not a string")
+        if unit not in _DISTANCE_UNITS:
+            raise ValueError("unit is not one of the allowed values")
+        if unit == 'seconds':
+            self._RunTank(leftSpeed, rightSpeed)
+            CurrentWorld().Sleep(amount)
+            self.stop()
+            return
+        if amount < 0:
+            amount = -amount
+            leftSpeed = -leftSpeed
+            rightSpeed = -rightSpeed
+        if unit == 'cm':
+            degrees = amount / self._cmPerRotation * 360
+        elif unit == 'in':
+            degrees = amount * 2.54 / self._cmPerRotation * 360
+        elif unit == 'rotations':
+            degrees = amount * 360
+        else:
+            degrees = amount
+        left, right = self._RunTank(leftSpeed, rightSpeed)
+        #The faster motor decides when the move is done
+        motor = left if abs(leftSpeed) >= abs(rightSpeed) else right
+        start = motor.degrees
+        if leftSpeed != 0 or rightSpeed != 0:
+            _WaitUntil(lambda: abs(motor.degrees - start) >= degrees)
+        self.stop()
+
+    def move(self, amount, unit='cm', steering=0, speed=None):
+        speed = self._defaultSpeed if speed is None else speed
+        _CheckInt("steering", steering)
+        _CheckInt("speed", speed)
+        leftSpeed, rightSpeed = self._SteeringSpeeds(steering, _Clamp(speed))
+        self._MoveTank(amount, unit, leftSpeed, rightSpeed)
+
+    def start(self, steering=0, speed=None):
+        speed = self._defaultSpeed if speed is None else speed
+        _CheckInt("steering", steering)
+        _CheckInt("speed", speed)
+        leftSpeed, rightSpeed = self._SteeringSpeeds(steering, _Clamp(speed))
+        self._RunTank(leftSpeed, rightSpeed)
+
+    def stop(self):
+        left, right = self._Motors()
+        left.Stop(self._stopAction)
+        right.Stop(self._stopAction)
+
+    def move_tank(self, amount, unit='cm', left_speed=None, right_speed=None):
+        left_speed = self._defaultSpeed if left_speed is None else left_speed
+        right_speed = self._defaultSpeed if right_speed is None else right_speed
+        _CheckNumber("left_speed", left_speed)
+        _CheckNumber("right_speed", right_speed)
+        self._MoveTank(amount, unit, left_speed, right_speed)
+
+    def start_tank(self, left_speed, right_speed):
+        _CheckInt("left_speed", left_speed)
+        _CheckInt("right_speed", right_speed)
+        self._RunTank(left_speed, right_speed)
+
+    def start_at_power(self, power, steering=0):
+        _CheckInt("power", power)
+        _CheckInt("steering", steering)
+        leftPower, rightPower = self._SteeringSpeeds(steering, _Clamp(power))
+        self.start_tank_at_power(int(leftPower), int(rightPower))
+
+    def start_tank_at_power(self, left_power, right_power):
+        _CheckInt("left_power", left_power)
+        _CheckInt("right_power", right_power)
+        left, right = self._Motors()
+        left.RunAtPower(-left_power)
+        right.RunAtPower(right_power)
+
+    def get_default_speed(self):
+        return self._defaultSpeed
+
+    def set_motor_rotation(self, amount, unit='cm'):
+        _CheckNumber("amount", amount)
+        if unit not in ('cm', 'in'):
+            raise ValueError("unit is not one of the allowed values")
+        self._cmPerRotation = amount if unit == 'cm' else amount * 2.54
+
+    def set_default_speed(self, speed):
+        _CheckNumber("speed", speed)
+        self._defaultSpeed = _Clamp(speed)
+
+    def set_stop_action(self, action):
+        if not isinstance(action, str):
+            raise TypeError("action is not a string")
+        if action not in _STOP_ACTIONS:
+            raise ValueError("action is not one of the allowed values")
+        self._stopAction = action
+
+
+class PrimeHub():
+    speaker = Speaker()
+    motion_sensor = MotionSensor()
+    left_button = Buttons("left")
+    right_button = Buttons("right")
+    light_matrix = LightMatrix()
+    status_light = StatusLight()
+    PORT_A = 'A'
+    PORT_B = 'B'
+    PORT_C = 'C'
+    PORT_D = 'D'
+    PORT_E = 'E'
+    PORT_F = 'F'
+
+    def __init__(self):
+        pass
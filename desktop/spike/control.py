@@ -0,0 +1,44 @@
+"""
+Desktop stand-in for spike.control. Waiting lets simulated time pass.
+
+Nothing in here runs on the hub.
+"""
+from sim_world import CurrentWorld
+
+#How often wait_until() checks its condition
+_POLL_SECONDS = 0.005
+
+
+class Timer():
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        world = CurrentWorld()
+        world.Sync()
+        self._start = world.time
+
+    def now(self):
+        world = CurrentWorld()
+        world.Sync()
+        return int(world.time - self._start)
+
+
+def wait_for_seconds(seconds):
+    if isinstance(seconds, bool) or not isinstance(seconds, (int, float)):
+        raise TypeError("seconds is not a number")
+    if seconds < 0:
+        raise ValueError("seconds is not at least 0")
+    CurrentWorld().Sleep(seconds)
+
+
+def wait_until(get_value_function, operator_function=None, target_value=True):
+    if not callable(get_value_function):
+        raise TypeError("get_value_function is not callable")
+    if operator_function is None:
+        operator_function = lambda a, b: a == b
+    elif not callable(operator_function):
+        raise TypeError("operator_function is not callable")
+    world = CurrentWorld()
+    while not operator_function(get_value_function(), target_value):
+        world.Sleep(_POLL_SECONDS)
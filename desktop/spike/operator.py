@@ -0,0 +1,29 @@
+"""
+Desktop stand-in for spike.operator.
+
+Nothing in here runs on the hub.
+"""
+
+
+def greater_than(a, b):
+    return a > b
+
+
+def greater_than_or_equal_to(a, b):
+    return a >= b
+
+
+def less_than(a, b):
+    return a < b
+
+
+def less_than_or_equal_to(a, b):
+    return a <= b
+
+
+def equal_to(a, b):
+    return a == b
+
+
+def not_equal_to(a, b):
+    return a != b
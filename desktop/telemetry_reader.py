@@ -0,0 +1,180 @@
+"""
+Reads the binary telemetry logs written by br.StartTelemetryLog().
+
+    python desktop/telemetry_reader.py run1.log run2.log
+    python desktop/telemetry_reader.py logs/*.log --csv all.csv
+
+The file is memory-mapped, so even a very large log opens right away and the
+records are only read from disk when they are used. ReadLog() gives them back
+as a NumPy record array with one field per column, so a whole column can be
+worked on at once:
+
+    log = Samples(ReadLog("run1.log"))
+    turns = log[Labels(log) == LabelNumber("GyroTurn")]
+    print(turns["yaw"].max() / 10)
+
+Target records, which say what each move was asked to do, are mixed in with
+the samples. Samples() leaves them out and Targets() finds them.
+
+The record format is set in telemetry_log.py. It needs NumPy
+(pip install numpy). Nothing in here runs on the hub.
+"""
+import argparse
+import os
+import sys
+
+import numpy
+
+_DESKTOP = os.path.dirname(os.path.abspath(__file__))
+_REPO = os.path.dirname(_DESKTOP)
+if _REPO not in sys.path:
+    sys.path.append(_REPO)
+
+import telemetry_log
+
+#The same layout as telemetry_log.RECORD_FORMAT, little endian with no padding
+RECORD_DTYPE = numpy.dtype([
+    ("time", "<u4"),
+    ("left", "<i4"),
+    ("right", "<i4"),
+    ("yaw", "<i2"),
+    ("speed", "i1"),
+    ("steering", "i1"),
+    ("light", "u1"),
+    ("label", "u1"),
+])
+if RECORD_DTYPE.itemsize != telemetry_log.RECORD_SIZE:
+    raise ImportError("RECORD_DTYPE does not match telemetry_log.RECORD_FORMAT")
+
+
+class LogError(Exception):
+    """
+    The file is not a telemetry log this reader understands.
+    """
+
+
+def ReadLog(path):
+    """
+    Memory-maps the log at `path`. Returns a NumPy array of records with the \
+    fields time, left, right, yaw (tenths of a degree), speed, steering, \
+    light and label. A record cut short at the end of the file, for example \
+    because the hub was switched off, is left out.
+    """
+    with open(path, "rb") as stream:
+        header = stream.read(telemetry_log.HEADER_SIZE)
+    if len(header) < telemetry_log.HEADER_SIZE:
+        raise LogError(path + " is too short to be a telemetry log")
+    magic, version, recordSize = telemetry_log.struct.unpack(telemetry_log.HEADER_FORMAT, header)
+    if magic != telemetry_log.MAGIC:
+        raise LogError(path + " is not a telemetry log")
+    #Version 1 is the same without MOVE_START, version 2 without target records
+    if version not in (1, 2, telemetry_log.VERSION) or recordSize != RECORD_DTYPE.itemsize:
+        raise LogError(path + " is telemetry log version " + str(version) + ", this reader only knows up to " + \
+            "version " + str(telemetry_log.VERSION))
+    count = (os.path.getsize(path) - telemetry_log.HEADER_SIZE) // recordSize
+    if count == 0:
+        return numpy.zeros(0, dtype=RECORD_DTYPE)
+    return numpy.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=telemetry_log.HEADER_SIZE, shape=(count,))
+
+
+def LabelNumber(name):
+    """
+    The number stored in the label field for the method `name`.
+    """
+    return telemetry_log.LABELS.index(name)
+
+
+def Labels(log):
+    """
+    The label number of every record, without the MOVE_START and TARGET \
+    flags.
+    """
+    return log["label"] & ~numpy.uint8(telemetry_log.MOVE_START | telemetry_log.TARGET)
+
+
+def Samples(log):
+    """
+    The records of `log` without the target records. The log itself is \
+    given back, not a copy, if it has none.
+    """
+    isTarget = (log["label"] & telemetry_log.TARGET) != 0
+    if not isTarget.any():
+        return log
+    return log[~isTarget]
+
+
+def Targets(log):
+    """
+    The target records of `log`, and for each of them the index in \
+    ``Samples(log)`` of the first sample of its move.
+    """
+    isTarget = (log["label"] & telemetry_log.TARGET) != 0
+    where = numpy.flatnonzero(isTarget)
+    #Every target record before this one is left out of the samples
+    return log[where], where - numpy.arange(len(where))
+
+
+def MoveRanges(log):
+    """
+    Where each drive or turn starts and ends in `log`, which must not have \
+    target records in it (see ``Samples()``), as a list of (start, end) \
+    record indexes. A new move starts at a record marked MOVE_START, when \
+    the label changes, or when the time jumps by more than a tenth of a \
+    second.
+    """
+    if len(log) == 0:
+        return []
+    labels = Labels(log)
+    marked = (log["label"][1:] & telemetry_log.MOVE_START) != 0
+    gaps = numpy.diff(log["time"].astype(numpy.int64)) > 100000
+    starts = numpy.flatnonzero(numpy.concatenate(([True], (labels[1:] != labels[:-1]) | gaps | marked)))
+    ends = numpy.append(starts[1:], len(log))
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def Moves(log):
+    """
+    Splits a log into one piece per drive or turn, see ``MoveRanges()``. \
+    Returns a list of (label name, records) pairs. The records are views, \
+    not copies.
+    """
+    labels = Labels(log)
+    return [(telemetry_log.LABELS[labels[start]], log[start:end]) for start, end in MoveRanges(log)]
+
+
+def WriteCsv(logs, path):
+    """
+    Saves the records of several logs as one comma separated file, with \
+    the log's file name in the first column.
+    """
+    with open(path, "w") as stream:
+        stream.write("file,time_us,left,right,yaw,speed,steering,light,label\n")
+        for name, log in logs:
+            columns = [log[field] for field in RECORD_DTYPE.names]
+            columns[-1] = Labels(log)
+            for row in zip(*columns):
+                stream.write(name + "," + ",".join(str(value) for value in row[:-1]) + "," + \
+                    telemetry_log.LABELS[row[-1]] + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize binary telemetry logs from the hub.")
+    parser.add_argument("logs", nargs="+", help="log files copied from the hub")
+    parser.add_argument("--csv", help="also save every record to this comma separated file")
+    args = parser.parse_args()
+    logs = []
+    for path in args.logs:
+        log = Samples(ReadLog(path))
+        logs.append((os.path.basename(path), log))
+        seconds = log["time"][-1] / 1000000 if len(log) else 0
+        print(path + ": " + str(len(log)) + " records over " + str(round(seconds, 2)) + " s")
+        for name, move in Moves(log):
+            print("  " + (name or "unknown").ljust(20) + str(len(move)).rjust(6) + " passes, " + \
+                str(round((int(move["time"][-1]) - int(move["time"][0])) / 1000000, 2)) + " s, yaw " + \
+                str(move["yaw"][0] / 10) + " to " + str(move["yaw"][-1] / 10))
+    if args.csv:
+        WriteCsv(logs, args.csv)
+
+
+if __name__ == "__main__":
+    main()
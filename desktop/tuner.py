@@ -0,0 +1,212 @@
+"""
+Searches for drive and turn settings that are fast and still accurate.
+
+    python desktop/tuner.py drive --distance 60 --samples 4000
+    python desktop/tuner.py turn --angle 90 --search grid --steps 5
+    python desktop/tuner.py drive --max-error 1.5 --profile profile.json
+
+Every candidate set of settings is tried on the same group of simulated
+robots, each with a little wheel slip and gyro drift (desktop/batch_sim.py),
+and scored on how long the move takes and how far off it ends up. The
+candidates are spread over every core of the computer.
+
+The report lists the Pareto front: the candidates that nothing else beats on
+both time and error. Going down the list they get slower and more accurate,
+so pick the fastest one that is accurate enough. The chosen settings are
+merged into a profile file that BaseRobot.LoadProfile() reads on the hub.
+
+Nothing in here runs on the hub.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+
+import numpy
+
+import batch_sim
+
+#What can be searched, with the range searched by default
+DRIVE_RANGES = {
+    "driveMaxSpeed": (40, 100),
+    "driveMinSpeed": (5, 25),
+    "driveAccel": (100, 600),
+    "driveDecel": (100, 600),
+    "headingKpScale": (0.5, 2.0),
+    "headingKdScale": (0.0, 2.0),
+}
+TURN_RANGES = {
+    "gyroTurnMaxSpeed": (20, 100),
+    "gyroTurnMinSpeed": (4, 20),
+    "gyroTurnSlowDownAngle": (15, 90),
+    "turnCoastTime": (0.02, 0.12),
+}
+#Settings that are whole numbers on the robot
+_WHOLE = ("driveMaxSpeed", "driveMinSpeed", "gyroTurnMaxSpeed", "gyroTurnMinSpeed", "gyroTurnSlowDownAngle")
+
+
+def Candidates(ranges, search, samples, steps, seed):
+    """
+    The settings to try, as a dictionary of arrays with one entry per candidate.
+    """
+    names = sorted(ranges)
+    if search == "grid":
+        axes = [numpy.linspace(ranges[name][0], ranges[name][1], steps) for name in names]
+        rows = numpy.array(list(itertools.product(*axes)))
+    else:
+        rng = numpy.random.default_rng(seed)
+        low = numpy.array([ranges[name][0] for name in names])
+        high = numpy.array([ranges[name][1] for name in names])
+        rows = low + rng.random((samples, len(names))) * (high - low)
+    candidates = {}
+    for i, name in enumerate(names):
+        column = rows[:, i]
+        candidates[name] = numpy.round(column) if name in _WHOLE else column
+    return candidates
+
+
+def Robots(count, args):
+    """
+    The physical differences of the group of robots every candidate is \
+    tried on, as World parameters.
+    """
+    rng = numpy.random.default_rng(args.seed + 1)
+    return {
+        "wheelScaleLeft": rng.normal(1.0, args.wheel_slip, count),
+        "wheelScaleRight": rng.normal(1.0, args.wheel_slip, count),
+        "gyroDriftDps": rng.normal(0.0, args.gyro_drift, count),
+        "motorTimeConstant": 0.05 * rng.uniform(0.8, 1.2, count),
+    }
+
+
+def Evaluate(job):
+    """
+    Tries every candidate in `job` on every robot. Returns the mean time \
+    and the 95th percentile error of each candidate.
+    """
+    kind, target, candidates, robots, defaults, seed = job
+    count = len(next(iter(candidates.values())))
+    repeats = len(next(iter(robots.values())))
+    settings = dict(defaults)
+    for name in candidates:
+        #Candidate i is tried on robots i*repeats up to (i+1)*repeats
+        settings[name] = numpy.repeat(candidates[name], repeats)
+    physics = {}
+    for name in robots:
+        physics[name] = numpy.tile(robots[name], count)
+    batch = batch_sim.BatchWorld(count * repeats, seed=seed, **physics)
+    if kind == "drive":
+        results = batch.RunDrive(target, settings)
+        error = numpy.hypot(results["distanceError"], results["lateral"])
+    else:
+        results = batch.RunTurn(target, settings)
+        error = numpy.abs(results["headingError"])
+    #Runs that never finished count as very bad
+    error = numpy.where(results["finished"], error, numpy.inf)
+    seconds = results["seconds"].reshape(count, repeats).mean(axis=1)
+    error = numpy.percentile(error.reshape(count, repeats), 95, axis=1)
+    return seconds, error
+
+
+def ParetoFront(seconds, error):
+    """
+    Indexes of the candidates that no other candidate beats on both time \
+    and error, fastest first.
+    """
+    order = numpy.lexsort((error, seconds))
+    front = []
+    best = numpy.inf
+    for i in order:
+        if error[i] < best:
+            front.append(i)
+            best = error[i]
+    return front
+
+
+def Profile(kind, candidates, index, defaults):
+    """
+    The BaseRobot settings for one candidate, ready for ApplyProfile().
+    """
+    profile = {}
+    for name in candidates:
+        value = round(float(candidates[name][index]), 4)
+        if name in _WHOLE:
+            value = int(value)
+        profile[name] = value
+    if kind == "drive":
+        kpScale = profile.pop("headingKpScale", 1.0)
+        kiScale = profile.pop("headingKiScale", 1.0)
+        kdScale = profile.pop("headingKdScale", 1.0)
+        profile["headingGains"] = [[row[0], round(row[1] * kpScale, 4), round(row[2] * kiScale, 4),
+            round(row[3] * kdScale, 4)] for row in defaults["headingGains"]]
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search for fast and accurate drive or turn settings.")
+    parser.add_argument("kind", choices=("drive", "turn"))
+    parser.add_argument("--distance", type=float, default=60, help="drive distance to tune for, cm")
+    parser.add_argument("--angle", type=float, default=90, help="turn angle to tune for, degrees")
+    parser.add_argument("--search", choices=("random", "grid"), default="random")
+    parser.add_argument("--samples", type=int, default=2000, help="candidates for a random search")
+    parser.add_argument("--steps", type=int, default=4, help="values per setting for a grid search")
+    parser.add_argument("--robots", type=int, default=16, help="simulated robots each candidate is tried on")
+    parser.add_argument("--wheel-slip", type=float, default=0.02)
+    parser.add_argument("--gyro-drift", type=float, default=0.05)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-error", type=float, default=None,
+        help="pick the fastest candidate within this error. Default: no worse than the current settings.")
+    parser.add_argument("--profile", default="profile.json", help="profile file to write the chosen settings into")
+    args = parser.parse_args()
+
+    defaults = batch_sim.RobotDefaults()
+    ranges = DRIVE_RANGES if args.kind == "drive" else TURN_RANGES
+    target = args.distance if args.kind == "drive" else args.angle
+    candidates = Candidates(ranges, args.search, args.samples, args.steps, args.seed)
+    #The current settings go first, to compare against
+    for name in candidates:
+        current = defaults.get(name, 1.0)
+        candidates[name] = numpy.concatenate(([current], candidates[name]))
+    robots = Robots(args.robots, args)
+    count = len(candidates[next(iter(candidates))])
+
+    chunks = numpy.array_split(numpy.arange(count), max(1, args.processes * 4))
+    jobs = [(args.kind, target, dict((name, candidates[name][chunk]) for name in candidates), robots, defaults,
+        args.seed) for chunk in chunks if len(chunk)]
+    with multiprocessing.Pool(args.processes) as pool:
+        parts = pool.map(Evaluate, jobs)
+    seconds = numpy.concatenate([part[0] for part in parts])
+    error = numpy.concatenate([part[1] for part in parts])
+
+    unit = " cm" if args.kind == "drive" else " deg"
+    print("Tried " + str(count) + " candidates on " + str(args.robots) + " robots each")
+    print("Current settings: " + str(round(seconds[0], 3)) + " s, 95% error " + str(round(error[0], 2)) + unit)
+    print("Pareto front (fastest first):")
+    names = sorted(ranges)
+    print("  seconds  error  " + "  ".join(names))
+    front = ParetoFront(seconds, error)
+    for i in front:
+        print("  " + str(round(seconds[i], 3)).ljust(7) + "  " + str(round(error[i], 2)).ljust(5) + "  " + \
+            "  ".join(str(round(float(candidates[name][i]), 3)).ljust(len(name)) for name in names))
+
+    limit = error[0] if args.max_error is None else args.max_error
+    good = [i for i in front if error[i] <= limit]
+    if not good:
+        print("Nothing is within " + str(round(limit, 2)) + unit + ", the profile was not changed")
+        return
+    chosen = good[0]
+    print("Chosen: " + str(round(seconds[chosen], 3)) + " s, 95% error " + str(round(error[chosen], 2)) + unit)
+    profile = {}
+    if os.path.exists(args.profile):
+        with open(args.profile) as stream:
+            profile = json.load(stream)
+    profile.update(Profile(args.kind, candidates, chosen, defaults))
+    with open(args.profile, "w") as stream:
+        json.dump(profile, stream, indent=1, sort_keys=True)
+    print("Saved to " + args.profile + ". Upload it to the hub and call br.LoadProfile().")
+
+
+if __name__ == "__main__":
+    main()
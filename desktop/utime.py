@@ -0,0 +1,43 @@
+"""
+Desktop stand-in for MicroPython's utime, running on the simulated clock.
+
+control_loop.py imports utime first, so inside the simulator the control
+loop sleeps on simulated time instead of the computer's clock.
+
+Nothing in here runs on the hub.
+"""
+from sim_world import CurrentWorld
+
+
+def ticks_us():
+    world = CurrentWorld()
+    world.Sync()
+    return int(world.time * 1000000)
+
+
+def ticks_ms():
+    return ticks_us() // 1000
+
+
+def ticks_diff(new, old):
+    return new - old
+
+
+def ticks_add(ticks, delta):
+    return ticks + delta
+
+
+def sleep_us(us):
+    CurrentWorld().Sleep(us / 1000000)
+
+
+def sleep_ms(ms):
+    CurrentWorld().Sleep(ms / 1000)
+
+
+def sleep(seconds):
+    CurrentWorld().Sleep(seconds)
+
+
+def time():
+    return CurrentWorld().time
@@ -0,0 +1,114 @@
+"""
+Drive events for FLL Team 24277's Base Robot.
+
+A drive event does something at a chosen spot during a drive, for example
+lowering the arm 30 cm into a 60 cm drive, without stopping the robot. The
+drive checks its events on every control loop pass, right after it reads the
+sensors, so an event fires at most one loop pass (10 ms) after the robot
+reaches its spot.
+
+The action is a function, which is called once. If it returns a task from
+scheduler.py, for example ``lambda: MotorForDegrees(br.leftMedMotor, 90, 50)``,
+the task is started in the background and keeps going after the drive is
+done. A new task is made every time the event fires, so the same event can
+be used in drive after drive. A task can also be given straight away, but
+a task only runs once, so that event can only fire in one drive.
+
+This file must be uploaded to the hub next to base_robot.py.
+"""
+
+
+class AtDistance():
+    """
+    Fires when the robot has driven `distance` cm from the start of the drive.
+
+    Parameters
+    ----------
+    distance: How far into the drive, in cm
+    type: float
+    action: What to do
+    type: function with no parameters, which can return a task to start. \
+        Or a task (generator), which can only run in one drive.
+
+    Example
+    -------
+    >>> from scheduler import MotorForDegrees
+    >>> lower = AtDistance(30, lambda: MotorForDegrees(br.leftMedMotor, 90, 50))
+    >>> beep = AtDistance(50, lambda: br.hub.speaker.start_beep())
+    >>> br.AccelGyroDriveForward(60, [lower, beep])
+    >>> br.AccelGyroDriveForward(60, [lower]) #lowers the arm again
+    """
+    def __init__(self, distance, action):
+        self.distance = distance
+        self.action = action
+        #True once a task given as the action has been started
+        self._taskStarted = False
+        self.Reset()
+
+    def Reset(self):
+        """
+        Makes the event ready to fire again in another drive. Drives call it \
+        when they start. An event whose action is a task, rather than a \
+        function that makes one, raises ValueError when it fires again.
+        """
+        self.fired = False
+        #Where the robot really was when the event fired, in cm and degrees
+        self.firedDistance = None
+        self.firedYaw = None
+
+    def Ready(self, distance, yaw):
+        return distance >= self.distance
+
+
+class AtHeading(AtDistance):
+    """
+    Fires when the gyro yaw passes `heading`, going either way. The heading \
+    uses the same yaw as the drive's own `heading`.
+
+    Parameters
+    ----------
+    heading: The yaw to wait for, in degrees
+    type: float
+    action: What to do, the same as for ``AtDistance``
+    type: function with no parameters, which can return a task to start
+    """
+    def __init__(self, heading, action):
+        self.heading = heading
+        AtDistance.__init__(self, 0, action)
+
+    def Reset(self):
+        AtDistance.Reset(self)
+        self._side = None
+
+    def Ready(self, distance, yaw):
+        side = 1 if yaw > self.heading else -1
+        if yaw == self.heading:
+            return True
+        if self._side is None:
+            self._side = side
+            return False
+        return side != self._side
+
+
+def CheckEvents(events, scheduler, distance, yaw):
+    """
+    Fires every event in `events` that is ready. Drives call this once per \
+    control loop pass.
+    """
+    for event in events:
+        if not event.fired and event.Ready(distance, yaw):
+            event.fired = True
+            event.firedDistance = distance
+            event.firedYaw = yaw
+            action = event.action
+            if hasattr(action, "send"):
+                #A finished generator would do nothing, with the event saying it fired
+                if event._taskStarted:
+                    raise ValueError("A drive event task can only run once. " + \
+                        "Give the event a function that makes the task, like lambda: MotorForDegrees(...)")
+                event._taskStarted = True
+                scheduler.Start(action)
+            else:
+                task = action()
+                if hasattr(task, "send"):
+                    scheduler.Start(task)
@@ -0,0 +1,388 @@
+"""
+Whole number control math for FLL Team 24277's Base Robot.
+
+On the hub every sum with a decimal point in it makes a new float object, and
+a drive makes thousands of them. Sooner or later the garbage collector has to
+stop and clean them up, and if that happens in the middle of a drive the
+control loop misses its deadline. With ``BaseRobot(fixedPoint=True)`` the
+heading PID, the speed profile lookup, the predictive GyroTurn and odometry
+use the classes in here instead, which only use whole numbers (ints) while
+the robot is moving.
+
+A fixed point number is a decimal number times a fixed scale, kept as an int.
+Most things here are scaled by ONE (1024), so 2.5 degrees is 2560. PID gains
+are scaled by GAIN_ONE (65536) because small gains need the finer steps.
+MicroPython keeps ints up to about a billion without making new objects, and
+the scales are picked so a drive stays well below that.
+
+desktop/check_fixed_point.py checks that these give the same answers as the
+float versions.
+
+This file must be uploaded to the hub next to base_robot.py.
+"""
+from array import array
+import math
+from pid import PID
+
+#Scale for angles, distances, speeds and turn rates
+SHIFT = 10
+ONE = 1 << SHIFT
+#Scale for PID gains
+GAIN_ONE = 1 << 16
+#Scale of the sine table
+_SIN_ONE = 1 << 14
+#Scale of the odometry heading, which adds up thousands of small turns
+_HEADING_ONE = 1 << 16
+#Sine of every half degree, so cosine is 180 entries along
+_SIN = array('h', [int(round(math.sin(math.radians(i / 2)) * _SIN_ONE)) for i in range(720)])
+
+
+class FixedPID():
+    """
+    ``PID`` in whole numbers, with the same protections. The setpoint and \
+    measurement must be ints, and so is the correction it gives back.
+
+    Parameters
+    ----------
+    kp, ki, kd: The P, I and D gains
+    type: float
+    default: kp has no default, ki and kd are 0
+    outputLimit: The largest correction the controller will give
+    type: int
+    default: 100
+    integralLimit: The largest the I part can grow. None uses `outputLimit`.
+    type: int
+    default: None
+
+    Example
+    -------
+    >>> heading = FixedPID(1.5, 0.5, 0.05)
+    >>> steering = heading.Update(0, br.hub.motion_sensor.get_yaw_angle(), 0.01)
+    """
+    def __init__(self, kp, ki=0, kd=0, outputLimit=100, integralLimit=None):
+        self.SetGains(kp, ki, kd)
+        self.outputLimit = outputLimit
+        self.integralLimit = outputLimit if integralLimit is None else integralLimit
+        self._dt = None
+        self.Reset()
+
+    def SetGains(self, kp, ki=0, kd=0):
+        """
+        Changes the gains. The I part that has already built up is kept.
+        """
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.SetFixedGains(int(round(kp * GAIN_ONE)), int(round(ki * GAIN_ONE)), int(round(kd * GAIN_ONE)))
+
+    def SetFixedGains(self, kp, ki, kd):
+        """
+        Changes the gains to ones already scaled by GAIN_ONE, without any \
+        float math. The kp, ki and kd attributes are left as they were.
+        """
+        self._kp = kp
+        self._ki = ki
+        self._kd = kd
+
+    def Reset(self):
+        """
+        Forgets the I part and the last measurement. Call this before each move.
+        """
+        #Scaled by GAIN_ONE, like the output before it is rounded
+        self.integral = 0
+        self._lastMeasurement = None
+        self._saturated = 0
+
+    def Update(self, setpoint, measurement, dt):
+        """
+        Works out the correction for one control loop pass, rounded to a \
+        whole number.
+
+        Parameters
+        ----------
+        setpoint: What the measurement should be
+        measurement: What the sensor reads right now
+        dt: Seconds since the last update. The control loop period never \
+            changes during a move, so the scaled versions of it are only \
+            worked out when it does.
+        """
+        if dt != self._dt:
+            self._SetDt(dt)
+        error = setpoint - measurement
+        #Don't let the I part grow in the direction the output is already stuck
+        if self._saturated == 0 or (self._saturated > 0) != (error > 0):
+            self.integral += self._ki * self._dtScaled // GAIN_ONE * error
+            integralLimit = self.integralLimit * GAIN_ONE
+            if self.integral > integralLimit:
+                self.integral = integralLimit
+            elif self.integral < -integralLimit:
+                self.integral = -integralLimit
+        derivative = 0
+        if self._lastMeasurement is not None and self._perDt > 0:
+            derivative = -(self._kd * self._perDt // 256) * (measurement - self._lastMeasurement)
+        self._lastMeasurement = measurement
+        output = self._kp * error + self.integral + derivative
+        outputLimit = self.outputLimit * GAIN_ONE
+        if output > outputLimit:
+            self._saturated = 1
+            return self.outputLimit
+        if output < -outputLimit:
+            self._saturated = -1
+            return -self.outputLimit
+        self._saturated = 0
+        return (output + GAIN_ONE // 2) // GAIN_ONE
+
+    def _SetDt(self, dt):
+        #dt scaled by GAIN_ONE for the I part, and 1 / dt scaled by 256 for \
+        #the D part
+        self._dt = dt
+        self._dtScaled = int(round(dt * GAIN_ONE))
+        self._perDt = int(round(256 / dt)) if dt > 0 else 0
+
+
+class FixedGainSchedule():
+    """
+    A ``GainSchedule`` worked out ahead of time for every whole speed from 0 \
+    to 100, so looking up the gains takes no float math.
+
+    Parameters
+    ----------
+    schedule: The gains to use
+    type: GainSchedule
+
+    Example
+    -------
+    >>> gains = FixedGainSchedule(br.headingGains)
+    >>> gains.Apply(heading, 40)
+    """
+    def __init__(self, schedule):
+        self.schedule = schedule
+        pid = PID(0)
+        self.kp = array('i', [0] * 101)
+        self.ki = array('i', [0] * 101)
+        self.kd = array('i', [0] * 101)
+        for speed in range(101):
+            schedule.Apply(pid, speed)
+            self.kp[speed] = int(round(pid.kp * GAIN_ONE))
+            self.ki[speed] = int(round(pid.ki * GAIN_ONE))
+            self.kd[speed] = int(round(pid.kd * GAIN_ONE))
+
+    def Apply(self, pid, speed):
+        """
+        Sets the gains of the FixedPID `pid` for driving at `speed`, a whole \
+        number.
+        """
+        speed = abs(speed)
+        if speed > 100:
+            speed = 100
+        pid.SetFixedGains(self.kp[speed], self.ki[speed], self.kd[speed])
+
+
+class FixedProfile():
+    """
+    The speed table of a ``MotionProfile``, scaled by ONE so the speed can \
+    be looked up for a whole number of motor degrees without any float math.
+
+    Parameters
+    ----------
+    profile: The profile to copy
+    type: MotionProfile
+    values: its step must be a whole number of degrees
+    table: An array('i') to fill in instead of making a new one. A new \
+        table is made if it is too short.
+    type: array
+    default: None
+
+    Example
+    -------
+    >>> speeds = FixedProfile(MotionProfile(1200, 75, 10, accel=200))
+    >>> speeds.SpeedAt(600)
+    75
+    """
+    def __init__(self, profile, table=None):
+        self.step = int(profile.step)
+        if self.step != profile.step or self.step <= 0:
+            raise ValueError("FixedProfile needs a whole number step")
+        entries = profile.entries
+        if table is None or len(table) < entries:
+            table = array('i', [0] * entries)
+        speeds = profile.table
+        for i in range(entries):
+            table[i] = int(round(speeds[i] * ONE))
+        self.table = table
+        self.entries = entries
+
+    def SpeedAt(self, position):
+        """
+        The speed in percent after `position` motor degrees, dropping any \
+        fraction the same as ``int(profile.SpeedAt(position))``.
+        """
+        table = self.table
+        if position <= 0:
+            return table[0] // ONE
+        i = position // self.step
+        if i >= self.entries - 1:
+            return table[self.entries - 1] // ONE
+        fraction = position - i * self.step
+        return (table[i] + (table[i + 1] - table[i]) * fraction // self.step) // ONE
+
+
+def SlowDownSpeeds(minSpeed, maxSpeed, slowDownAngle):
+    """
+    The predictive GyroTurn speed for every whole degree left to turn, up to \
+    `slowDownAngle`. The turn rate drops like it does when braking.
+    """
+    speeds = array('h', [0] * int(math.ceil(slowDownAngle)))
+    for remaining in range(len(speeds)):
+        speeds[remaining] = int(math.sqrt(minSpeed * minSpeed + \
+            (maxSpeed * maxSpeed - minSpeed * minSpeed) * remaining / slowDownAngle))
+    return speeds
+
+
+class FixedOdometry():
+    """
+    ``Odometry`` in whole numbers. The position is kept in cm times ONE and \
+    the heading in degrees times 65536, and the sine and cosine are blended \
+    from a table of every half degree. ``Pose()``, x, y and heading give them back \
+    in cm and degrees.
+
+    Parameters
+    ----------
+    tireCircum: Drive wheel circumference in cm
+    type: float
+    trackWidth: Distance between the two drive wheels in cm
+    type: float
+    gyroWeight: How much to trust the gyro over the encoders for turning
+    type: float
+    values: 0 to 1. 1 uses only the gyro, 0 uses only the encoders.
+    default: 1.0
+
+    Example
+    -------
+    >>> odometry = FixedOdometry(17.6, 11.2)
+    >>> odometry.Update(leftDegrees, rightDegrees, yaw)
+    >>> x, y, heading = odometry.Pose()
+    """
+    #A yaw change bigger than this in one update can't be real turning, so \
+    #it must be somebody resetting the gyro
+    maxYawStep = 45
+
+    def __init__(self, tireCircum, trackWidth, gyroWeight=1.0):
+        #cm per motor degree scaled by ONE * ONE, so one degree is still exact \
+        #to a few hundred thousandths of a cm
+        self._cmPerDegree = int(round(tireCircum / 360 * ONE * ONE))
+        #Degrees of turn per motor degree of difference between the wheels, \
+        #scaled by 16 times the heading scale
+        self._turnPerDegree = int(round(math.degrees(tireCircum / 360 / trackWidth) * _HEADING_ONE * 16))
+        self._gyroWeight = int(round(gyroWeight * ONE))
+        self.trackWidth = trackWidth
+        self.gyroWeight = gyroWeight
+        self.Reset()
+
+    def Reset(self, x=0, y=0, heading=0):
+        """
+        Sets the pose, for example when the robot is at a known landmark. The \
+        next ``Update()`` only remembers the sensor readings.
+        """
+        self._x = int(round(x * ONE))
+        self._y = int(round(y * ONE))
+        self._heading = int(round(heading * _HEADING_ONE))
+        self._lastLeft = None
+        self._lastRight = None
+        self._lastYaw = None
+
+    def OnYawReset(self):
+        """
+        Call this right after resetting the gyro yaw to 0, so the reset does \
+        not look like the robot turning.
+        """
+        if self._lastYaw is not None:
+            self._lastYaw = 0
+
+    def Update(self, leftDegrees, rightDegrees, yaw):
+        """
+        Moves the pose along by the change since the last update. All three \
+        readings must be whole numbers.
+
+        Parameters
+        ----------
+        leftDegrees, rightDegrees: Degrees counted by the drive motors, both \
+            counting up when the robot drives forward
+        yaw: Gyro yaw angle in degrees
+        """
+        if self._lastYaw is None:
+            self._lastLeft = leftDegrees
+            self._lastRight = rightDegrees
+            self._lastYaw = yaw
+            return
+        left = leftDegrees - self._lastLeft
+        right = rightDegrees - self._lastRight
+        yawChange = yaw - self._lastYaw
+        if yawChange > 180:
+            yawChange -= 360
+        elif yawChange < -180:
+            yawChange += 360
+        self._lastLeft = leftDegrees
+        self._lastRight = rightDegrees
+        self._lastYaw = yaw
+
+        #Rounded to the nearest step, so the small errors cancel out over a drive
+        distance = ((left + right) * self._cmPerDegree + ONE) // (2 * ONE)
+        encoderTurn = ((left - right) * self._turnPerDegree + 8) // 16
+        if abs(yawChange) > self.maxYawStep or self._gyroWeight == 0:
+            turn = encoderTurn
+        elif self._gyroWeight == ONE:
+            turn = yawChange * _HEADING_ONE
+        else:
+            turn = (self._gyroWeight * yawChange * _HEADING_ONE + (ONE - self._gyroWeight) * encoderTurn + \
+                ONE // 2) // ONE
+        #Move along the average heading of this step. It falls between two \
+        #half degrees of the sine table, so blend the two.
+        middle = (self._heading + turn // 2) * 2
+        i = middle // _HEADING_ONE % 720
+        fraction = middle % _HEADING_ONE
+        sin = _SIN[i] + (_SIN[(i + 1) % 720] - _SIN[i]) * fraction // _HEADING_ONE
+        i = (i + 180) % 720
+        cos = _SIN[i] + (_SIN[(i + 1) % 720] - _SIN[i]) * fraction // _HEADING_ONE
+        self._x += (distance * cos + _SIN_ONE // 2) // _SIN_ONE
+        self._y += (distance * sin + _SIN_ONE // 2) // _SIN_ONE
+        self._heading += turn
+        if self._heading > 180 * _HEADING_ONE:
+            self._heading -= 360 * _HEADING_ONE
+        elif self._heading <= -180 * _HEADING_ONE:
+            self._heading += 360 * _HEADING_ONE
+
+    @property
+    def x(self):
+        return self._x / ONE
+
+    @property
+    def y(self):
+        return self._y / ONE
+
+    @property
+    def heading(self):
+        return self._heading / _HEADING_ONE
+
+    def Pose(self):
+        """
+        The current (x, y, heading), in cm and degrees.
+        """
+        return (self._x / ONE, self._y / ONE, self._heading / _HEADING_ONE)
+
+    def LastEncoders(self):
+        """
+        The (left, right) degrees counted from the last ``Update()``, or \
+        (0, 0) before the first one.
+        """
+        if self._lastLeft is None:
+            return (0, 0)
+        return (self._lastLeft, self._lastRight)
+
+    def DistanceAndHeadingTo(self, x, y):
+        """
+        How far away the point x, y is, and the heading that points at it.
+        """
+        dx = x - self._x / ONE
+        dy = y - self._y / ONE
+        return (math.sqrt(dx * dx + dy * dy), math.degrees(math.atan2(dy, dx)))
@@ -0,0 +1,170 @@
+"""
+Control loop pass times for FLL Team 24277's Base Robot.
+
+The drive and turn methods are tuned for 100 passes a second, so every pass
+should take 10 ms. ControlLoop.Report() gives the average and the worst, but
+not how often a pass runs long, or what the robot was doing when it did.
+Turn it on with ``br.histogramMode = True``, next to ``br.profilingMode``.
+Every pass is then counted in a histogram of how long it took, and the
+longest passes are kept with the phase of the move they happened in. After
+the mission ``br.DumpLoopHistogram()`` prints them.
+
+All of the memory is set aside when the LoopHistogram is made, so counting a
+pass does not create any new objects.
+
+This file must be uploaded to the hub next to base_robot.py.
+"""
+from array import array
+
+#What the robot was doing during a pass. 0 to 2 are the drive phases, \
+#ACCEL, CRUISE and DECEL in motion_profile.py.
+TURN = 3
+SETTLE = 4
+CREEP = 5
+FOLLOW = 6
+IDLE = 7
+PHASES = ("accel", "cruise", "decel", "turn", "settle", "creep", "follow", "idle")
+
+
+class LoopHistogram():
+    """
+    Counts control loop passes by how long they took, and keeps the longest \
+    ones. ``ControlLoop.Wait()`` calls ``Record()`` when the loop's \
+    histogram is set.
+
+    Parameters
+    ----------
+    binUs: How wide each bin is, in microseconds
+    type: int
+    default: 1000
+    bins: How many bins. The last one counts every pass that is longer.
+    type: int
+    default: 30
+    worst: How many of the longest passes to keep
+    type: int
+    default: 10
+
+    Example
+    -------
+    >>> br.histogramMode = True
+    >>> br.AccelGyroDriveForward(40)
+    >>> br.GyroTurn(90)
+    >>> br.DumpLoopHistogram()
+    """
+    def __init__(self, binUs=1000, bins=30, worst=10):
+        if binUs <= 0 or bins <= 0 or worst <= 0:
+            raise ValueError("LoopHistogram sizes must be above 0")
+        self.binUs = binUs
+        self.counts = array('l', [0] * bins)
+        self.worstUs = array('l', [0] * worst)
+        self.worstPhase = array('B', [IDLE] * worst)
+        self.worstPass = array('l', [0] * worst)
+        #Set by the drive and turn methods as they go from one phase to the next
+        self.phase = IDLE
+        self.Clear()
+
+    def Clear(self):
+        """
+        Forgets every pass counted so far.
+        """
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        for i in range(len(self.worstUs)):
+            self.worstUs[i] = 0
+            self.worstPhase[i] = IDLE
+            self.worstPass[i] = 0
+        self.passes = 0
+        #Which of the kept passes is the shortest, so it is the next to go
+        self._shortest = 0
+
+    def Record(self, durationUs, passNumber):
+        """
+        Counts one pass that took `durationUs`. `passNumber` is \
+        ``ControlLoop.totalIterations``, so the pass can be found in the profile.
+        """
+        i = durationUs // self.binUs
+        if i >= len(self.counts):
+            i = len(self.counts) - 1
+        self.counts[i] += 1
+        self.passes += 1
+        worstUs = self.worstUs
+        shortest = self._shortest
+        if durationUs <= worstUs[shortest]:
+            return
+        worstUs[shortest] = durationUs
+        self.worstPhase[shortest] = self.phase
+        self.worstPass[shortest] = passNumber
+        for i in range(len(worstUs)):
+            if worstUs[i] < worstUs[shortest]:
+                shortest = i
+        self._shortest = shortest
+
+    def Late(self, periodUs):
+        """
+        How many passes took at least one bin longer than `periodUs`.
+        """
+        late = 0
+        for i in range(len(self.counts)):
+            if i * self.binUs >= periodUs + self.binUs:
+                late += self.counts[i]
+        return late
+
+    def Dump(self, stream=None, periodUs=None):
+        """
+        Writes the histogram and the longest passes.
+
+        Parameters
+        ----------
+        stream: Where the table goes
+        type: file opened for writing
+        values: None prints it in the console. An open file saves it.
+        default: None
+        periodUs: The control loop period, to count the passes that ran long
+        type: int
+        default: None
+        """
+        self._WriteLine(stream, "Loop pass times, " + str(self.passes) + " passes")
+        if self.passes == 0:
+            return
+        most = max(self.counts)
+        last = len(self.counts) - 1
+        self._WriteLine(stream, "ms          passes")
+        for i in range(len(self.counts)):
+            count = self.counts[i]
+            if count == 0:
+                continue
+            if i == last:
+                label = _Ms(i * self.binUs) + "+"
+            else:
+                label = _Ms(i * self.binUs) + "-" + _Ms((i + 1) * self.binUs)
+            self._WriteLine(stream, _Pad(label, 12) + _Pad(str(count), 8) + "#" * max(1, count * 40 // most))
+        if periodUs is not None:
+            late = self.Late(periodUs)
+            self._WriteLine(stream, str(late) + " passes took " + _Ms(periodUs + self.binUs) + \
+                " ms or more (" + str(round(late * 100 / self.passes, 1)) + "%)")
+        self._WriteLine(stream, "Longest passes")
+        self._WriteLine(stream, "ms      phase   pass")
+        order = sorted(range(len(self.worstUs)), key=lambda i: -self.worstUs[i])
+        for i in order:
+            if self.worstUs[i] == 0:
+                continue
+            self._WriteLine(stream, _Pad(_Ms(self.worstUs[i]), 8) + \
+                _Pad(PHASES[self.worstPhase[i]], 8) + str(self.worstPass[i]))
+
+    def _WriteLine(self, stream, line):
+        if stream is None:
+            print(line)
+        else:
+            stream.write(line + "\n")
+
+
+def _Ms(us):
+    #Whole milliseconds without a decimal point, others to a hundredth
+    if us % 1000 == 0:
+        return str(us // 1000)
+    return str(round(us / 1000, 2))
+
+
+def _Pad(text, width):
+    #MicroPython strings have no ljust()
+    return text + " " * (width - len(text))
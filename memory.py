@@ -0,0 +1,127 @@
+"""
+Memory management for FLL Team 24277's Base Robot.
+
+MicroPython cleans up unused objects with a garbage collector, and it runs
+whenever the heap fills up, which can be in the last few degrees of a turn.
+The robot keeps turning while the collector runs, so the turn overshoots.
+MemoryPolicy moves the cleaning to between moves instead: the Scheduler
+tells it when a drive or turn starts and ends, and it collects right after
+the robot has stopped, when a pause does no harm. It can also switch the
+automatic collector off during moves, and it reports how much of the heap a
+mission used.
+
+On a computer python frees memory differently and does not say how much is
+free, so nothing is collected or switched off there.
+
+This file must be uploaded to the hub next to base_robot.py.
+"""
+import gc
+
+#Only MicroPython says how much of the heap is free
+_onHub = hasattr(gc, "mem_free")
+
+
+class MemoryPolicy():
+    """
+    When to collect garbage, and how much heap is free.
+
+    - collectBetweenMoves: Collect after every drive, turn, \
+      ``RunTogether()`` and ``WaitForTasks()``. On by default.
+    - disableInLoops: Switch the automatic collector off during moves, so it \
+      can never pause a control loop. The heap is collected first. If a \
+      move makes more garbage than the heap can hold it stops with a \
+      MemoryError, so try it with ``br.memory.Report()`` first. Off by \
+      default.
+
+    Example
+    -------
+    >>> br.memory.disableInLoops = True
+    >>> br.memory.StartMission("mission3")
+    >>> br.AccelGyroDriveForward(55)
+    >>> br.memory.EndMission()
+    mission3: free heap 81920 bytes at the start, 80640 at the end, lowest 62080
+    """
+    def __init__(self):
+        self.collectBetweenMoves = True
+        self.disableInLoops = False
+        #Collections done by the policy
+        self.collections = 0
+        self.missionName = ""
+        self.startFree = None
+        self.endFree = None
+        #Least free heap seen at the end of a move, before collecting
+        self.lowestFree = None
+        self._disabled = False
+
+    def FreeHeap(self):
+        """
+        Bytes of heap that are free right now, or None on a computer.
+        """
+        if not _onHub:
+            return None
+        return gc.mem_free()
+
+    def Collect(self):
+        """
+        Collects garbage now. Does nothing on a computer.
+        """
+        if _onHub:
+            gc.collect()
+            self.collections += 1
+
+    def EnterLoop(self):
+        """
+        Called by the Scheduler right before a move starts.
+        """
+        if self.disableInLoops and _onHub:
+            #Start with all of the heap, since nothing is collected until the end
+            self.Collect()
+            gc.disable()
+            self._disabled = True
+
+    def LeaveLoop(self):
+        """
+        Called by the Scheduler when a move ends, after the motors are told \
+        to stop, even if the move stopped with an error.
+        """
+        if self._disabled:
+            gc.enable()
+            self._disabled = False
+        free = self.FreeHeap()
+        if free is not None and (self.lowestFree is None or free < self.lowestFree):
+            self.lowestFree = free
+        if self.collectBetweenMoves:
+            self.Collect()
+
+    def StartMission(self, name=""):
+        """
+        Collects garbage and writes down the free heap at the start of a \
+        mission.
+        """
+        self.missionName = name
+        self.Collect()
+        self.startFree = self.FreeHeap()
+        self.endFree = None
+        self.lowestFree = self.startFree
+
+    def EndMission(self, show=True):
+        """
+        Collects garbage, writes down the free heap at the end of the mission \
+        and prints ``Report()`` if `show` is True.
+        """
+        self.Collect()
+        self.endFree = self.FreeHeap()
+        if show:
+            print(self.Report())
+
+    def Report(self):
+        """
+        A one line summary of the free heap during the last mission.
+        """
+        if self.startFree is None:
+            return (self.missionName + ": " if self.missionName else "") + "free heap unknown"
+        line = (self.missionName + ": " if self.missionName else "") + "free heap " + \
+            str(self.startFree) + " bytes at the start"
+        if self.endFree is not None:
+            line += ", " + str(self.endFree) + " at the end"
+        return line + ", lowest " + str(self.lowestFree)
@@ -0,0 +1,226 @@
+"""
+Motion profiles for FLL Team 24277's Base Robot.
+
+A MotionProfile is a table of how fast the robot should be going at each
+point along a move. The table is worked out once before the move starts, and
+the control loop looks up the speed for the current encoder reading. Because
+the speed depends on how far the robot has gone and not on a timer, short
+moves simply never reach full speed instead of overshooting.
+
+This file must be uploaded to the hub next to base_robot.py.
+"""
+from array import array
+import math
+
+#Phases of a move, as returned by MotionProfile.PhaseAt()
+ACCEL = 0
+CRUISE = 1
+DECEL = 2
+
+#Motor degrees between table entries, unless a profile asks for another step
+STEP = 5
+
+#How many jerk limited ramps to keep. Moves with the same speeds and \
+#settings use the same ramps, so they are only worked out once.
+_RAMPS_KEPT = 8
+_ramps = {}
+
+
+class MotionProfile():
+    """
+    Speed versus distance for one move.
+
+    With no `jerk` the profile is a trapezoid: speed up at `accel`, cruise \
+    at `maxSpeed`, slow down at `decel`. With a `jerk` the corners are \
+    rounded off into an S-curve, which is gentler on the wheels. If the move \
+    is too short to reach `maxSpeed` the profile becomes a triangle (or a \
+    rounded hump) that turns around wherever speeding up meets slowing down.
+
+    Parameters
+    ----------
+    distance: Length of the move in motor degrees
+    type: float
+    values: any value above 0
+    default: no default value
+    maxSpeed: Cruise speed in percent
+    type: float
+    values: 1 to 100
+    default: no default value
+    minSpeed: Speed at the very start and very end of the move, in percent. \
+        The robot needs a little speed to get going.
+    type: float
+    default: 10
+    accel: How fast to speed up, in percent per second
+    type: float
+    default: 200
+    decel: How fast to slow down, in percent per second. None uses `accel`.
+    type: float
+    default: None
+    jerk: How fast the acceleration itself may change, in percent per second \
+        per second. None makes a trapezoid.
+    type: float
+    default: None
+    fullSpeedDps: Motor degrees per second at speed 100
+    type: float
+    default: 1000
+    step: Distance between table entries, in motor degrees
+    type: float
+    default: 5
+    table: An array('f') to fill in instead of making a new one, so the \
+        same memory is used for move after move. A new table is made if it \
+        is too short for this move.
+    type: array
+    default: None
+
+    Example
+    -------
+    >>> profile = MotionProfile(1200, 75, 10, accel=200)
+    >>> profile.SpeedAt(0)
+    10.0
+    >>> profile.SpeedAt(600)
+    75.0
+    """
+    def __init__(self, distance, maxSpeed, minSpeed=10, accel=200, decel=None,
+            jerk=None, fullSpeedDps=1000, step=STEP, table=None):
+        if distance <= 0:
+            raise ValueError("MotionProfile distance must be above 0")
+        if decel is None:
+            decel = accel
+        self.distance = distance
+        self.maxSpeed = maxSpeed
+        self.minSpeed = min(minSpeed, maxSpeed)
+        self.step = step
+        #Work in motor degrees per second so the distances make sense
+        toDps = fullSpeedDps / 100
+        self._toPercent = 100 / fullSpeedDps
+        vMin = self.minSpeed * toDps
+        vMax = maxSpeed * toDps
+        if jerk is None:
+            up = None
+            down = None
+        else:
+            up = _Ramp(vMin, vMax, accel * toDps, jerk * toDps)
+            down = _Ramp(vMin, vMax, decel * toDps, jerk * toDps)
+
+        #Build the table. Each entry is the slowest of: full speed, how fast \
+        #the robot can be going after speeding up from the start, and how fast \
+        #it can be going and still slow down in time for the end.
+        entries = int(math.ceil(distance / step)) + 1
+        if table is None or len(table) < entries:
+            table = array('f', [0] * entries)
+        self.table = table
+        #How much of the table this move uses
+        self.entries = entries
+        self.cruiseStart = None
+        self.cruiseEnd = None
+        for i in range(entries):
+            position = min(i * step, distance)
+            if up is None:
+                speedUp = math.sqrt(vMin * vMin + 2 * accel * toDps * position)
+                slowDown = math.sqrt(vMin * vMin + 2 * decel * toDps * (distance - position))
+            else:
+                speedUp = _RampSpeedAt(up, position, vMax)
+                slowDown = _RampSpeedAt(down, distance - position, vMax)
+            speed = min(vMax, speedUp, slowDown)
+            self.table[i] = speed * self._toPercent
+            #Remember where speeding up stops limiting the speed, and where \
+            #slowing down starts to
+            if self.cruiseStart is None and speedUp >= min(vMax, slowDown):
+                self.cruiseStart = position
+            if self.cruiseEnd is None and slowDown < min(vMax, speedUp):
+                self.cruiseEnd = position
+        if self.cruiseStart is None:
+            self.cruiseStart = distance
+        if self.cruiseEnd is None:
+            self.cruiseEnd = distance
+        self.cruiseEnd = max(self.cruiseEnd, self.cruiseStart)
+
+    def SpeedAt(self, position):
+        """
+        The speed in percent the robot should have after `position` motor \
+        degrees of the move.
+        """
+        if position <= 0:
+            return self.table[0]
+        index = position / self.step
+        i = int(index)
+        if i >= self.entries - 1:
+            return self.table[self.entries - 1]
+        fraction = index - i
+        return self.table[i] + (self.table[i + 1] - self.table[i]) * fraction
+
+    def PhaseAt(self, position):
+        """
+        ACCEL, CRUISE or DECEL for a spot along the move.
+        """
+        if position < self.cruiseStart:
+            return ACCEL
+        if position < self.cruiseEnd:
+            return CRUISE
+        return DECEL
+
+    def EstimatedSeconds(self):
+        """
+        About how long the move will take if the robot follows the profile.
+        """
+        seconds = 0
+        for i in range(1, self.entries):
+            average = (self.table[i - 1] + self.table[i]) / 2 / self._toPercent
+            length = min(i * self.step, self.distance) - (i - 1) * self.step
+            if average > 0:
+                seconds += length / average
+        return seconds
+
+
+def _Ramp(vStart, vEnd, accel, jerk):
+    #_JerkLimitedRamp(), or the same ramp from an earlier move
+    key = (vStart, vEnd, accel, jerk)
+    ramp = _ramps.get(key)
+    if ramp is None:
+        if len(_ramps) >= _RAMPS_KEPT:
+            _ramps.clear()
+        ramp = _JerkLimitedRamp(vStart, vEnd, accel, jerk)
+        _ramps[key] = ramp
+    return ramp
+
+
+def _JerkLimitedRamp(vStart, vEnd, accel, jerk):
+    #Speeds up from vStart to vEnd with the acceleration growing at `jerk` \
+    #up to `accel`, then easing off so it reaches vEnd with no acceleration. \
+    #Returns two arrays: distance travelled and speed at each time step.
+    dt = 0.002
+    distances = array('f', [0])
+    speeds = array('f', [vStart])
+    a = 0
+    v = vStart
+    s = 0
+    while v < vEnd:
+        #Start easing off when the acceleration left would overshoot vEnd
+        if vEnd - v <= a * a / (2 * jerk):
+            a = max(a - jerk * dt, jerk * dt)
+        else:
+            a = min(a + jerk * dt, accel)
+        v = min(v + a * dt, vEnd)
+        s += v * dt
+        distances.append(s)
+        speeds.append(v)
+    return (distances, speeds)
+
+
+def _RampSpeedAt(ramp, position, vEnd):
+    #Looks up the ramp speed at a distance, by halving the search range
+    distances, speeds = ramp
+    if position >= distances[-1]:
+        return vEnd
+    low = 0
+    high = len(distances) - 1
+    while high - low > 1:
+        middle = (low + high) // 2
+        if distances[middle] <= position:
+            low = middle
+        else:
+            high = middle
+    span = distances[high] - distances[low]
+    if span <= 0:
+        return speeds[low]
+    return speeds[low] + (speeds[high] - speeds[low]) * (position - distances[low]) / span
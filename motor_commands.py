@@ -0,0 +1,164 @@
+"""
+Drive motor commands for FLL Team 24277's Base Robot.
+
+The drive and turn methods tell the drive motors what to do on every control
+loop pass, even when it is the same thing as last pass. The classic GyroTurn
+sends the same start_tank() over and over, and a drive sends the same start()
+while it cruises straight. Every command is a message to the motors that
+takes loop time. MotorCommands sits between base_robot.py and the MotorPair,
+remembers the last command it sent, and leaves out the ones that would not
+change anything. It can also leave out small changes, and changes that come
+too soon after the last one.
+
+This file must be uploaded to the hub next to base_robot.py.
+"""
+from control_loop import ticks_us, ticks_diff
+
+#What the last command sent was
+_NONE = 0
+_START = 1
+_TANK = 2
+
+
+class MotorCommands():
+    """
+    Sends start(), start_tank() and stop() to a MotorPair, leaving out \
+    commands that are the same as the last one sent. ``stop()`` is always \
+    sent. Counts how many commands were sent and how many were left out.
+
+    Anything that moves the drive motors without going through here, like \
+    ``br.driveMotors.move()``, should be followed by ``Forget()`` so the next \
+    command is sent for sure. Stop() does that too. Set the stop action with \
+    ``SetStopAction()`` rather than on the MotorPair, so a ``Stop()`` with an \
+    action of its own puts back the right one.
+
+    Parameters
+    ----------
+    motorPair: The drive motors
+    type: MotorPair
+    tolerance: Commands whose speeds and steering are all within this much \
+        of the last command sent are left out
+    type: int
+    values: 0 leaves out only exact repeats. 1 or 2 also leaves out the \
+        small wobble of a controller holding steady.
+    default: 0
+    minIntervalMs: A changed command is left out if the last command was \
+        sent less than this long ago. The control loop asks again on the \
+        next pass, so the change is only put off, not lost.
+    type: int
+    values: 0 (off) or more. Keep it below the control loop period (10ms \
+        at 100Hz) unless the controller can live with slower updates.
+    default: 0
+
+    Example
+    -------
+    >>> commands = MotorCommands(br.driveMotors, tolerance=1)
+    >>> commands.Start(0, 50)
+    >>> commands.Start(0, 50) #left out
+    >>> commands.Stop()
+    >>> print(commands.Report())
+    """
+    def __init__(self, motorPair, tolerance=0, minIntervalMs=0):
+        self.motorPair = motorPair
+        self.tolerance = tolerance
+        self.minIntervalMs = minIntervalMs
+        #The MotorPair's stop action. It has no way to ask, and SPIKE starts \
+        #with coast.
+        self.stopAction = "coast"
+        self.Reset()
+
+    def Reset(self):
+        """
+        Clears the counts, and forgets the last command.
+        """
+        self.sent = 0
+        self.suppressed = 0
+        self.Forget()
+
+    def Forget(self):
+        """
+        Forgets the last command, so the next one is sent whatever it is.
+        """
+        self._kind = _NONE
+        self._first = 0
+        self._second = 0
+        self._sentUs = 0
+
+    def Start(self, steering, speed):
+        """
+        Like ``MotorPair.start(steering, speed)``, unless it would not \
+        change anything.
+        """
+        if self._Skip(_START, steering, speed):
+            return
+        self.motorPair.start(steering = steering, speed = speed)
+
+    def StartTank(self, leftSpeed, rightSpeed):
+        """
+        Like ``MotorPair.start_tank(leftSpeed, rightSpeed)``, unless it would \
+        not change anything.
+        """
+        if self._Skip(_TANK, leftSpeed, rightSpeed):
+            return
+        self.motorPair.start_tank(leftSpeed, rightSpeed)
+
+    def SetStopAction(self, action):
+        """
+        ``MotorPair.set_stop_action(action)``, remembered so ``Stop()`` can \
+        put it back.
+        """
+        self.motorPair.set_stop_action(action)
+        self.stopAction = action
+
+    def Stop(self, action=None):
+        """
+        ``MotorPair.stop()``. It is always sent.
+        Parameters
+        ----------
+        action: How the motors stop this time only. The stop action set \
+            with ``SetStopAction()`` is put back straight after.
+        type: string
+        values: None, "coast", "brake" or "hold"
+        default: None, which stops the way the stop action says
+        Example
+        -------
+        >>> commands.Stop("brake")
+        """
+        if action is None or action == self.stopAction:
+            self.motorPair.stop()
+        else:
+            motorPair = self.motorPair
+            motorPair.set_stop_action(action)
+            motorPair.stop()
+            motorPair.set_stop_action(self.stopAction)
+        self.sent += 1
+        self.Forget()
+
+    def _Skip(self, kind, first, second):
+        #True if the command should be left out. Otherwise remembers it as \
+        #the last command sent.
+        if kind == self._kind:
+            tolerance = self.tolerance
+            if abs(first - self._first) <= tolerance and abs(second - self._second) <= tolerance:
+                self.suppressed += 1
+                return True
+            if self.minIntervalMs > 0 and \
+                    ticks_diff(ticks_us(), self._sentUs) < self.minIntervalMs * 1000:
+                self.suppressed += 1
+                return True
+        self._kind = kind
+        self._first = first
+        self._second = second
+        if self.minIntervalMs > 0:
+            self._sentUs = ticks_us()
+        self.sent += 1
+        return False
+
+    def Report(self):
+        """
+        A one line summary of the commands sent and left out.
+        """
+        total = self.sent + self.suppressed
+        percent = 0 if total == 0 else round(self.suppressed * 100 / total)
+        return "drive commands: " + str(self.sent) + " sent, " + str(self.suppressed) + \
+            " left out (" + str(percent) + "%)"
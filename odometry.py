@@ -0,0 +1,132 @@
+"""
+Odometry for FLL Team 24277's Base Robot.
+
+Odometry keeps track of where the robot is on the table by adding up small
+steps: how far each drive wheel rolled (from the motor encoders) and how much
+the robot turned (from the gyro) since the last update.
+
+Positions are in cm. x points the way the robot faced when the pose was last
+set, y points to the robot's right, and the heading is in degrees and grows
+clockwise, just like the gyro yaw.
+
+This file must be uploaded to the hub next to base_robot.py.
+"""
+import math
+
+
+class Odometry():
+    """
+    Keeps an (x, y, heading) pose up to date from the two drive encoders \
+    and the gyro.
+
+    Parameters
+    ----------
+    tireCircum: Drive wheel circumference in cm
+    type: float
+    trackWidth: Distance between the two drive wheels in cm
+    type: float
+    gyroWeight: How much to trust the gyro over the encoders for turning
+    type: float
+    values: 0 to 1. 1 uses only the gyro, 0 uses only the encoders.
+    default: 1.0
+
+    Example
+    -------
+    >>> odometry = Odometry(17.6, 11.2)
+    >>> odometry.Update(leftDegrees, rightDegrees, yaw)
+    >>> x, y, heading = odometry.Pose()
+    """
+    #A yaw change bigger than this in one update can't be real turning, so \
+    #it must be somebody resetting the gyro
+    maxYawStep = 45
+
+    def __init__(self, tireCircum, trackWidth, gyroWeight=1.0):
+        self.cmPerDegree = tireCircum / 360
+        self.trackWidth = trackWidth
+        self.gyroWeight = gyroWeight
+        self.Reset()
+
+    def Reset(self, x=0, y=0, heading=0):
+        """
+        Sets the pose, for example when the robot is at a known landmark. The \
+        next ``Update()`` only remembers the sensor readings.
+        """
+        self.x = x
+        self.y = y
+        self.heading = heading
+        self._lastLeft = None
+        self._lastRight = None
+        self._lastYaw = None
+
+    def OnYawReset(self):
+        """
+        Call this right after resetting the gyro yaw to 0, so the reset does \
+        not look like the robot turning.
+        """
+        if self._lastYaw is not None:
+            self._lastYaw = 0
+
+    def Update(self, leftDegrees, rightDegrees, yaw):
+        """
+        Moves the pose along by the change since the last update.
+
+        Parameters
+        ----------
+        leftDegrees, rightDegrees: Degrees counted by the drive motors, both \
+            counting up when the robot drives forward
+        yaw: Gyro yaw angle in degrees
+        """
+        if self._lastYaw is None:
+            self._lastLeft = leftDegrees
+            self._lastRight = rightDegrees
+            self._lastYaw = yaw
+            return
+        left = (leftDegrees - self._lastLeft) * self.cmPerDegree
+        right = (rightDegrees - self._lastRight) * self.cmPerDegree
+        yawChange = yaw - self._lastYaw
+        if yawChange > 180:
+            yawChange -= 360
+        elif yawChange < -180:
+            yawChange += 360
+        self._lastLeft = leftDegrees
+        self._lastRight = rightDegrees
+        self._lastYaw = yaw
+
+        distance = (left + right) / 2
+        encoderTurn = math.degrees((left - right) / self.trackWidth)
+        if abs(yawChange) > self.maxYawStep:
+            turn = encoderTurn
+        else:
+            turn = self.gyroWeight * yawChange + (1 - self.gyroWeight) * encoderTurn
+        #Move along the average heading of this step
+        middle = math.radians(self.heading + turn / 2)
+        self.x += distance * math.cos(middle)
+        self.y += distance * math.sin(middle)
+        self.heading += turn
+        if self.heading > 180:
+            self.heading -= 360
+        elif self.heading <= -180:
+            self.heading += 360
+
+    def Pose(self):
+        """
+        The current (x, y, heading).
+        """
+        return (self.x, self.y, self.heading)
+
+    def LastEncoders(self):
+        """
+        The (left, right) degrees counted from the last ``Update()``, or \
+        (0, 0) before the first one.
+        """
+        if self._lastLeft is None:
+            return (0, 0)
+        return (self._lastLeft, self._lastRight)
+
+    def DistanceAndHeadingTo(self, x, y):
+        """
+        How far away the point x, y is, and the heading that points at it.
+        """
+        dx = x - self.x
+        dy = y - self.y
+        return (math.sqrt(dx * dx + dy * dy), math.degrees(math.atan2(dy, dx)))
@@ -0,0 +1,136 @@
+"""
+PID controller for FLL Team 24277's Base Robot.
+
+A PID controller turns an error (how far off the robot is) into a correction.
+The P part pushes back in proportion to the error, the I part slowly builds
+up to remove an error that won't go away, and the D part brakes the
+correction when the robot is already swinging back.
+
+This file must be uploaded to the hub next to base_robot.py.
+"""
+
+
+class PID():
+    """
+    A PID controller with the usual protections.
+
+    - The I part is limited to `integralLimit` and stops growing while the \
+      output is already at its limit, so it can't "wind up" and cause a big \
+      overshoot later.
+    - The D part uses the change in the measurement, not in the error, so \
+      changing the setpoint does not make the output jump.
+    - The output is limited to +- `outputLimit`.
+
+    Parameters
+    ----------
+    kp, ki, kd: The P, I and D gains
+    type: float
+    default: kp has no default, ki and kd are 0
+    outputLimit: The largest correction the controller will give
+    type: float
+    default: 100
+    integralLimit: The largest the I part can grow. None uses `outputLimit`.
+    type: float
+    default: None
+
+    Example
+    -------
+    >>> heading = PID(1.5, 0.5, 0.05)
+    >>> steering = heading.Update(0, br.hub.motion_sensor.get_yaw_angle(), 0.01)
+    """
+    def __init__(self, kp, ki=0, kd=0, outputLimit=100, integralLimit=None):
+        self.SetGains(kp, ki, kd)
+        self.outputLimit = outputLimit
+        self.integralLimit = outputLimit if integralLimit is None else integralLimit
+        self.Reset()
+
+    def SetGains(self, kp, ki=0, kd=0):
+        """
+        Changes the gains. The I part that has already built up is kept.
+        """
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+
+    def Reset(self):
+        """
+        Forgets the I part and the last measurement. Call this before each move.
+        """
+        self.integral = 0
+        self._lastMeasurement = None
+        self._saturated = 0
+
+    def Update(self, setpoint, measurement, dt):
+        """
+        Works out the correction for one control loop pass.
+
+        Parameters
+        ----------
+        setpoint: What the measurement should be
+        measurement: What the sensor reads right now
+        dt: Seconds since the last update
+        """
+        error = setpoint - measurement
+        #Don't let the I part grow in the direction the output is already stuck
+        if self._saturated == 0 or (self._saturated > 0) != (error > 0):
+            self.integral += self.ki * error * dt
+            if self.integral > self.integralLimit:
+                self.integral = self.integralLimit
+            elif self.integral < -self.integralLimit:
+                self.integral = -self.integralLimit
+        derivative = 0
+        if self._lastMeasurement is not None and dt > 0:
+            derivative = -(measurement - self._lastMeasurement) / dt
+        self._lastMeasurement = measurement
+        output = self.kp * error + self.integral + self.kd * derivative
+        if output > self.outputLimit:
+            self._saturated = 1
+            return self.outputLimit
+        if output < -self.outputLimit:
+            self._saturated = -1
+            return -self.outputLimit
+        self._saturated = 0
+        return output
+
+
+class GainSchedule():
+    """
+    Different PID gains for different speeds. Gains between two entries are \
+    blended in proportion, and speeds outside the table use the nearest entry.
+
+    Parameters
+    ----------
+    entries: Rows of (speed, kp, ki, kd), sorted by speed
+    type: list of tuples
+
+    Example
+    -------
+    >>> schedule = GainSchedule([(10, 2.0, 0.5, 0.02), (75, 0.8, 0.2, 0.06)])
+    >>> schedule.Apply(heading, 40)
+    """
+    def __init__(self, entries):
+        if len(entries) == 0:
+            raise ValueError("GainSchedule needs at least one entry")
+        self.entries = sorted(entries)
+
+    def Apply(self, pid, speed):
+        """
+        Sets the gains of `pid` for driving at `speed`.
+        """
+        entries = self.entries
+        speed = abs(speed)
+        if speed <= entries[0][0]:
+            row = entries[0]
+            pid.SetGains(row[1], row[2], row[3])
+            return
+        for i in range(1, len(entries)):
+            high = entries[i]
+            if speed <= high[0]:
+                low = entries[i - 1]
+                blend = (speed - low[0]) / (high[0] - low[0])
+                pid.SetGains(low[1] + (high[1] - low[1]) * blend, \
+                    low[2] + (high[2] - low[2]) * blend, \
+                    low[3] + (high[3] - low[3]) * blend)
+                return
+        row = entries[-1]
+        pid.SetGains(row[1], row[2], row[3])
@@ -0,0 +1,207 @@
+"""
+Method profiler for FLL Team 24277's Base Robot.
+
+Turn it on with ``br.profilingMode = True``, next to ``br.debugMode``. Every
+drive and turn then writes down when it started and ended, how many control
+loop passes it ran, and when it changed phase: speeding up, cruising and
+slowing down for drives, turning, settling and creeping for turns. After the
+mission ``br.DumpTimings()`` prints a table of where the time went.
+
+All of the memory is set aside when the Profiler is made, so recording does
+not create any new objects. With profilingMode off nothing is recorded at all.
+
+This file must be uploaded to the hub next to base_robot.py.
+"""
+from array import array
+from control_loop import ticks_us, ticks_diff
+
+
+class Profiler():
+    """
+    A fixed size record of method calls and their phases. When it is full \
+    new calls are counted as dropped instead of recorded.
+
+    Parameters
+    ----------
+    size: How many method calls to keep
+    type: int
+    values: any value above 0. Each call uses 14 bytes, plus 7 bytes for \
+        each of up to 4 phases.
+    default: 200
+
+    Example
+    -------
+    >>> profiler = Profiler(200)
+    >>> call = profiler.Begin("GyroTurn", br.controlLoop.totalIterations)
+    >>> profiler.Phase(call, "settle")
+    >>> profiler.End(call, br.controlLoop.totalIterations)
+    >>> profiler.Dump()
+    """
+    def __init__(self, size=200):
+        if size <= 0:
+            raise ValueError("Profiler size must be above 0")
+        self.size = size
+        self.phaseSize = size * 4
+        #One entry per call
+        self.callName = array('H', [0] * size)
+        self.callStart = array('l', [0] * size)
+        self.callEnd = array('l', [0] * size)
+        self.callPasses = array('H', [0] * size)
+        #One entry per phase change
+        self.phaseCall = array('H', [0] * self.phaseSize)
+        self.phaseName = array('B', [0] * self.phaseSize)
+        self.phaseStart = array('l', [0] * self.phaseSize)
+        #Method and phase names, looked up by number
+        self.names = []
+        self.Clear()
+
+    def Clear(self):
+        """
+        Forgets all of the calls and starts timing the mission from now.
+        """
+        self.count = 0
+        self.phaseCount = 0
+        self.dropped = 0
+        self.startUs = ticks_us()
+
+    def _NameNumber(self, name):
+        #Names are only added the first time they are seen
+        if name not in self.names:
+            self.names.append(name)
+        return self.names.index(name)
+
+    def Begin(self, name, passes):
+        """
+        Writes down the start of a call to the method `name`. `passes` is \
+        ``ControlLoop.totalIterations`` right now.
+
+        Returns
+        -------
+        A number for the call, for ``Phase()`` and ``End()``. -1 if the \
+        profiler is full.
+        """
+        if self.count == self.size:
+            self.dropped += 1
+            return -1
+        call = self.count
+        self.callName[call] = self._NameNumber(name)
+        self.callStart[call] = ticks_us()
+        self.callEnd[call] = self.callStart[call]
+        self.callPasses[call] = passes & 0xffff
+        self.count += 1
+        return call
+
+    def Phase(self, call, name):
+        """
+        Writes down that `call` started the phase `name`. The phase lasts \
+        until the next phase of the same call, or until the call ends.
+        """
+        if call < 0 or self.phaseCount == self.phaseSize:
+            return
+        i = self.phaseCount
+        self.phaseCall[i] = call
+        self.phaseName[i] = self._NameNumber(name)
+        self.phaseStart[i] = ticks_us()
+        self.phaseCount += 1
+
+    def End(self, call, passes):
+        """
+        Writes down the end of `call`. `passes` is \
+        ``ControlLoop.totalIterations`` right now.
+        """
+        if call < 0:
+            return
+        self.callEnd[call] = ticks_us()
+        self.callPasses[call] = (passes - self.callPasses[call]) & 0xffff
+
+    def Summary(self):
+        """
+        Adds up the calls by method and by phase.
+
+        Returns
+        -------
+        A tuple of (total microseconds, methods, phases). Methods is a \
+        dictionary of method name to [calls, microseconds, passes], and \
+        phases is a dictionary of (method name, phase name) to microseconds. \
+        Calls that never ended, for example cancelled tasks, are left out.
+        """
+        totalUs = ticks_diff(ticks_us(), self.startUs)
+        methods = {}
+        finished = []
+        for call in range(self.count):
+            durationUs = ticks_diff(self.callEnd[call], self.callStart[call])
+            if durationUs <= 0:
+                finished.append(False)
+                continue
+            finished.append(True)
+            name = self.names[self.callName[call]]
+            if name not in methods:
+                methods[name] = [0, 0, 0]
+            totals = methods[name]
+            totals[0] += 1
+            totals[1] += durationUs
+            totals[2] += self.callPasses[call]
+        phases = {}
+        for i in range(self.phaseCount):
+            call = self.phaseCall[i]
+            if not finished[call]:
+                continue
+            #The phase ends when the next phase of the same call starts
+            endUs = self.callEnd[call]
+            for j in range(i + 1, self.phaseCount):
+                if self.phaseCall[j] == call:
+                    endUs = self.phaseStart[j]
+                    break
+            key = (self.names[self.callName[call]], self.names[self.phaseName[i]])
+            phases[key] = phases.get(key, 0) + ticks_diff(endUs, self.phaseStart[i])
+        return totalUs, methods, phases
+
+    def Dump(self, stream=None):
+        """
+        Writes a table of how much of the mission each method and phase took.
+
+        Parameters
+        ----------
+        stream: Where the table goes
+        type: file opened for writing
+        values: None prints it in the console. An open file saves it.
+        default: None
+        """
+        totalUs, methods, phases = self.Summary()
+        self._WriteLine(stream, "Profile of " + _Seconds(totalUs) + " s, " + str(self.count) + " calls" + \
+            (", " + str(self.dropped) + " not recorded" if self.dropped else ""))
+        self._WriteLine(stream, "method                calls  seconds  percent  passes  loop Hz")
+        methodsUs = 0
+        for name in sorted(methods):
+            calls, durationUs, passes = methods[name]
+            methodsUs += durationUs
+            self._WriteLine(stream, _Pad(name, 22) + _Pad(str(calls), 7) + _Pad(_Seconds(durationUs), 9) + \
+                _Pad(_Percent(durationUs, totalUs), 9) + _Pad(str(passes), 8) + \
+                str(round(passes * 1000000 / durationUs, 1)))
+            for key in sorted(phases):
+                if key[0] == name:
+                    self._WriteLine(stream, _Pad("  " + key[1], 29) + _Pad(_Seconds(phases[key]), 9) + \
+                        _Percent(phases[key], totalUs))
+        otherUs = totalUs - methodsUs
+        self._WriteLine(stream, _Pad("everything else", 29) + _Pad(_Seconds(otherUs), 9) + _Percent(otherUs, totalUs))
+
+    def _WriteLine(self, stream, line):
+        if stream is None:
+            print(line)
+        else:
+            stream.write(line + "\n")
+
+
+def _Pad(text, width):
+    #MicroPython strings have no ljust()
+    return text + " " * (width - len(text))
+
+
+def _Seconds(us):
+    return str(round(us / 1000000, 2))
+
+
+def _Percent(us, totalUs):
+    if totalUs <= 0:
+        return "0%"
+    return str(round(100 * us / totalUs, 1)) + "%"
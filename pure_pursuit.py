@@ -0,0 +1,193 @@
+"""
+Pure pursuit path following for FLL Team 24277's Base Robot.
+
+Pure pursuit drives along a list of points without stopping at any of them.
+On every control loop pass it picks a spot on the path a little way ahead of
+the robot (the "lookahead" point) and steers along the circle that passes
+through it. Corners get rounded off, which is a lot faster than stopping,
+turning in place and driving again.
+
+Positions are in cm and headings in degrees, the same as odometry.py.
+
+This file must be uploaded to the hub next to base_robot.py.
+"""
+import math
+
+
+class PurePursuit():
+    """
+    The geometry of one path and the steering to follow it.
+
+    Parameters
+    ----------
+    points: The path, from where the robot starts to where it should end
+    type: list of (x, y) tuples
+    values: at least two points
+    lookahead: How far ahead along the path the robot aims, in cm. Longer \
+        is smoother, shorter follows the corners more tightly.
+    type: float
+    default: 15
+    trackWidth: Distance between the drive wheels in cm
+    type: float
+    default: 11.2
+
+    Example
+    -------
+    >>> path = PurePursuit([(0, 0), (50, 0), (50, 40)], 15)
+    >>> targetX, targetY = path.Target(x, y)
+    >>> steering, speedScale = path.Steering(x, y, heading, targetX, targetY)
+    """
+    def __init__(self, points, lookahead=15, trackWidth=11.2):
+        if len(points) < 2:
+            raise ValueError("PurePursuit needs at least two points")
+        self.points = points
+        self.lookahead = lookahead
+        self.trackWidth = trackWidth
+        #Distance along the path to each point, and how sharp each corner is
+        self.distances = [0]
+        for i in range(1, len(points)):
+            self.distances.append(self.distances[-1] + _Distance(points[i - 1], points[i]))
+        self.length = self.distances[-1]
+        self.cornerCurvature = [0] * len(points)
+        for i in range(1, len(points) - 1):
+            before = _Direction(points[i - 1], points[i])
+            after = _Direction(points[i], points[i + 1])
+            #Turning by this angle over about one lookahead distance
+            self.cornerCurvature[i] = abs(math.radians(_Wrap(after - before))) / lookahead
+        self.progress = 0
+        self._segment = 0
+
+    def Target(self, x, y):
+        """
+        Updates how far along the path the robot is, and returns the \
+        lookahead point (x, y). Past the end of the path the lookahead point \
+        keeps going in a straight line, so the robot drives through the last \
+        point instead of circling it.
+        """
+        #Only search forward, so the robot can't jump back to an earlier leg
+        best = None
+        for i in range(self._segment, len(self.points) - 1):
+            along, distance = self._Project(i, x, y)
+            if best is None or distance < best[2]:
+                best = (i, along, distance)
+            elif distance > best[2] + self.lookahead:
+                break
+        self._segment = best[0]
+        self.progress = self.distances[best[0]] + best[1]
+        return self.PointAt(self.progress + self.lookahead)
+
+    def PointAt(self, position):
+        """
+        The (x, y) of the spot `position` cm along the path.
+        """
+        i = 0
+        last = len(self.points) - 2
+        while i < last and self.distances[i + 1] < position:
+            i += 1
+        start = self.points[i]
+        end = self.points[i + 1]
+        length = self.distances[i + 1] - self.distances[i]
+        if length <= 0:
+            return end
+        fraction = (position - self.distances[i]) / length
+        return (start[0] + (end[0] - start[0]) * fraction, start[1] + (end[1] - start[1]) * fraction)
+
+    def Curvature(self, x, y, heading, targetX, targetY):
+        """
+        Curvature (1/cm) of the circle from the robot through the target. \
+        Positive curves to the right.
+        """
+        dx = targetX - x
+        dy = targetY - y
+        h = math.radians(heading)
+        #Where the target is from the robot's point of view
+        side = -dx * math.sin(h) + dy * math.cos(h)
+        distanceSquared = dx * dx + dy * dy
+        if distanceSquared <= 0:
+            return 0
+        return 2 * side / distanceSquared
+
+    def Steering(self, x, y, heading, targetX, targetY):
+        """
+        MotorPair steering that follows the curve to the target, and how much \
+        to scale the speed by so the middle of the robot keeps its speed.
+
+        MotorPair.start() drives the outside wheel at `speed` and slows the \
+        inside wheel down to speed * (50 - |steering|) / 50.
+        """
+        curvature = self.Curvature(x, y, heading, targetX, targetY)
+        halfTrack = abs(curvature) * self.trackWidth / 2
+        ratio = (1 - halfTrack) / (1 + halfTrack)
+        steering = 50 * (1 - ratio)
+        if steering > 100:
+            steering = 100
+        if curvature < 0:
+            steering = -steering
+        #The middle of the robot moves at the average of the two wheels
+        return (steering, 2 / (1 + max(ratio, -1 + 0.01)))
+
+    def SpeedLimit(self, minSpeed, lateralAccel, decel):
+        """
+        The fastest the robot may go at its current progress and still slow \
+        down in time for every corner ahead, or None if there are no corners \
+        ahead. Speeds are in cm/s, `lateralAccel` and `decel` in cm/s/s. A \
+        corner is taken at the speed that keeps the sideways acceleration \
+        at `lateralAccel`, but never slower than `minSpeed`.
+        """
+        limit = None
+        for i in range(self._segment + 1, len(self.points) - 1):
+            curvature = self.cornerCurvature[i]
+            if curvature <= 0:
+                continue
+            speed = max(minSpeed, math.sqrt(lateralAccel / curvature))
+            distance = max(0, self.distances[i] - self.progress)
+            speed = math.sqrt(speed * speed + 2 * decel * distance)
+            if limit is None or speed < limit:
+                limit = speed
+        return limit
+
+    def Finished(self, x, y, heading, tolerance=1.0):
+        """
+        True when the robot has reached or driven past the last point.
+        """
+        end = self.points[-1]
+        dx = end[0] - x
+        dy = end[1] - y
+        if dx * dx + dy * dy <= tolerance * tolerance:
+            return True
+        #The last point is behind the robot and the robot is on the last leg
+        h = math.radians(heading)
+        ahead = dx * math.cos(h) + dy * math.sin(h)
+        return self._segment == len(self.points) - 2 and ahead <= 0
+
+    def _Project(self, i, x, y):
+        #How far along segment i the closest spot to x, y is, and how far away it is
+        start = self.points[i]
+        end = self.points[i + 1]
+        dx = end[0] - start[0]
+        dy = end[1] - start[1]
+        length = self.distances[i + 1] - self.distances[i]
+        if length <= 0:
+            return (0, _Distance(start, (x, y)))
+        along = ((x - start[0]) * dx + (y - start[1]) * dy) / length
+        along = max(0, min(length, along))
+        spot = (start[0] + dx * along / length, start[1] + dy * along / length)
+        return (along, _Distance(spot, (x, y)))
+
+
+def _Distance(a, b):
+    dx = b[0] - a[0]
+    dy = b[1] - a[1]
+    return math.sqrt(dx * dx + dy * dy)
+
+
+def _Direction(a, b):
+    return math.degrees(math.atan2(b[1] - a[1], b[0] - a[0]))
+
+
+def _Wrap(angle):
+    while angle > 180:
+        angle -= 360
+    while angle <= -180:
+        angle += 360
+    return angle
@@ -0,0 +1,239 @@
+"""
+Cooperative tasks for FLL Team 24277's Base Robot.
+
+The hub can only do one thing at a time, but it can take turns very quickly.
+A task is a python generator: it does a little bit of work, then says
+``yield`` to let the other tasks have a turn. The Scheduler gives every task
+one turn per control loop pass, so a drive, an arm move and a sensor wait can
+all happen at the same time.
+
+Generators work the same in MicroPython on the hub and in regular python.
+
+This file must be uploaded to the hub next to base_robot.py.
+"""
+from control_loop import ticks_us, ticks_diff
+
+
+class Task():
+    """
+    One generator being run by a Scheduler. Made by ``Scheduler.Start()``.
+
+    - done: True once the generator has finished
+    - result: What the generator returned, once it is done
+    """
+    def __init__(self, generator, name=None):
+        self.generator = generator
+        self.name = name
+        self.done = False
+        self.result = None
+
+    def Cancel(self):
+        """
+        Stops the task where it is. Motor tasks stop their motor.
+        """
+        if not self.done:
+            self.generator.close()
+            self.done = True
+
+
+class Scheduler():
+    """
+    Takes turns running tasks, one turn each per control loop pass.
+
+    A task that is started keeps running in the background until it is done. \
+    Background tasks only get their turns while the scheduler is running \
+    something, for example while the robot is driving with one of the \
+    BaseRobot methods, or during ``WaitFor()``.
+
+    Parameters
+    ----------
+    loop: The ControlLoop that sets how often tasks get a turn
+    type: ControlLoop
+    memory: Told when the scheduler starts and stops running, so garbage \
+        is collected between moves instead of during them
+    type: MemoryPolicy from memory.py
+    default: None
+    driveCommands: Told to stop the drive motors if a task stops with an \
+        error, after every task has been cancelled
+    type: MotorCommands from motor_commands.py
+    default: None
+
+    Example
+    -------
+    >>> scheduler = Scheduler(br.controlLoop)
+    >>> arm = scheduler.Start(MotorForSeconds(br.leftMedMotor, 2, 100))
+    >>> scheduler.Run(br.GyroDriveOnHeadingTask(60, 0))
+    >>> scheduler.WaitFor(arm)
+    """
+    def __init__(self, loop, memory=None, driveCommands=None):
+        self.loop = loop
+        self.memory = memory
+        self.driveCommands = driveCommands
+        self.tasks = []
+        self._running = False
+
+    def Start(self, generator, name=None):
+        """
+        Adds a task. It gets its first turn the next time the scheduler runs.
+
+        Returns
+        -------
+        The Task, which can be passed to ``WaitFor()`` or ``Join()``.
+        """
+        task = Task(generator, name)
+        self.tasks.append(task)
+        return task
+
+    def Step(self):
+        """
+        Gives every task one turn, and drops the ones that are done.
+        """
+        #Tasks started during this pass get their first turn right away
+        i = 0
+        while i < len(self.tasks):
+            task = self.tasks[i]
+            i += 1
+            if task.done:
+                continue
+            try:
+                next(task.generator)
+            except StopIteration as stop:
+                task.done = True
+                task.result = stop.value
+        #Drop the finished tasks in place, so no new list is made every pass
+        tasks = self.tasks
+        kept = 0
+        for i in range(len(tasks)):
+            if not tasks[i].done:
+                tasks[kept] = tasks[i]
+                kept += 1
+        while len(tasks) > kept:
+            tasks.pop()
+
+    def Run(self, generator):
+        """
+        Runs one task until it is done, giving the background tasks their \
+        turns along the way.
+
+        Returns
+        -------
+        What the generator returned.
+        """
+        task = self.Start(generator)
+        self.WaitFor(task)
+        return task.result
+
+    def WaitFor(self, *tasks):
+        """
+        Runs until all of `tasks` are done. With no tasks, runs until every \
+        task is done. If a task stops with an error, or the program is \
+        stopped, every task is cancelled and the drive motors are stopped \
+        before the error carries on.
+        """
+        if self._running:
+            raise RuntimeError("Scheduler is already running. Inside a task use " + \
+                "'yield from' the Task version of a method, or Join().")
+        self._running = True
+        memory = self.memory
+        if memory is not None:
+            memory.EnterLoop()
+        finished = False
+        try:
+            self.loop.Start()
+            while True:
+                self.Step()
+                if _AllDone(tasks if tasks else self.tasks):
+                    finished = True
+                    return
+                self.loop.Wait()
+        finally:
+            self._running = False
+            if not finished:
+                #Closing a task runs its finally blocks, which stop its motors
+                for task in self.tasks:
+                    task.Cancel()
+                del self.tasks[:]
+                if self.driveCommands is not None:
+                    self.driveCommands.Stop()
+            if memory is not None:
+                memory.LeaveLoop()
+
+    def RunTogether(self, *generators):
+        """
+        Starts all of the generators as tasks and waits until all of them are done.
+        """
+        tasks = [self.Start(generator) for generator in generators]
+        self.WaitFor(*tasks)
+        return [task.result for task in tasks]
+
+
+def _AllDone(tasks):
+    for task in tasks:
+        if not task.done:
+            return False
+    return True
+
+
+#Ready made tasks. Use them with Scheduler.Start(), or "yield from" them \
+#inside another task.
+
+def Join(*tasks):
+    """
+    A task that waits until all of `tasks` are done.
+    """
+    while not _AllDone(tasks):
+        yield
+
+
+def WaitForSeconds(seconds):
+    """
+    A task that waits for `seconds`.
+    """
+    startUs = ticks_us()
+    while ticks_diff(ticks_us(), startUs) < seconds * 1000000:
+        yield
+
+
+def WaitUntil(function):
+    """
+    A task that waits until `function()` returns True, for example \
+    ``WaitUntil(lambda: br.colorSensor.get_color() == 'black')``.
+    """
+    while not function():
+        yield
+
+
+def MotorForDegrees(motor, degrees, speed):
+    """
+    A task that runs a motor for `degrees`, like ``motor.run_for_degrees()`` \
+    but without making everything else wait. Negative degrees or a negative \
+    speed run the motor backwards.
+    """
+    if degrees < 0:
+        degrees = -degrees
+        speed = -speed
+    startDegrees = motor.get_degrees_counted()
+    motor.start(int(speed))
+    try:
+        while abs(motor.get_degrees_counted() - startDegrees) < degrees:
+            yield
+    finally:
+        motor.stop()
+
+
+def MotorForRotations(motor, rotations, speed):
+    """
+    A task that runs a motor for `rotations`, like ``motor.run_for_rotations()``.
+    """
+    yield from MotorForDegrees(motor, rotations * 360, speed)
+
+
+def MotorForSeconds(motor, seconds, speed):
+    """
+    A task that runs a motor for `seconds`, like ``motor.run_for_seconds()``.
+    """
+    motor.start(int(speed))
+    try:
+        yield from WaitForSeconds(seconds)
+    finally:
+        motor.stop()
@@ -0,0 +1,78 @@
+"""
+Sensor readings for FLL Team 24277's Base Robot.
+
+Every control loop pass needs the gyro yaw and both drive motor counts, for
+the controller, for odometry and for telemetry. Asking the hub for each of
+them every time it is needed is slow, and the readings can come from slightly
+different moments. Sensors reads each one once per pass into a snapshot that
+everything in the pass shares. It is made once, with the device handles the
+robot already has, so no new objects are made while driving.
+
+This file must be uploaded to the hub next to base_robot.py.
+"""
+
+
+class Sensors():
+    """
+    A snapshot of the gyro, the drive motor encoders and the color sensor. \
+    ``Read()`` fills it in, then the readings are in yaw, left, right, light \
+    and color until the next ``Read()``.
+
+    Parameters
+    ----------
+    motionSensor: The hub's motion sensor
+    type: MotionSensor
+    leftMotor: The left drive motor. It is mirrored, so it counts down going \
+        forward. left counts up instead.
+    type: Motor
+    rightMotor: The right drive motor
+    type: Motor
+    colorSensor: The color sensor used for line following
+    type: ColorSensor
+
+    Example
+    -------
+    >>> s = br.sensors.Read()
+    >>> print(s.yaw, s.left, s.right)
+    """
+    def __init__(self, motionSensor, leftMotor, rightMotor, colorSensor):
+        self.motionSensor = motionSensor
+        self.leftMotor = leftMotor
+        self.rightMotor = rightMotor
+        self.colorSensor = colorSensor
+        self.yaw = 0
+        self.left = 0
+        self.right = 0
+        self.light = 0
+        self.color = None
+        #How many times a device was asked for a reading
+        self.reads = 0
+
+    def Read(self, light=False, color=False):
+        """
+        Reads the yaw and both drive motor counts, the reflected light too if \
+        `light` is True, and the color if `color` is True.
+
+        Returns
+        -------
+        The Sensors itself, so ``s = br.sensors.Read()`` is a short name for it.
+        """
+        self.yaw = self.motionSensor.get_yaw_angle()
+        self.left = -self.leftMotor.get_degrees_counted()
+        self.right = self.rightMotor.get_degrees_counted()
+        self.reads += 3
+        if light:
+            self.light = self.colorSensor.get_reflected_light()
+            self.reads += 1
+        if color:
+            self.color = self.colorSensor.get_color()
+            self.reads += 1
+        return self
+
+    def ReadYaw(self):
+        """
+        Reads only the yaw, and returns it.
+        """
+        self.yaw = self.motionSensor.get_yaw_angle()
+        self.reads += 1
+        return self.yaw
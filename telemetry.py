@@ -0,0 +1,113 @@
+"""
+Telemetry ring buffer for FLL Team 24277's Base Robot.
+
+Printing inside a control loop is very slow on the hub, so the drive and turn
+methods write one sample per loop pass into a TelemetryBuffer instead. All of
+the memory is set aside once when the buffer is made, so writing a sample
+does not create any new objects. Look at the samples after the move is done
+with ``BaseRobot.DumpTelemetry()``.
+
+This file must be uploaded to the hub next to base_robot.py.
+"""
+from array import array
+
+
+class TelemetryBuffer():
+    """
+    A fixed size buffer of control loop samples. When the buffer is full the \
+    oldest samples are written over, so it always holds the most recent \
+    `size` samples.
+
+    Each sample holds
+    - time: microseconds since the move started
+    - encoder: drive motor degrees counted
+    - yaw: gyro yaw angle in degrees
+    - speed: commanded speed
+    - steering: commanded steering
+
+    Parameters
+    ----------
+    size: How many samples to keep
+    type: int
+    values: any value above 0. Each sample uses 20 bytes.
+    default: 1000
+
+    Example
+    -------
+    >>> buffer = TelemetryBuffer(500)
+    >>> buffer.Add(0, 0, 0, 10, 0)
+    >>> for sample in buffer.Samples():
+    >>>     print(sample)
+    """
+    def __init__(self, size=1000):
+        if size <= 0:
+            raise ValueError("TelemetryBuffer size must be above 0")
+        self.size = size
+        self.time = array('l', [0] * size)
+        self.encoder = array('l', [0] * size)
+        self.yaw = array('f', [0] * size)
+        self.speed = array('f', [0] * size)
+        self.steering = array('f', [0] * size)
+        self.Clear()
+
+    def Clear(self):
+        """
+        Forgets all of the samples. The memory is kept for the next move.
+        """
+        self._next = 0
+        self.count = 0
+        self.label = ""
+
+    def Add(self, timeUs, encoder, yaw, speed, steering):
+        """
+        Writes one sample into the buffer.
+        """
+        i = self._next
+        self.time[i] = timeUs
+        self.encoder[i] = encoder
+        self.yaw[i] = yaw
+        self.speed[i] = speed
+        self.steering[i] = steering
+        i += 1
+        if i == self.size:
+            i = 0
+        self._next = i
+        if self.count < self.size:
+            self.count += 1
+
+    def Samples(self):
+        """
+        Goes through the samples from oldest to newest. Each sample is a tuple \
+        of (time, encoder, yaw, speed, steering).
+        """
+        first = self._next - self.count
+        if first < 0:
+            first += self.size
+        for n in range(self.count):
+            i = (first + n) % self.size
+            yield (self.time[i], self.encoder[i], self.yaw[i], \
+                self.speed[i], self.steering[i])
+
+    def Dump(self, stream=None):
+        """
+        Writes the samples as comma separated lines, starting with a header.
+
+        Parameters
+        ----------
+        stream: Where the lines go
+        type: file opened for writing
+        values: None prints the lines in the console. An open file saves \
+            them, for example ``open("/run1.csv", "w")``.
+        default: None
+        """
+        self._WriteLine(stream, "label,time_us,encoder,yaw,speed,steering")
+        for sample in self.Samples():
+            self._WriteLine(stream, self.label + "," + str(sample[0]) + "," + \
+                str(sample[1]) + "," + str(sample[2]) + "," + str(sample[3]) + \
+                "," + str(sample[4]))
+
+    def _WriteLine(self, stream, line):
+        if stream is None:
+            print(line)
+        else:
+            stream.write(line + "\n")
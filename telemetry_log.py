@@ -0,0 +1,140 @@
+"""
+Binary telemetry log for FLL Team 24277's Base Robot.
+
+Printing samples as text is slow on the hub and the text is a pain to read
+back. A TelemetryLog writes every control loop pass as a small fixed size
+record instead, and saves them to a file a chunk at a time, so the hub only
+touches the file system every so often.
+
+Start one with ``br.StartTelemetryLog("/run1.log")`` and stop it with
+``br.StopTelemetryLog()``. Copy the files to a computer and read them with
+desktop/telemetry_reader.py.
+
+The file starts with an 8 byte header: the letters FLLT, the format version
+and the size of one record. After that come the records, each of them
+
+    time      uint32  microseconds since the log started
+    left      int32   left drive motor degrees counted, forward is positive
+    right     int32   right drive motor degrees counted
+    yaw       int16   gyro yaw in tenths of a degree
+    speed     int8    commanded speed in percent
+    steering  int8    commanded steering
+    light     uint8   reflected light from the color sensor, 0 to 100
+    label     uint8   which method wrote the record, a number from LABELS,
+                      plus MOVE_START on the first record of each move
+
+all little endian with no padding, 18 bytes per record.
+
+Just before its first record, GyroTurn and GyroDriveOnHeading write a target
+record, with TARGET added to the label, saying what the move was asked to do:
+
+    left      the yaw to turn to, or the distance to drive, in tenths
+    right     the heading to drive on, in tenths of a degree
+    yaw       cm per drive wheel turn, in hundredths
+    speed     top speed in percent
+    steering  1 for a predictive GyroTurn, otherwise 0
+
+This file must be uploaded to the hub next to base_robot.py.
+"""
+try:
+    #MicroPython on the hub
+    import ustruct as struct
+except ImportError:
+    import struct
+from control_loop import ticks_us, ticks_diff
+
+MAGIC = b"FLLT"
+VERSION = 3
+HEADER_FORMAT = "<4sHH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RECORD_FORMAT = "<IiihbbBB"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+#The method that wrote each record. New methods go at the end so old logs \
+#still read the same.
+LABELS = ("", "GyroTurn", "GyroDriveOnHeading", "FollowPath", "FollowLine", "CalibrateLineSensor")
+#Added to the label of the first record of every move, so moves of the same \
+#method one after another can be told apart
+MOVE_START = 0x80
+#Added to the label of target records
+TARGET = 0x40
+
+
+class TelemetryLog():
+    """
+    Writes control loop samples to a binary file, a chunk at a time.
+
+    Parameters
+    ----------
+    path: The file to write. It is replaced if it is already there.
+    type: string
+    values: Any file name on the hub, for example "/run1.log"
+    default: No default value
+    chunkRecords: How many records to collect before writing them to the file
+    type: int
+    values: any value above 0. Each record uses 18 bytes of memory.
+    default: 64
+
+    Example
+    -------
+    >>> log = TelemetryLog("/run1.log")
+    >>> log.Add("GyroTurn", 0, 0, 0, 50, 100, 42, True)
+    >>> log.Close()
+    """
+    def __init__(self, path, chunkRecords=64):
+        if chunkRecords <= 0:
+            raise ValueError("TelemetryLog chunkRecords must be above 0")
+        self.path = path
+        self.count = 0
+        self._chunk = bytearray(chunkRecords * RECORD_SIZE)
+        self._offset = 0
+        self._lastLabel = ""
+        self._lastLabelNumber = 0
+        self._file = open(path, "wb")
+        self._file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, RECORD_SIZE))
+        self._startUs = ticks_us()
+
+    def Add(self, label, left, right, yaw, speed, steering, light, first=False):
+        """
+        Adds one record. `label` is the name of the method, one of LABELS, \
+        and `first` is True for the first record of a move. Speed and \
+        steering are kept between -100 and 100.
+        """
+        labelNumber = self._LabelNumber(label)
+        self._Write(left, right, yaw * 10, speed, steering, light, labelNumber | MOVE_START if first else labelNumber)
+
+    def AddTarget(self, label, target, heading, speed, variant, cmPerTurn):
+        """
+        Adds a target record for the move that is about to start, see the \
+        top of this file.
+        """
+        self._Write(target * 10, heading * 10, cmPerTurn * 100, speed, variant, 0, self._LabelNumber(label) | TARGET)
+
+    def _LabelNumber(self, label):
+        if label is not self._lastLabel:
+            self._lastLabelNumber = LABELS.index(label) if label in LABELS else 0
+            self._lastLabel = label
+        return self._lastLabelNumber
+
+    def _Write(self, left, right, yaw, speed, steering, light, label):
+        struct.pack_into(RECORD_FORMAT, self._chunk, self._offset,
+            ticks_diff(ticks_us(), self._startUs) & 0xffffffff, int(left), int(right), int(yaw),
+            max(-100, min(100, int(speed))), max(-100, min(100, int(steering))), int(light), label)
+        self._offset += RECORD_SIZE
+        self.count += 1
+        if self._offset == len(self._chunk):
+            self.Flush()
+
+    def Flush(self):
+        """
+        Writes the records collected so far to the file.
+        """
+        if self._offset:
+            self._file.write(memoryview(self._chunk)[0:self._offset])
+            self._offset = 0
+
+    def Close(self):
+        """
+        Writes what is left and closes the file.
+        """
+        self.Flush()
+        self._file.close()